@@ -4,7 +4,7 @@ from CommonServerUserPython import *
 
 
 ''' IMPORTS '''
-from typing import Dict, Tuple, Union
+from typing import Dict, List, Tuple, Union
 import urllib3
 
 # Disable insecure warnings
@@ -27,6 +27,8 @@ INTEGRATION_COMMAND_NAME = 'alienvault'
 INTEGRATION_CONTEXT_NAME = 'AlienVaultOTX'
 DEFAULT_THRESHOLD = int(demisto.params().get('default_threshold', 2))
 TOKEN = demisto.params().get('api_token')
+# Maximal number of concurrent requests when querying several indicators
+MAX_WORKERS = 10
 
 
 class Client(BaseClient):
@@ -50,6 +52,37 @@ class Client(BaseClient):
         Returns:
             Response JSON
         """
+        # Send a request using our http_request wrapper
+        return self._http_request(**self.query_kwargs(section, argument, sub_section, params))
+
+    def query_batch(self, section: str, arguments: list, sub_section: str = 'general') -> list:
+        """Query several indicators of the same section concurrently.
+
+        Args:
+            section: indicator type
+            arguments: indicator values
+            sub_section: sub section of api
+
+        Returns:
+            Response JSON of each argument, in the same order as the arguments.
+            A failed query has the raised exception instead of a response.
+        """
+        return self._http_request_batch([self.query_kwargs(section, argument, sub_section) for argument in arguments],
+                                        max_workers=MAX_WORKERS)
+
+    @staticmethod
+    def query_kwargs(section: str, argument: str = None, sub_section: str = 'general', params: dict = None) -> Dict:
+        """Build the http request arguments of a query.
+
+        Args:
+            section: indicator type
+            argument: indicator value
+            sub_section: sub section of api
+            params: params to send in http request
+
+        Returns:
+            _http_request keyword arguments
+        """
         # The service endpoint to request from
         if section == 'pulses':
             suffix = f'{section}/{argument}'
@@ -57,15 +90,14 @@ class Client(BaseClient):
             suffix = f'indicators/{section}/{argument}/{sub_section}'
         else:
             suffix = f'{section}/{sub_section}'
-        # Send a request using our http_request wrapper
+        kwargs = {
+            'method': 'GET',
+            'url_suffix': suffix,
+            'params': params
+        }
         if sub_section == 'passive_dns':
-            return self._http_request('GET',
-                                      url_suffix=suffix,
-                                      params=params,
-                                      timeout=30)
-        return self._http_request('GET',
-                                  url_suffix=suffix,
-                                  params=params)
+            kwargs['timeout'] = 30
+        return kwargs
 
 
 ''' HELPER FUNCTIONS '''
@@ -119,6 +151,52 @@ def create_list_by_ec(list_entries: list, list_type: str) -> list:
     return [create_entry_by_ec(entry) for entry in list_entries]
 
 
+def query_indicators(client: Client, section: str, arguments: list,
+                     sub_section: str = 'general') -> Tuple[List[Tuple[str, Dict]], List[Tuple[str, Exception]]]:
+    """Query all the indicators concurrently, without failing on a single indicator.
+
+    Args:
+        client: Client object with request
+        section: indicator type
+        arguments: indicator values
+        sub_section: sub section of api
+
+    Returns:
+        The (indicator, response) of the successful queries and the (indicator, error) of the failed ones.
+
+    Raises:
+        The error of the first indicator if all the queries failed.
+    """
+    responses = client.query_batch(section=section, arguments=arguments, sub_section=sub_section)
+    succeeded: list = []
+    failed: list = []
+    for argument, response in zip(arguments, responses):
+        if isinstance(response, Exception):
+            failed.append((argument, response))
+        else:
+            succeeded.append((argument, response))
+    if failed and not succeeded:
+        raise failed[0][1]
+    return succeeded, failed
+
+
+def failed_queries_to_markdown(failed: list) -> str:
+    """Human readable of the indicators which failed to be queried.
+
+    Args:
+        failed: (indicator, error) of the failed queries
+
+    Returns:
+        markdown table, or an empty string if no query failed
+    """
+    if not failed:
+        return ''
+    return tableToMarkdown(f'{INTEGRATION_NAME} - Failed queries',
+                           [{'Indicator': argument, 'Error': str(error.args[0] if error.args else error)}
+                            for argument, error in failed],
+                           headers=['Indicator', 'Error'])
+
+
 def create_pulse_by_ec(entry: dict) -> dict:
     pulse_by_ec = {
         'ID': entry.get('id'),
@@ -178,9 +256,8 @@ def ip_command(client: Client, ip_address: str, ip_version: str) -> Tuple[str, D
     ip_ec: list = []
     alienvault_ec: list = []
     dbotscore_ec: list = []
-    for arg in query_args:
-        raw_response = client.query(section=ip_version,
-                                    argument=arg)
+    responses, failed = query_indicators(client, section=ip_version, arguments=query_args)
+    for arg, raw_response in responses:
         if raw_response:
             raws.append(raw_response)
             ip_ec.append({
@@ -212,6 +289,7 @@ def ip_command(client: Client, ip_address: str, ip_version: str) -> Tuple[str, D
     }
     human_readable = tableToMarkdown(t=context_entry.get(outputPaths.get("ip")),
                                      name=title)
+    human_readable += failed_queries_to_markdown(failed)
     return human_readable, context_entry, raws
 
 
@@ -232,9 +310,8 @@ def domain_command(client: Client, domain: str) -> Tuple[str, Dict, Union[Dict,
     domain_ec = []
     dbotscore_ec = []
     alienvault_ec = []
-    for args in query_args:
-        raw_response = client.query(section='domain',
-                                    argument=args)
+    responses, failed = query_indicators(client, section='domain', arguments=query_args)
+    for _, raw_response in responses:
         if raw_response:
             raws.append(raw_response)
             domain_ec.append({
@@ -263,6 +340,7 @@ def domain_command(client: Client, domain: str) -> Tuple[str, Dict, Union[Dict,
         f'AlienVaultOTX.Domain(val.Alexa && val.Alexa === obj.Alexa &&'
         f'val.Whois && val.Whois === obj.Whois)'),
         name=title)
+    human_readable += failed_queries_to_markdown(failed)
     return human_readable, context_entry, raws
 
 
@@ -282,12 +360,14 @@ def file_command(client: Client, file: str) -> Tuple[str, Dict, Union[Dict, list
     raws: list = []
     file_ec: list = []
     dbotscore_ec: list = []
-    for args in query_args:
-        raw_response_analysis = client.query(section='file',
-                                             argument=args,
-                                             sub_section='analysis')
-        raw_response_general = client.query(section='file',
-                                            argument=args)
+    responses_analysis, failed = query_indicators(client, section='file', arguments=query_args,
+                                                  sub_section='analysis')
+    responses_general, failed_general = query_indicators(client, section='file',
+                                                         arguments=[args for args, _ in responses_analysis])
+    failed += failed_general
+    raws_general = dict(responses_general)
+    for args, raw_response_analysis in responses_analysis:
+        raw_response_general = raws_general.get(args)
         if raw_response_analysis and raw_response_general:
             raws.append(raw_response_analysis)
             raws.append(raw_response_general)
@@ -317,6 +397,7 @@ def file_command(client: Client, file: str) -> Tuple[str, Dict, Union[Dict, list
     }
     human_readable = tableToMarkdown(name=title,
                                      t=context_entry.get(outputPaths.get("file")))
+    human_readable += failed_queries_to_markdown(failed)
 
     return human_readable, context_entry, raws
 
@@ -338,9 +419,8 @@ def url_command(client: Client, url: str) -> Tuple[str, Dict, Union[Dict, list]]
     url_ec: list = []
     alienvault_ec: list = []
     dbotscore_ec: list = []
-    for args in query_args:
-        raw_response = client.query(section='url',
-                                    argument=args)
+    responses, failed = query_indicators(client, section='url', arguments=query_args)
+    for args, raw_response in responses:
         if raw_response:
             raws.append(raw_response)
             url_ec.append({
@@ -368,6 +448,7 @@ def url_command(client: Client, url: str) -> Tuple[str, Dict, Union[Dict, list]]
     }
     human_readable = tableToMarkdown(t=context_entry.get(f'AlienVaultOTX.URL(val.Url && val.Url === obj.Url)'),
                                      name=title)
+    human_readable += failed_queries_to_markdown(failed)
     return human_readable, context_entry, raws
 
 
@@ -626,7 +707,8 @@ def main():
         base_url=base_url,
         headers={'X-OTX-API-KEY': TOKEN},
         verify=verify_ssl,
-        proxy=proxy
+        proxy=proxy,
+        pool_size=MAX_WORKERS
     )
     command = demisto.command()
     demisto.debug(f'Command being called is {command}')
@@ -24,3 +24,17 @@ arg_values_dbot = [
 @pytest.mark.parametrize(argnames=arg_names_dbot, argvalues=arg_values_dbot)
 def test_dbot_score(pulse: dict, score: int):
     assert calculate_dbot_score(pulse) == score, f"Error calculate DBot Score {pulse.get('count')}"
+
+
+def test_ip_command_partial_failure(requests_mock):
+    from AlienVault_OTX_v2 import Client, ip_command
+    client = Client(base_url='https://otx.alienvault.com/api/v1/', headers={})
+    requests_mock.get('https://otx.alienvault.com/api/v1/indicators/IPv4/8.8.8.8/general',
+                      json={'indicator': '8.8.8.8', 'pulse_info': {'count': 0}})
+    requests_mock.get('https://otx.alienvault.com/api/v1/indicators/IPv4/1.1.1.1/general',
+                      json={'indicator': '1.1.1.1', 'pulse_info': {'count': 5}})
+    requests_mock.get('https://otx.alienvault.com/api/v1/indicators/IPv4/2.2.2.2/general', status_code=500)
+    human_readable, context, raws = ip_command(client, ip_address='8.8.8.8,2.2.2.2,1.1.1.1', ip_version='IPv4')
+    # results keep the order of the input and the failed indicator does not fail the command
+    assert [raw['indicator'] for raw in raws] == ['8.8.8.8', '1.1.1.1']
+    assert '| 2.2.2.2 | Error in API call [500]' in human_readable
@@ -107,6 +107,7 @@ SERVER_BUILD = ""
 MARK_AS_READ = demisto.params().get('markAsRead', False)
 MAX_FETCH = min(50, int(demisto.params().get('maxFetch', 50)))
 LAST_RUN_IDS_QUEUE_SIZE = 500
+FETCH_PAGE_SIZE = 100
 
 START_COMPLIANCE = """
 [CmdletBinding()]
@@ -911,21 +912,34 @@ def get_last_run():
 
 
 def fetch_last_emails(account, folder_name='Inbox', since_datetime=None, exclude_ids=None):
-    qs = get_folder_by_path(account, folder_name, is_public=IS_PUBLIC_FOLDER)
+    folder = get_folder_by_path(account, folder_name, is_public=IS_PUBLIC_FOLDER)
+    qs = folder
     if since_datetime:
         qs = qs.filter(datetime_received__gte=since_datetime)
     else:
         if not FETCH_ALL_HISTORY:
             last_10_min = EWSDateTime.now(tz=EWSTimeZone.timezone('UTC')) - timedelta(minutes=10)
             qs = qs.filter(datetime_received__gte=last_10_min)
-    qs = qs.filter().only(*map(lambda x: x.name, Message.FIELDS))
+    # page through the message ids only, and stop paging once there are enough emails that were not fetched yet
+    qs = qs.filter().only('message_id')
     qs = qs.filter().order_by('datetime_received')
+    qs.page_size = FETCH_PAGE_SIZE
+
+    exclude_ids = set(exclude_ids or [])
+    items = []
+    for item in qs.iterator():
+        if isinstance(item, Message) and item.message_id and item.message_id not in exclude_ids:
+            items.append(item)
+            if len(items) >= MAX_FETCH:
+                break
+    if not items:
+        return []
 
-    result = qs.all()
+    # load the full emails, in batches, only for the selected ids
+    result = account.fetch(ids=items, folder=folder, only_fields=map(lambda x: x.name, Message.FIELDS))
     result = [x for x in result if isinstance(x, Message)]
-    if exclude_ids and len(exclude_ids) > 0:
-        exclude_ids = set(exclude_ids)
-        result = [x for x in result if x.message_id not in exclude_ids]
+    for item in result:
+        item.folder = folder
     return result
 
 
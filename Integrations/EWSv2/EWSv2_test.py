@@ -18,3 +18,51 @@ def test_start_logging():
     EWSv2.start_logging()
     logging.getLogger().debug("test this")
     assert "test this" in EWSv2.log_stream.getvalue()
+
+
+class MockQuerySet:
+    def __init__(self, items):
+        self.items = items
+        self.only_fields = None
+        self.page_size = None
+
+    def filter(self, *args, **kwargs):
+        return self
+
+    def only(self, *args):
+        self.only_fields = args
+        return self
+
+    def order_by(self, *args):
+        return self
+
+    def iterator(self):
+        return self.items
+
+
+def test_fetch_last_emails_loads_only_the_selected_emails(mocker):
+    from exchangelib.items import Message
+    emails = iter([Message(id=message_id, message_id=message_id) for message_id in ['1', '2', '3', '4', '5']])
+    folder = MockQuerySet(emails)
+    account = mocker.Mock()
+    account.fetch.side_effect = lambda ids, **kwargs: [Message(id=item.id, message_id=item.message_id) for item in ids]
+    mocker.patch.object(EWSv2, 'get_folder_by_path', return_value=folder)
+    mocker.patch.object(EWSv2, 'MAX_FETCH', 2)
+
+    result = EWSv2.fetch_last_emails(account, 'Inbox', exclude_ids=['1'])
+
+    assert folder.only_fields == ('message_id',)
+    assert [item.message_id for item in account.fetch.call_args[1]['ids']] == ['2', '3']
+    assert [item.message_id for item in result] == ['2', '3']
+    assert all(item.folder is folder for item in result)
+    # paging stops once enough emails were selected
+    assert next(emails).message_id == '4'
+
+
+def test_fetch_last_emails_without_new_emails(mocker):
+    from exchangelib.items import Message
+    account = mocker.Mock()
+    mocker.patch.object(EWSv2, 'get_folder_by_path', return_value=MockQuerySet([Message(id='1', message_id='1')]))
+
+    assert EWSv2.fetch_last_emails(account, 'Inbox', exclude_ids=['1']) == []
+    assert not account.fetch.called
@@ -5,6 +5,7 @@ from CommonServerUserPython import *
 '''IMPORTS'''
 from typing import List
 from elasticsearch import Elasticsearch, RequestsHttpConnection, NotFoundError
+from elasticsearch.helpers import scan
 from elasticsearch_dsl import Search
 from elasticsearch_dsl.query import QueryString
 from datetime import datetime
@@ -30,6 +31,7 @@ HTTP_ERRORS = {
     500: '500 Internal Server Error - Internal error',
     503: '503 Service Unavailable'
 }
+SEARCH_RESULTS_FILE_NAME = 'elasticsearch_search_results.json'
 
 
 '''VARIABLES FOR FETCH INCIDENTS'''
@@ -200,6 +202,30 @@ def get_total_results(response_dict):
     return total_dict, total_results
 
 
+def export_search_results(es, index, search, batch_size, preserve_order):
+    """Scrolls through all the hits of a search and writes them to a file, one JSON hit per line.
+
+    Args:
+        es(Elasticsearch): an Elasticsearch object with which the search is made.
+        index(str): the index in which the search is made.
+        search(Search): the search to export, without paging.
+        batch_size(int): the number of hits to read in each scroll request.
+        preserve_order(bool): whether to keep the sort of the search, which makes the scroll slower.
+
+    Returns:
+        (str).The id of the file to which the hits were written.
+        (num).The number of hits written.
+    """
+    file_id = demisto.uniqueFile()
+    total_hits = 0
+    with open(demisto.investigation()['id'] + '_' + file_id, 'w') as results_file:
+        for hit in scan(es, query=search.to_dict(), index=index, size=batch_size, preserve_order=preserve_order):
+            results_file.write(json.dumps(hit) + '\n')
+            total_hits += 1
+
+    return file_id, total_hits
+
+
 def search_command():
     """Performs a search in Elasticsearch."""
     index = demisto.args().get('index')
@@ -210,11 +236,12 @@ def search_command():
     size = int(demisto.args().get('size'))
     sort_field = demisto.args().get('sort-field')
     sort_order = demisto.args().get('sort-order')
+    export_to_file = 'true' == demisto.args().get('export-to-file')
 
     es = elasticsearch_builder()
 
     que = QueryString(query=query)
-    search = Search(using=es, index=index).query(que)[base_page:base_page + size]
+    search = Search(using=es, index=index).query(que)
     if explain:
         # if 'explain parameter is set to 'true' - adds explanation section to search results
         search = search.extra(explain=True)
@@ -226,6 +253,21 @@ def search_command():
     if sort_field is not None:
         search = search.sort({sort_field: {'order': sort_order}})
 
+    if export_to_file:
+        # scroll through all the hits instead of paging with from/size, which gets slower the deeper the page
+        file_id, total_hits = export_search_results(es, index, search, size, preserve_order=sort_field is not None)
+        demisto.results({
+            'Type': entryTypes['file'],
+            'Contents': '',
+            'ContentsFormat': formats['text'],
+            'File': SEARCH_RESULTS_FILE_NAME,
+            'FileID': file_id,
+            'HumanReadable': '### Elasticsearch Search results\nResults for query: {}\n{} hits were written to {}, '
+                             'one hit per line.'.format(query, total_hits, SEARCH_RESULTS_FILE_NAME)
+        })
+        return
+
+    search = search[base_page:base_page + size]
     response = search.execute().to_dict()
 
     total_dict, total_results = get_total_results(response)
@@ -462,8 +504,9 @@ def results_to_incidents_timestamp(response, last_fetch):
             if hit_timestamp > last_fetch:
                 last_fetch = hit_timestamp
 
-            # avoid duplication due to weak time query
-            if hit_timestamp > current_fetch:
+            # avoid duplication due to weak time query - the search_after cursor already skips the hits fetched
+            # at the time of the last fetch
+            if hit_timestamp >= current_fetch:
                 inc = {
                     'name': 'Elasticsearch: Index: ' + str(hit.get('_index')) + ", ID: " + str(hit.get('_id')),
                     'rawJSON': json.dumps(hit),
@@ -496,8 +539,9 @@ def results_to_incidents_datetime(response, last_fetch):
             if hit_date > last_fetch:
                 last_fetch = hit_date
 
-            # avoid duplication due to weak time query
-            if hit_date > current_fetch:
+            # avoid duplication due to weak time query - the search_after cursor already skips the hits fetched
+            # at the time of the last fetch
+            if hit_date >= current_fetch:
                 inc = {
                     'name': 'Elasticsearch: Index: ' + str(hit.get('_index')) + ", ID: " + str(hit.get('_id')),
                     'rawJSON': json.dumps(hit),
@@ -509,9 +553,33 @@ def results_to_incidents_datetime(response, last_fetch):
     return incidents, last_fetch
 
 
+def get_fetch_search(es, last_fetch, search_after):
+    """Builds the fetch search, sorted by the time field and by the document id as a tie breaker.
+
+    Args:
+        es(Elasticsearch): an Elasticsearch object with which the search is made.
+        last_fetch(datetime or num): the date or timestamp of the last fetched hit.
+        search_after(list): the sort values of the last fetched hit, None if there is no fetch cursor yet.
+
+    Returns:
+        (Search).The fetch search.
+    """
+    query = QueryString(query=FETCH_QUERY + " AND " + TIME_FIELD + ":*")
+    # the cursor skips the hits that were already fetched at the time of the last fetch, so hits which share that
+    # time and did not fit in the previous fetch are still fetched
+    time_range = {'gte': last_fetch} if search_after else {'gt': last_fetch}
+    search = Search(using=es, index=FETCH_INDEX).filter({'range': {TIME_FIELD: time_range}})
+    search = search.sort({TIME_FIELD: {'order': 'asc'}}, {'_id': {'order': 'asc'}})[0:FETCH_SIZE].query(query)
+    if search_after:
+        search = search.extra(search_after=search_after)
+
+    return search
+
+
 def fetch_incidents():
     last_run = demisto.getLastRun()
     last_fetch = last_run.get('time')
+    search_after = last_run.get('search_after')
 
     # handle first time fetch
     if last_fetch is None:
@@ -528,22 +596,22 @@ def fetch_incidents():
 
     es = elasticsearch_builder()
 
-    query = QueryString(query=FETCH_QUERY + " AND " + TIME_FIELD + ":*")
-    search = Search(using=es, index=FETCH_INDEX).filter({'range': {TIME_FIELD: {'gt': last_fetch}}})
-    search = search.sort({TIME_FIELD: {'order': 'asc'}})[0:FETCH_SIZE].query(query)
+    search = get_fetch_search(es, last_fetch, search_after)
     response = search.execute().to_dict()
     _, total_results = get_total_results(response)
+    hits = response.get('hits', {}).get('hits')
 
     incidents = []  # type: List
 
-    if total_results > 0:
+    if total_results > 0 and hits:
         if 'Timestamp' in TIME_METHOD:
             incidents, last_fetch = results_to_incidents_timestamp(response, last_fetch)
-            demisto.setLastRun({'time': last_fetch})
+            demisto.setLastRun({'time': last_fetch, 'search_after': hits[-1].get('sort')})
 
         else:
             incidents, last_fetch = results_to_incidents_datetime(response, last_fetch)
-            demisto.setLastRun({'time': datetime.strftime(last_fetch, TIME_FORMAT)})
+            demisto.setLastRun({'time': datetime.strftime(last_fetch, TIME_FORMAT),
+                                'search_after': hits[-1].get('sort')})
 
         demisto.info('extract {} incidents'.format(len(incidents)))
 
@@ -1,3 +1,4 @@
+import json
 from datetime import datetime
 from unittest.mock import patch
 
@@ -403,3 +404,105 @@ def test_incident_creation_with_timestamp_e7():
     incidents, last_fetch2 = results_to_incidents_timestamp(ES_V7_RESPONSE_WITH_TIMESTAMP, lastfetch)
     assert last_fetch2 == 1572502640
     assert str(incidents) == MOCK_ES7_INCIDENTS_FROM_TIMESTAMP
+
+
+ES_V7_RESPONSE_WITH_SORT = {
+    'took': 1,
+    'timed_out': False,
+    'hits': {
+        'total': {
+            'value': 2,
+            'relation': 'eq'
+        },
+        'max_score': None,
+        'hits': [
+            {
+                '_index': 'customer',
+                '_type': 'doc',
+                '_id': '456',
+                '_score': None,
+                '_source': {
+                    'Date': '2019-08-27T18:00:00Z'
+                },
+                'sort': [1566928800000, '456']
+            }, {
+                '_index': 'customer',
+                '_type': 'doc',
+                '_id': '789',
+                '_score': None,
+                '_source': {
+                    'Date': '2019-08-27T18:00:00Z'
+                },
+                'sort': [1566928800000, '789']
+            }
+        ]
+    }
+}
+
+
+class MockResponse:
+    def __init__(self, response):
+        self.response = response
+
+    def to_dict(self):
+        return self.response
+
+
+@patch("Elasticsearch_v2.TIME_FIELD", 'Date')
+@patch("Elasticsearch_v2.FETCH_INDEX", "customer")
+@patch("Elasticsearch_v2.FETCH_QUERY", "*")
+@patch("Elasticsearch_v2.FETCH_SIZE", 2)
+def test_fetch_search_with_cursor():
+    from Elasticsearch_v2 import get_fetch_search
+    last_fetch = datetime.strptime('2019-08-27T18:00:00Z', '%Y-%m-%dT%H:%M:%SZ')
+
+    search = get_fetch_search(None, last_fetch, None).to_dict()
+    assert search['sort'] == [{'Date': {'order': 'asc'}}, {'_id': {'order': 'asc'}}]
+    assert search['query']['bool']['filter'] == [{'range': {'Date': {'gt': last_fetch}}}]
+    assert 'search_after' not in search
+
+    search = get_fetch_search(None, last_fetch, [1566928800000, '123']).to_dict()
+    assert search['query']['bool']['filter'] == [{'range': {'Date': {'gte': last_fetch}}}]
+    assert search['search_after'] == [1566928800000, '123']
+    assert search['size'] == 2
+
+
+@patch("Elasticsearch_v2.TIME_METHOD", 'Simple-Date')
+@patch("Elasticsearch_v2.TIME_FORMAT", '%Y-%m-%dT%H:%M:%SZ')
+@patch("Elasticsearch_v2.TIME_FIELD", 'Date')
+@patch("Elasticsearch_v2.FETCH_INDEX", "customer")
+@patch("Elasticsearch_v2.FETCH_QUERY", "*")
+def test_fetch_incidents_keeps_hits_at_the_last_fetch_time():
+    import demistomock as demisto
+    from Elasticsearch_v2 import fetch_incidents
+    last_run = {'time': '2019-08-27T18:00:00Z', 'search_after': [1566928800000, '123']}
+    with patch.object(demisto, 'getLastRun', return_value=last_run), \
+            patch.object(demisto, 'setLastRun') as set_last_run, \
+            patch.object(demisto, 'incidents') as incidents, \
+            patch('Elasticsearch_v2.elasticsearch_builder', return_value=None), \
+            patch('Elasticsearch_v2.Search.execute', return_value=MockResponse(ES_V7_RESPONSE_WITH_SORT)):
+        fetch_incidents()
+
+    assert [incident['name'] for incident in incidents.call_args[0][0]] == [
+        'Elasticsearch: Index: customer, ID: 456',
+        'Elasticsearch: Index: customer, ID: 789'
+    ]
+    set_last_run.assert_called_once_with({'time': '2019-08-27T18:00:00Z', 'search_after': [1566928800000, '789']})
+
+
+def test_export_search_results(tmpdir):
+    import demistomock as demisto
+    from Elasticsearch_v2 import export_search_results
+    from elasticsearch_dsl import Search
+    hits = ES_V7_RESPONSE['hits']['hits']
+    with tmpdir.as_cwd(), \
+            patch.object(demisto, 'uniqueFile', return_value='file_id'), \
+            patch.object(demisto, 'investigation', return_value={'id': '1'}), \
+            patch('Elasticsearch_v2.scan', return_value=iter(hits)) as scan:
+        file_id, total_hits = export_search_results(None, 'customer', Search(), 500, preserve_order=False)
+        with open('1_file_id') as results_file:
+            lines = results_file.read().splitlines()
+
+    assert (file_id, total_hits) == ('file_id', 2)
+    assert [json.loads(line) for line in lines] == hits
+    assert scan.call_args[1]['size'] == 500
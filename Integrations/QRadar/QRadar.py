@@ -7,8 +7,10 @@ import requests
 import traceback
 import urllib
 import re
+import time
 from requests.exceptions import HTTPError
 from copy import deepcopy
+from multiprocessing.pool import ThreadPool
 
 # disable insecure warnings
 requests.packages.urllib3.disable_warnings()
@@ -25,6 +27,15 @@ if TOKEN:
     AUTH_HEADERS['SEC'] = str(TOKEN)
 OFFENSES_PER_CALL = int(demisto.params().get('offensesPerCall', 50))
 OFFENSES_PER_CALL = 50 if OFFENSES_PER_CALL > 50 else OFFENSES_PER_CALL
+# when fetch falls behind it catches up by this many offense ids per fetch
+CATCH_UP_WINDOW = max(int(demisto.params().get('catchUpWindow') or 200), OFFENSES_PER_CALL)
+# the addresses of the fetched offenses are requested in batches of this many ids, in parallel
+ADDRESS_IDS_PER_REQUEST = 50
+MAX_CONCURRENT_REQUESTS = 5
+# the offense types, closing reasons and domains are cached in the integration context for LOOKUP_TABLES_TTL seconds,
+# the addresses of the most recently used MAX_CACHED_ADDRESSES address ids of each type are cached as well
+LOOKUP_TABLES_TTL = 60 * 60
+MAX_CACHED_ADDRESSES = 5000
 
 if not TOKEN and not (USERNAME and PASSWORD):
     raise Exception('Either credentials or auth token should be provided.')
@@ -202,6 +213,11 @@ def dict_values_to_comma_separated_string(dic):
 
 # Sends request to the server using the given method, url, headers and params
 def send_request(method, url, headers=AUTH_HEADERS, params=None):
+    return send_raw_request(method, url, headers, params).json()
+
+
+# Sends request to the server using the given method, url, headers and params, and returns the response object
+def send_raw_request(method, url, headers=AUTH_HEADERS, params=None):
     try:
         log_hdr = deepcopy(headers)
         log_hdr.pop('SEC', None)
@@ -223,7 +239,7 @@ def send_request(method, url, headers=AUTH_HEADERS, params=None):
         if 'code' in err_json:
             err_msg = err_msg + 'QRadar Error Code: {0}'.format(err_json['code'])
         raise Exception(err_msg)
-    return res.json()
+    return res
 
 
 # Generic function that receives a result json, and turns it into an entryObject
@@ -262,7 +278,7 @@ def epoch_to_ISO(ms_passed_since_epoch):
 # Converts closing reason name to id
 def convert_closing_reason_name_to_id(closing_name, closing_reasons=None):
     if not closing_reasons:
-        closing_reasons = get_closing_reasons(include_deleted=True, include_reserved=True)
+        closing_reasons = get_cached_closing_reasons()
     for closing_reason in closing_reasons:
         if closing_reason['text'] == closing_name:
             return closing_reason['id']
@@ -272,7 +288,7 @@ def convert_closing_reason_name_to_id(closing_name, closing_reasons=None):
 # Converts closing reason id to name
 def convert_closing_reason_id_to_name(closing_id, closing_reasons=None):
     if not closing_reasons:
-        closing_reasons = get_closing_reasons(include_deleted=True, include_reserved=True)
+        closing_reasons = get_cached_closing_reasons()
     for closing_reason in closing_reasons:
         if closing_reason['id'] == closing_id:
             return closing_reason['text']
@@ -282,7 +298,7 @@ def convert_closing_reason_id_to_name(closing_id, closing_reasons=None):
 # Converts offense type id to name
 def convert_offense_type_id_to_name(offense_type_id, offense_types=None):
     if not offense_types:
-        offense_types = get_offense_types()
+        offense_types = get_cached_offense_types()
     if offense_types:
         for o_type in offense_types:
             if o_type['id'] == offense_type_id:
@@ -290,6 +306,33 @@ def convert_offense_type_id_to_name(offense_type_id, offense_types=None):
     return offense_type_id
 
 
+# Returns a lookup table from the integration context, the table is requested with get_table if it isn't cached or
+# if it expired
+def get_cached_lookup_table(name, get_table, refresh=False):
+    context = demisto.getIntegrationContext() or {}
+    lookup_tables = context.setdefault('lookup_tables', {})
+    now = time.time()
+    if refresh or name not in lookup_tables or now - lookup_tables[name]['time'] >= LOOKUP_TABLES_TTL:
+        lookup_tables[name] = {'time': now, 'value': get_table()}
+        demisto.setIntegrationContext(context)
+    return lookup_tables[name]['value']
+
+
+def get_cached_offense_types():
+    return get_cached_lookup_table('offense_types', get_offense_types)
+
+
+# The closing reasons are refreshed when a name is missing, so a closing reason added since they were cached can
+# be used to close an offense right away
+def get_cached_closing_reasons(refresh=False):
+    return get_cached_lookup_table('closing_reasons',
+                                   lambda: get_closing_reasons(include_deleted=True, include_reserved=True), refresh)
+
+
+def get_cached_domains():
+    return get_cached_lookup_table('domains', lambda: get_devices(_fields='id,name'))
+
+
 ''' Request/Response methods '''
 
 
@@ -305,6 +348,18 @@ def get_offenses(_range, _filter='', _fields=''):
     return send_request('GET', full_url, headers, params)
 
 
+# Returns the offenses in the range and the total number of offenses which match the filter (None if unknown)
+def get_offenses_page(_range, _filter=''):
+    full_url = '{0}/api/siem/offenses'.format(SERVER)
+    params = {'filter': _filter} if _filter else {}
+    headers = dict(AUTH_HEADERS)
+    headers['Range'] = 'items={0}'.format(_range)
+    res = send_raw_request('GET', full_url, headers, params)
+    # Content-Range: items 0-49/1234
+    total = res.headers.get('Content-Range', '').rpartition('/')[2]
+    return res.json(), int(total) if total.isdigit() else None
+
+
 # Returns the result of a single offense request
 def get_offense_by_id(offense_id, _filter='', _fields=''):
     full_url = '{0}/api/siem/offenses/{1}'.format(SERVER, offense_id)
@@ -470,53 +525,55 @@ def fetch_incidents():
     query = demisto.params().get('query')
     last_run = demisto.getLastRun()
     offense_id = last_run['id'] if last_run and 'id' in last_run else 0
-    if last_run and offense_id == 0:
+    start_time = None
+    if last_run and (offense_id == 0 or 'startTime' in last_run):
         start_time = last_run['startTime'] if 'startTime' in last_run else '0'
-        fetch_query = 'start_time>{0}{1}'.format(start_time, ' AND ({0})'.format(query) if query else '')
+        fetch_filter = 'start_time>{0}'.format(start_time)
     else:
-        fetch_query = 'id>{0} {1}'.format(offense_id, 'AND ({0})'.format(query) if query else '')
-        # qradar returns offenses sorted desc on id and there's no way to change sorting.
-        # if we get `offensesPerCall` offenses it means we (probably) have more than that so we
-        # start looking for the end of the list by doubling the page position until we're empty.
-        # then start binary search back until you find the end of the list and finally return
-        # `offensesPerCall` from the end.
-    raw_offenses = get_offenses(_range='0-{0}'.format(OFFENSES_PER_CALL), _filter=fetch_query)
+        fetch_filter = ''
+    raw_offenses, total = get_offenses_page(_range='0-{0}'.format(OFFENSES_PER_CALL - 1),
+                                            _filter=build_fetch_query(offense_id, fetch_filter, query))
     if len(raw_offenses) >= OFFENSES_PER_CALL:
-        last_offense_pos = find_last_page_pos(fetch_query)
-        raw_offenses = get_offenses(_range='{0}-{1}'.format(last_offense_pos - OFFENSES_PER_CALL + 1, last_offense_pos),
-                                    _filter=fetch_query)
+        # qradar returns offenses sorted desc on id and there's no way to change sorting, so a full page holds the
+        # newest offenses. to fetch the oldest ones we ask for the next window of ids instead, it can't hold more
+        # offenses than ids so it is fetched whole with a single request.
+        if total:
+            # the window starts at the oldest matching offense, the last item of the filtered list, so a start time
+            # or a sparse query don't leave fetches walking through windows with no matching offenses
+            oldest_offenses = get_offenses(_range='{0}-{0}'.format(total - 1),
+                                           _filter=build_fetch_query(offense_id, fetch_filter, query))
+            if oldest_offenses:
+                offense_id = max(offense_id, oldest_offenses[0]['id'] - 1)
+        window_end = min(offense_id + CATCH_UP_WINDOW, max(offense['id'] for offense in raw_offenses))
+        raw_offenses = get_offenses(_range='0-{0}'.format(CATCH_UP_WINDOW - 1),
+                                    _filter=build_fetch_query(offense_id, fetch_filter, query, window_end))
+        # the window may have no offenses matching the query, the next fetch continues after it
+        offense_id = window_end
     raw_offenses = unicode_to_str_recur(raw_offenses)
     incidents = []
     enrich_offense_res_with_source_and_destination_address(raw_offenses)
-    for offense in raw_offenses:
+    for offense in sorted(raw_offenses, key=lambda o: o['id']):
         offense_id = max(offense_id, offense['id'])
         incidents.append(create_incident_from_offense(offense))
-    demisto.setLastRun({'id': offense_id})
+    new_last_run = {'id': offense_id}
+    if start_time is not None and not incidents:
+        # no offense after the start time was fetched yet, so the ids up to offense_id don't imply it and the next
+        # windows are still filtered by it
+        new_last_run['startTime'] = start_time
+    demisto.setLastRun(new_last_run)
     return incidents
 
 
-# Finds the last page position for QRadar query that receives a range parameter
-def find_last_page_pos(fetch_query):
-    # Make sure it wasn't a fluke we have exactly OFFENSES_PER_CALL results
-    if len(get_offenses(_range='{0}-{0}'.format(OFFENSES_PER_CALL), _filter=fetch_query)) == 0:
-        return OFFENSES_PER_CALL - 1
-    # Search up until we don't have any more results
-    pos = OFFENSES_PER_CALL * 2
-    while len(get_offenses(_range='{0}-{0}'.format(pos), _filter=fetch_query)) == 1:
-        pos = pos * 2
-    # Binary search the gap from the las step
-    high = pos
-    low = pos / 2
-    while high > low + 1:
-        pos = (high + low) / 2
-        if len(get_offenses(_range='{0}-{0}'.format(pos), _filter=fetch_query)) == 1:
-            # we still have results, raise the bar
-            low = pos
-        else:
-            # we're too high, lower the bar
-            high = pos
-    # low holds the last pos of the list
-    return low
+# Builds the fetch filter of the offenses after last_offense_id, up to window_end if given
+def build_fetch_query(last_offense_id, fetch_filter, query, window_end=None):
+    conditions = ['id>{0}'.format(last_offense_id)]
+    if window_end is not None:
+        conditions.append('id<={0}'.format(window_end))
+    if fetch_filter:
+        conditions.append(fetch_filter)
+    if query:
+        conditions.append('({0})'.format(query))
+    return ' AND '.join(conditions)
 
 
 # Creates incidents from offense
@@ -557,8 +614,8 @@ def get_offenses_command():
 def enrich_offense_result(response, full_enrichment=False):
     enrich_offense_res_with_source_and_destination_address(response)
     if isinstance(response, list):
-        type_dict = get_offense_types()
-        closing_reason_dict = get_closing_reasons(include_deleted=True, include_reserved=True)
+        type_dict = get_cached_offense_types()
+        closing_reason_dict = get_cached_closing_reasons()
         for offense in response:
             enrich_single_offense_result(offense, full_enrichment, type_dict, closing_reason_dict)
     else:
@@ -624,25 +681,62 @@ def populate_src_and_dst_dicts_with_single_offense(offense, src_ids, dst_ids):
 
 # Helper method: Enriches the source addresses ids dictionary with the source addresses values corresponding to the ids
 def enrich_source_addresses_dict(src_adrs):
-    src_ids_str = dict_values_to_comma_separated_string(src_adrs)
-    source_url = '{0}/api/siem/source_addresses?filter=id in ({1})'.format(SERVER, src_ids_str)
-    src_res = send_request('GET', source_url, AUTH_HEADERS)
-    for src_adr in src_res:
-        src_adrs[src_adr['id']] = convert_to_str(src_adr['source_ip'])
+    src_adrs.update(get_addresses_by_ids('source_addresses', 'source_ip', src_adrs.values()))
     return src_adrs
 
 
 # Helper method: Enriches the destination addresses ids dictionary with the source addresses values corresponding to
 # the ids
 def enrich_destination_addresses_dict(dst_adrs):
-    dst_ids_str = dict_values_to_comma_separated_string(dst_adrs)
-    destination_url = '{0}/api/siem/local_destination_addresses?filter=id in ({1})'.format(SERVER, dst_ids_str)
-    dst_res = send_request('GET', destination_url, AUTH_HEADERS)
-    for dst_adr in dst_res:
-        dst_adrs[dst_adr['id']] = convert_to_str(dst_adr['local_destination_ip'])
+    dst_adrs.update(get_addresses_by_ids('local_destination_addresses', 'local_destination_ip', dst_adrs.values()))
     return dst_adrs
 
 
+# Helper method: Returns the addresses of the given address ids by id, the addresses that aren't cached in the
+# integration context are requested
+def get_addresses_by_ids(endpoint, ip_key, address_ids):
+    address_ids = list(address_ids)
+    context = demisto.getIntegrationContext() or {}
+    cached_addresses = context.setdefault('addresses', {}).get(endpoint, {})
+    now = time.time()
+    addresses = {}
+    for address_id in address_ids:
+        if str(address_id) in cached_addresses:
+            addresses[address_id] = cached_addresses[str(address_id)]['ip']
+    missing_ids = [address_id for address_id in address_ids if address_id not in addresses]
+    addresses.update(request_addresses_by_ids(endpoint, ip_key, missing_ids))
+    # the addresses of an id never change, the least recently used ones are evicted to bound the context size
+    for address_id, ip in addresses.items():
+        cached_addresses[str(address_id)] = {'ip': ip, 'time': now}
+    if len(cached_addresses) > MAX_CACHED_ADDRESSES:
+        newest = sorted(cached_addresses, key=lambda k: cached_addresses[k]['time'], reverse=True)[:MAX_CACHED_ADDRESSES]
+        cached_addresses = {k: cached_addresses[k] for k in newest}
+    context['addresses'][endpoint] = cached_addresses
+    demisto.setIntegrationContext(context)
+    return addresses
+
+
+# Helper method: Requests the addresses of the given address ids. The ids are requested in batches of
+# ADDRESS_IDS_PER_REQUEST, the batches in parallel.
+def request_addresses_by_ids(endpoint, ip_key, address_ids):
+    batches = [address_ids[i:i + ADDRESS_IDS_PER_REQUEST] for i in range(0, len(address_ids), ADDRESS_IDS_PER_REQUEST)]
+
+    def get_addresses_batch(batch):
+        url = '{0}/api/siem/{1}?filter=id in ({2})'.format(SERVER, endpoint, ','.join(convert_to_str(i) for i in batch))
+        return send_request('GET', url, AUTH_HEADERS)
+
+    if len(batches) > 1:
+        pool = ThreadPool(processes=min(len(batches), MAX_CONCURRENT_REQUESTS))
+        try:
+            results = pool.map(get_addresses_batch, batches)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(get_addresses_batch, batches)
+    return {address['id']: convert_to_str(address[ip_key]) for result in results for address in result}
+
+
 # Helper method: For a single offense replaces the source and destination ids with the actual addresses
 def enrich_single_offense_res_with_source_and_destination_address(offense, src_adrs, dst_adrs):
     if isinstance(offense.get('source_address_ids'), list):
@@ -681,7 +775,11 @@ def get_offense_by_id_command():
 def update_offense_command():
     args = demisto.args()
     if 'closing_reason_name' in args:
-        args['closing_reason_id'] = convert_closing_reason_name_to_id(args.get('closing_reason_name'))
+        closing_reason_name = args.get('closing_reason_name')
+        args['closing_reason_id'] = convert_closing_reason_name_to_id(closing_reason_name)
+        if args['closing_reason_id'] == closing_reason_name:
+            args['closing_reason_id'] = convert_closing_reason_name_to_id(
+                closing_reason_name, get_cached_closing_reasons(refresh=True))
     elif 'CLOSED' == args.get('status') and not args.get('closing_reason_id'):
         raise ValueError(
             'Invalid input - must provide closing reason name or id (may use "qradar-get-closing-reasons" command to '
@@ -837,8 +935,14 @@ def create_empty_endpoint_dict(full_values):
     return endpoint_dict
 
 
-# Retrieves domain name using domain id
+# Retrieves domain name using domain id, from the cached domains if the domain is found there
 def get_domain_name(domain_id):
+    try:
+        for domain in get_cached_domains():
+            if domain.get('id') == domain_id and domain.get('name'):
+                return domain['name']
+    except Exception as e:
+        LOG('Failed to get the domains, falling back to a search. {0}'.format(convert_to_str(e)))
     try:
         query_param = {
             'query_expression': "SELECT DOMAINNAME({0}) AS 'Domain name' FROM events GROUP BY 'Domain name'".format(
@@ -206,6 +206,212 @@ def test_create_incident_from_offense_new_line_description():
     assert description_asserted
 
 
+def build_offense(offense_id):
+    return {'id': offense_id, 'description': 'offense {}'.format(offense_id), 'start_time': 1563433305606}
+
+
+def test_fetch_incidents_caught_up(mocker):
+    """
+    Given:
+        - Less than offensesPerCall offenses were created since the last fetch
+    When
+        - I fetch incidents
+    Then
+        - All the offenses are fetched with a single request, oldest first
+    """
+    import QRadar as qradar
+    mocker.patch.object(demisto, 'getLastRun', return_value={'id': 100})
+    mocker.patch.object(demisto, 'setLastRun')
+    mocker.patch.object(qradar, 'get_offenses_page', return_value=([build_offense(103), build_offense(101)], 2))
+    mocker.patch.object(qradar, 'get_offenses')
+    mocker.patch.object(qradar, 'enrich_offense_res_with_source_and_destination_address')
+    incidents = qradar.fetch_incidents()
+    assert qradar.get_offenses_page.call_args[1] == {'_range': '0-49', '_filter': 'id>100'}
+    assert not qradar.get_offenses.called
+    assert [incident['name'] for incident in incidents] == ['101 offense 101', '103 offense 103']
+    demisto.setLastRun.assert_called_with({'id': 103})
+
+
+def test_fetch_incidents_catch_up_window(mocker):
+    """
+    Given:
+        - More than offensesPerCall offenses were created since the last fetch
+    When
+        - I fetch incidents
+    Then
+        - The oldest matching offense, the last item of the filtered list, is requested
+        - The offenses of the next catchUpWindow ids, from the oldest matching offense, are fetched
+        - The next fetch continues after the window
+    """
+    import QRadar as qradar
+    newest_offenses = [build_offense(offense_id) for offense_id in range(2000, 1950, -1)]
+    window_offenses = [build_offense(250), build_offense(120)]
+    mocker.patch.object(demisto, 'params', return_value={
+        'server': 'www.qradar.com', 'token': 'token', 'proxy': True, 'query': 'status=OPEN'})
+    mocker.patch.object(demisto, 'getLastRun', return_value={'id': 100})
+    mocker.patch.object(demisto, 'setLastRun')
+    mocker.patch.object(qradar, 'get_offenses_page', return_value=(newest_offenses, 600))
+    mocker.patch.object(qradar, 'get_offenses', side_effect=[[build_offense(120)], window_offenses])
+    mocker.patch.object(qradar, 'enrich_offense_res_with_source_and_destination_address')
+    incidents = qradar.fetch_incidents()
+    assert qradar.get_offenses_page.call_args[1] == {'_range': '0-49', '_filter': 'id>100 AND (status=OPEN)'}
+    assert [call[1] for call in qradar.get_offenses.call_args_list] == [
+        {'_range': '599-599', '_filter': 'id>100 AND (status=OPEN)'},
+        {'_range': '0-199', '_filter': 'id>119 AND id<=319 AND (status=OPEN)'}
+    ]
+    assert [incident['name'] for incident in incidents] == ['120 offense 120', '250 offense 250']
+    demisto.setLastRun.assert_called_with({'id': 319})
+
+
+def test_fetch_incidents_start_time_jumps_to_the_oldest_offense(mocker):
+    """
+    Given:
+        - A last run with a start time and no offense id
+        - More than offensesPerCall offenses were created after the start time, all of them with high ids
+    When
+        - I fetch incidents
+    Then
+        - The window starts at the oldest offense after the start time instead of at id 0
+        - The start time is dropped once an offense after it was fetched
+    """
+    import QRadar as qradar
+    newest_offenses = [build_offense(offense_id) for offense_id in range(20000, 19950, -1)]
+    mocker.patch.object(demisto, 'getLastRun', return_value={'startTime': 1563433305000})
+    mocker.patch.object(demisto, 'setLastRun')
+    mocker.patch.object(qradar, 'get_offenses_page', return_value=(newest_offenses, 1000))
+    mocker.patch.object(qradar, 'get_offenses', side_effect=[[build_offense(19001)],
+                                                             [build_offense(19002), build_offense(19001)]])
+    mocker.patch.object(qradar, 'enrich_offense_res_with_source_and_destination_address')
+    incidents = qradar.fetch_incidents()
+    assert [call[1] for call in qradar.get_offenses.call_args_list] == [
+        {'_range': '999-999', '_filter': 'id>0 AND start_time>1563433305000'},
+        {'_range': '0-199', '_filter': 'id>19000 AND id<=19200 AND start_time>1563433305000'}
+    ]
+    assert [incident['name'] for incident in incidents] == ['19001 offense 19001', '19002 offense 19002']
+    demisto.setLastRun.assert_called_with({'id': 19200})
+
+
+def test_fetch_incidents_start_time_empty_window(mocker):
+    """
+    Given:
+        - A last run with a start time and no offense id
+        - The total number of offenses is unknown, so the window can't start at the oldest matching offense
+    When
+        - I fetch incidents and the window has no offenses after the start time
+    Then
+        - The start time is kept in the last run, and filters the next window
+    """
+    import QRadar as qradar
+    newest_offenses = [build_offense(offense_id) for offense_id in range(20000, 19950, -1)]
+    mocker.patch.object(demisto, 'getLastRun', return_value={'startTime': 1563433305000})
+    mocker.patch.object(demisto, 'setLastRun')
+    mocker.patch.object(qradar, 'get_offenses_page', return_value=(newest_offenses, None))
+    mocker.patch.object(qradar, 'get_offenses', return_value=[])
+    mocker.patch.object(qradar, 'enrich_offense_res_with_source_and_destination_address')
+    assert qradar.fetch_incidents() == []
+    assert [call[1] for call in qradar.get_offenses.call_args_list] == [
+        {'_range': '0-199', '_filter': 'id>0 AND id<=200 AND start_time>1563433305000'}
+    ]
+    demisto.setLastRun.assert_called_with({'id': 200, 'startTime': 1563433305000})
+
+    mocker.patch.object(demisto, 'getLastRun', return_value={'id': 200, 'startTime': 1563433305000})
+    qradar.fetch_incidents()
+    assert qradar.get_offenses_page.call_args[1] == {'_range': '0-49', '_filter': 'id>200 AND start_time>1563433305000'}
+
+
+def test_get_offenses_page(mocker):
+    import QRadar as qradar
+    response = mocker.Mock(headers={'Content-Range': 'items 0-1/1234'})
+    response.json.return_value = [build_offense(2), build_offense(1)]
+    mocker.patch.object(qradar, 'send_raw_request', return_value=response)
+    assert qradar.get_offenses_page('0-1', 'id>0') == ([build_offense(2), build_offense(1)], 1234)
+    assert qradar.send_raw_request.call_args[0][2]['Range'] == 'items=0-1'
+
+    response.headers = {}
+    assert qradar.get_offenses_page('0-1', 'id>0')[1] is None
+
+
+def test_get_addresses_by_ids(mocker):
+    """
+    Given:
+        - More address ids than fit in a single request
+    When
+        - I get the addresses of the ids
+    Then
+        - The ids are requested in batches and the addresses of all of them are returned
+    """
+    import QRadar as qradar
+    requested_ids = []
+
+    def send_request(method, url, headers):
+        ids = [int(address_id) for address_id in url.split('(')[1].rstrip(')').split(',')]
+        requested_ids.append(ids)
+        return [{'id': address_id, 'source_ip': '10.0.0.{}'.format(address_id)} for address_id in ids]
+
+    demisto.setIntegrationContext({})
+    mocker.patch.object(qradar, 'send_request', side_effect=send_request)
+    addresses = qradar.get_addresses_by_ids('source_addresses', 'source_ip', range(120))
+    assert sorted(len(ids) for ids in requested_ids) == [20, 50, 50]
+    assert addresses == {address_id: '10.0.0.{}'.format(address_id) for address_id in range(120)}
+
+    # When
+    #     - I get the addresses of ids that were partly requested before
+    # Then
+    #     - Only the ids that weren't requested before are requested
+    requested_ids[:] = []
+    addresses = qradar.get_addresses_by_ids('source_addresses', 'source_ip', range(100, 130))
+    assert requested_ids == [list(range(120, 130))]
+    assert addresses == {address_id: '10.0.0.{}'.format(address_id) for address_id in range(100, 130)}
+
+
+def test_get_cached_lookup_table(mocker):
+    """
+    Given:
+        - A lookup table was requested
+    When
+        - I get the lookup table again
+    Then
+        - It is requested again only after LOOKUP_TABLES_TTL seconds or when a refresh is asked for
+    """
+    import QRadar as qradar
+    demisto.setIntegrationContext({})
+    mocker.patch.object(qradar.time, 'time', return_value=1000)
+    get_table = mocker.Mock(return_value=[{'id': 0, 'name': 'Source IP'}])
+    assert qradar.get_cached_lookup_table('offense_types', get_table) == [{'id': 0, 'name': 'Source IP'}]
+    qradar.get_cached_lookup_table('offense_types', get_table)
+    assert get_table.call_count == 1
+    qradar.time.time.return_value = 1000 + qradar.LOOKUP_TABLES_TTL
+    qradar.get_cached_lookup_table('offense_types', get_table)
+    assert get_table.call_count == 2
+    qradar.get_cached_lookup_table('offense_types', get_table, refresh=True)
+    assert get_table.call_count == 3
+
+
+def test_update_offense_with_new_closing_reason(mocker):
+    """
+    Given:
+        - The closing reasons are cached, and a closing reason was added since
+    When
+        - I close an offense with the new closing reason name
+    Then
+        - The closing reasons are refreshed and the offense is closed with the id of the new closing reason
+    """
+    import QRadar as qradar
+    demisto.setIntegrationContext({})
+    mocker.patch.object(qradar, 'get_closing_reasons', side_effect=[
+        [{'id': 1, 'text': 'False-Positive'}],
+        [{'id': 1, 'text': 'False-Positive'}, {'id': 2, 'text': 'Duplicate'}]
+    ])
+    args = {'offense_id': '1', 'status': 'CLOSED', 'closing_reason_name': 'Duplicate'}
+    mocker.patch.object(demisto, 'args', return_value=args)
+    mocker.patch.object(qradar, 'update_offense', return_value={'id': 1, 'closing_reason_id': 2})
+    mocker.patch.object(qradar, 'enrich_offense_result')
+    qradar.convert_closing_reason_id_to_name(1)
+    qradar.update_offense_command()
+    assert args['closing_reason_id'] == 2
+    assert qradar.get_closing_reasons.call_count == 2
+
+
 """ CONSTANTS """
 REQUEST_HEADERS = {'Content-Type': 'application/json', 'SEC': 'token'}
 NON_URL_SAFE_MSG = 'non-safe/;/?:@=&"<>#%{}|\\^~[] `'
@@ -9,7 +9,6 @@ import ssl
 from StringIO import StringIO
 import requests
 import urllib3
-import io
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -21,31 +20,7 @@ SPLUNK_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
 VERIFY_CERTIFICATE = not bool(demisto.params().get('unsecure'))
 FETCH_LIMIT = int(demisto.params().get('fetch_limit', 50))
 FETCH_LIMIT = max(min(200, FETCH_LIMIT), 1)
-
-
-class ResponseReaderWrapper(io.RawIOBase):
-    """ This class was supplied as a solution for a bug in Splunk causing the search to run slowly.
-    """
-
-    def __init__(self, responseReader):
-        self.responseReader = responseReader
-
-    def readable(self):
-        return True
-
-    def close(self):
-        self.responseReader.close()
-
-    def read(self, n):
-        return self.responseReader.read(n)
-
-    def readinto(self, b):
-        sz = len(b)
-        data = self.responseReader.read(sz)
-        for idx, ch in enumerate(data):
-            b[idx] = ch
-
-        return len(data)
+SEARCH_RESULTS_FILE_NAME = 'splunk_search_results.json'
 
 
 def get_current_splunk_time(splunk_service):
@@ -311,7 +286,9 @@ def build_search_human_readable(args, parsed_search_results):
 def get_current_results_batch(search_job, batch_size, results_offset):
     current_batch_kwargs = {
         "count": batch_size,
-        "offset": results_offset
+        "offset": results_offset,
+        # the json output is parsed much faster than the default xml output
+        "output_mode": "json"
     }
 
     results_batch = search_job.results(**current_batch_kwargs)
@@ -321,51 +298,88 @@ def get_current_results_batch(search_job, batch_size, results_offset):
 def parse_batch_of_results(current_batch_of_results, max_results_to_add):
     parsed_batch_results = []
     batch_dbot_scores = []
-    results_reader = results.ResultsReader(io.BufferedReader(ResponseReaderWrapper(current_batch_of_results)))
-    for item in results_reader:
-        if isinstance(item, results.Message):
-            if "Error in" in item.message:
-                raise ValueError(item.message)
-            parsed_batch_results.append(convert_to_str(item.message))
-
-        elif isinstance(item, dict):
-            if demisto.get(item, 'host'):
-                batch_dbot_scores.append({'Indicator': item['host'], 'Type': 'hostname',
-                                          'Vendor': 'Splunk', 'Score': 0, 'isTypedIndicator': True})
-            # Normal events are returned as dicts
-            parsed_batch_results.append(item)
+    batch = json.load(current_batch_of_results)
+    for message in batch.get('messages', []):
+        if "Error in" in message.get('text', ''):
+            raise ValueError(message['text'])
+        parsed_batch_results.append(convert_to_str(message.get('text', '')))
 
+    for item in batch.get('results', []):
         if len(parsed_batch_results) >= max_results_to_add:
             break
+        if demisto.get(item, 'host'):
+            batch_dbot_scores.append({'Indicator': item['host'], 'Type': 'hostname',
+                                      'Vendor': 'Splunk', 'Score': 0, 'isTypedIndicator': True})
+        # Normal events are returned as dicts
+        parsed_batch_results.append(item)
     return parsed_batch_results, batch_dbot_scores
 
 
+def write_results_to_file(results_file, parsed_results):
+    for parsed_result in parsed_results:
+        results_file.write(json.dumps(parsed_result) + '\n')
+
+
 def splunk_search_command():
     args = demisto.args()
 
     query = build_search_query(args)
     search_kwargs = build_search_kwargs(args)
     search_job = service.jobs.create(query, **search_kwargs)  # type: ignore
-    num_of_results_from_query = search_job["resultCount"]
+    num_of_results_from_query = int(search_job["resultCount"])
 
     results_limit = float(demisto.args().get("event_limit", 100))
     if results_limit == 0.0:
         # In Splunk, a result limit of 0 means no limit.
         results_limit = float("inf")
     batch_size = int(demisto.args().get("batch_limit", 25000))
+    # larger result sets are streamed to a file, one json result per line, instead of the war room and context
+    max_results_in_war_room = int(demisto.args().get("max_war_room_results", 1000))
 
     results_offset = 0
+    num_of_parsed_results = 0
     total_parsed_results = []  # type: List[Dict[str,Any]]
     dbot_scores = []  # type: List[Dict[str,Any]]
+    results_file = None
+    file_id = None
 
-    while len(total_parsed_results) < int(num_of_results_from_query) and len(total_parsed_results) < results_limit:
-        current_batch_of_results = get_current_results_batch(search_job, batch_size, results_offset)
-        max_results_to_add = results_limit - len(total_parsed_results)
-        parsed_batch_results, batch_dbot_scores = parse_batch_of_results(current_batch_of_results, max_results_to_add)
-        total_parsed_results.extend(parsed_batch_results)
-        dbot_scores.extend(batch_dbot_scores)
-
-        results_offset += batch_size
+    try:
+        while num_of_parsed_results < num_of_results_from_query and num_of_parsed_results < results_limit:
+            current_batch_of_results = get_current_results_batch(search_job, batch_size, results_offset)
+            max_results_to_add = results_limit - num_of_parsed_results
+            parsed_batch_results, batch_dbot_scores = parse_batch_of_results(current_batch_of_results,
+                                                                             max_results_to_add)
+            if not parsed_batch_results:
+                break
+            num_of_parsed_results += len(parsed_batch_results)
+            if results_file is None and num_of_parsed_results > max_results_in_war_room:
+                file_id = demisto.uniqueFile()
+                results_file = open(demisto.investigation()['id'] + '_' + file_id, 'w')
+                write_results_to_file(results_file, total_parsed_results)
+                total_parsed_results, dbot_scores = [], []
+            if results_file is not None:
+                write_results_to_file(results_file, parsed_batch_results)
+            else:
+                total_parsed_results.extend(parsed_batch_results)
+                dbot_scores.extend(batch_dbot_scores)
+
+            results_offset += batch_size
+    finally:
+        if results_file is not None:
+            results_file.close()
+
+    if file_id is not None:
+        demisto.results({
+            "Type": entryTypes['file'],
+            "Contents": "",
+            "ContentsFormat": formats['text'],
+            "File": SEARCH_RESULTS_FILE_NAME,
+            "FileID": file_id,
+            "HumanReadable": "### Splunk Search results \n\n Results for query: {}\n{} results were written to {}, "
+                             "one result per line.".format(args['query'], num_of_parsed_results,
+                                                           SEARCH_RESULTS_FILE_NAME)
+        })
+        return
 
     entry_context = create_entry_context(args, total_parsed_results, dbot_scores)
     human_readable = build_search_human_readable(args, total_parsed_results)
@@ -420,8 +434,9 @@ def splunk_results_command():
 
 
 def fetch_incidents():
-    lastRun = demisto.getLastRun() and demisto.getLastRun()['time']
-    search_offset = demisto.getLastRun().get('offset', 0)
+    last_run = demisto.getLastRun() or {}
+    lastRun = last_run.get('time', '')
+    search_offset = last_run.get('offset', 0)
 
     incidents = []
     t = datetime.utcnow()
@@ -430,39 +445,63 @@ def fetch_incidents():
         t = t + timedelta(minutes=int(timezone))
 
     now = t.strftime(SPLUNK_TIME_FORMAT)
-    if demisto.get(demisto.params(), 'useSplunkTime'):
+    if demisto.get(demisto.params(), 'useSplunkTime') and not last_run.get('window_end'):
         now = get_current_splunk_time(service)
         t = datetime.strptime(now, SPLUNK_TIME_FORMAT)
     if len(lastRun) == 0:
         t = t - timedelta(minutes=10)
         lastRun = t.strftime(SPLUNK_TIME_FORMAT)
+    # a window whose results didn't fit in a single fetch is paged through in the next fetches, with the search
+    # job that was created for it
+    window_end = last_run.get('window_end') or now
 
     earliest_fetch_time_fieldname = demisto.params().get("earliest_fetch_time_fieldname", "index_earliest")
     latest_fetch_time_fieldname = demisto.params().get("latest_fetch_time_fieldname", "index_latest")
 
-    kwargs_oneshot = {earliest_fetch_time_fieldname: lastRun,
-                      latest_fetch_time_fieldname: now, "count": FETCH_LIMIT, 'offset': search_offset}
+    search_kwargs = {earliest_fetch_time_fieldname: lastRun,
+                     latest_fetch_time_fieldname: window_end, "exec_mode": "blocking"}
 
-    searchquery_oneshot = demisto.params()['fetchQuery']
+    fetch_query = demisto.params()['fetchQuery']
 
     if demisto.get(demisto.params(), 'extractFields'):
         extractFields = demisto.params()['extractFields']
         extra_raw_arr = extractFields.split(',')
         for field in extra_raw_arr:
             field_trimmed = field.strip()
-            searchquery_oneshot = searchquery_oneshot + ' | eval ' + field_trimmed + '=' + field_trimmed
+            fetch_query = fetch_query + ' | eval ' + field_trimmed + '=' + field_trimmed
 
-    oneshotsearch_results = service.jobs.oneshot(searchquery_oneshot, **kwargs_oneshot)  # type: ignore
-    reader = results.ResultsReader(oneshotsearch_results)
-    for item in reader:
+    search_job = get_fetch_search_job(last_run.get('sid'), fetch_query, search_kwargs)
+    fetch_results = json.load(search_job.results(count=FETCH_LIMIT, offset=search_offset, output_mode='json'))
+    for item in fetch_results.get('results', []):
         inc = notable_to_incident(item)
         incidents.append(inc)
 
     demisto.incidents(incidents)
-    if len(incidents) < FETCH_LIMIT:
-        demisto.setLastRun({'time': now, 'offset': 0})
+    if len(incidents) < FETCH_LIMIT or search_offset + FETCH_LIMIT >= int(search_job['resultCount']):
+        demisto.setLastRun({'time': window_end, 'offset': 0})
+        cancel_search_job(search_job)
     else:
-        demisto.setLastRun({'time': lastRun, 'offset': search_offset + FETCH_LIMIT})
+        # keeps the job from expiring before the next fetch
+        search_job.touch()
+        demisto.setLastRun({'time': lastRun, 'window_end': window_end, 'sid': search_job.sid,
+                            'offset': search_offset + FETCH_LIMIT})
+
+
+def get_fetch_search_job(sid, fetch_query, search_kwargs):
+    """Returns the search job of the fetch window, it's created again if it expired."""
+    if sid:
+        try:
+            return service.jobs[sid]  # type: ignore
+        except KeyError:
+            demisto.debug('The fetch search job {} expired, running the search again'.format(sid))
+    return service.jobs.create(fetch_query, **search_kwargs)  # type: ignore
+
+
+def cancel_search_job(search_job):
+    try:
+        search_job.cancel()
+    except Exception as e:
+        demisto.debug('Failed to cancel the fetch search job {}: {}'.format(search_job.sid, e))
 
 
 def splunk_get_indexes_command():
@@ -0,0 +1,179 @@
+import json
+from StringIO import StringIO
+
+import pytest
+import demistomock as demisto
+
+PARAMS = {
+    'host': 'splunk.example.com',
+    'port': '8089',
+    'proxy': False,
+    'authentication': {'identifier': 'admin', 'password': 'password'},
+    'fetchQuery': 'search index=notable'
+}
+
+
+@pytest.fixture(autouse=True)
+def init_tests(mocker):
+    import splunklib.client as client
+    mocker.patch.object(demisto, 'params', return_value=PARAMS)
+    mocker.patch.object(client, 'connect', return_value=mocker.MagicMock())
+
+
+def build_job(mocker, sid, results):
+    """Returns a search job mock whose results are paged like the results of a Splunk search job"""
+    job = mocker.MagicMock()
+    job.sid = sid
+    job.__getitem__.side_effect = {'resultCount': str(len(results))}.__getitem__
+    job.results.side_effect = lambda count, offset, output_mode: StringIO(
+        json.dumps({'results': results[offset:offset + count]}))
+    return job
+
+
+def build_notables(count):
+    return [{'rule_title': 'rule', 'rule_name': 'notable {}'.format(i), '_time': '2019-10-13T10:00:00'}
+            for i in range(count)]
+
+
+def test_fetch_incidents_pages_a_window_over_two_fetches(mocker):
+    """
+    Given:
+        - A fetch window with more notable events than the fetch limit
+    When
+        - I fetch incidents twice
+    Then
+        - The first fetch keeps the search job of the window, and touches it so it doesn't expire
+        - The second fetch reads the next page from the same job, advances the time and cancels the job
+    """
+    import SplunkPy as splunk
+    job = build_job(mocker, 'sid1', build_notables(3))
+    mocker.patch.object(splunk, 'service')
+    splunk.service.jobs.create.return_value = job
+    splunk.service.jobs.__getitem__.side_effect = {'sid1': job}.__getitem__
+    mocker.patch.object(splunk, 'FETCH_LIMIT', 2)
+    mocker.patch.object(demisto, 'incidents')
+    mocker.patch.object(demisto, 'setLastRun')
+
+    mocker.patch.object(demisto, 'getLastRun', return_value={'time': '2019-10-13T10:00:00'})
+    splunk.fetch_incidents()
+    assert [incident['name'] for incident in demisto.incidents.call_args[0][0]] == [
+        'rule : notable 0', 'rule : notable 1']
+    last_run = demisto.setLastRun.call_args[0][0]
+    assert last_run['time'] == '2019-10-13T10:00:00'
+    assert last_run['sid'] == 'sid1'
+    assert last_run['offset'] == 2
+    assert job.touch.called
+    assert not job.cancel.called
+
+    mocker.patch.object(demisto, 'getLastRun', return_value=last_run)
+    splunk.fetch_incidents()
+    assert splunk.service.jobs.create.call_count == 1
+    assert [incident['name'] for incident in demisto.incidents.call_args[0][0]] == ['rule : notable 2']
+    demisto.setLastRun.assert_called_with({'time': last_run['window_end'], 'offset': 0})
+    assert job.cancel.called
+
+
+def test_fetch_incidents_recreates_an_expired_search_job(mocker):
+    """
+    Given:
+        - A last run in the middle of a fetch window, whose search job expired
+    When
+        - I fetch incidents
+    Then
+        - The search of the window is created again, and the page is read from the new job
+    """
+    import SplunkPy as splunk
+    job = build_job(mocker, 'sid2', build_notables(3))
+    mocker.patch.object(splunk, 'service')
+    splunk.service.jobs.create.return_value = job
+    splunk.service.jobs.__getitem__.side_effect = KeyError('sid1')
+    mocker.patch.object(splunk, 'FETCH_LIMIT', 2)
+    mocker.patch.object(demisto, 'incidents')
+    mocker.patch.object(demisto, 'setLastRun')
+    mocker.patch.object(demisto, 'getLastRun', return_value={
+        'time': '2019-10-13T10:00:00', 'window_end': '2019-10-13T10:10:00', 'sid': 'sid1', 'offset': 2})
+
+    splunk.fetch_incidents()
+    search_kwargs = splunk.service.jobs.create.call_args[1]
+    assert search_kwargs['index_earliest'] == '2019-10-13T10:00:00'
+    assert search_kwargs['index_latest'] == '2019-10-13T10:10:00'
+    assert [incident['name'] for incident in demisto.incidents.call_args[0][0]] == ['rule : notable 2']
+    demisto.setLastRun.assert_called_with({'time': '2019-10-13T10:10:00', 'offset': 0})
+    assert job.cancel.called
+
+
+def test_fetch_incidents_last_page_of_the_window(mocker):
+    """
+    Given:
+        - A fetch window with less notable events than the fetch limit
+    When
+        - I fetch incidents
+    Then
+        - The time advances to the end of the window and the search job is cancelled, without touching it
+    """
+    import SplunkPy as splunk
+    job = build_job(mocker, 'sid1', build_notables(1))
+    mocker.patch.object(splunk, 'service')
+    splunk.service.jobs.create.return_value = job
+    mocker.patch.object(splunk, 'FETCH_LIMIT', 2)
+    mocker.patch.object(demisto, 'incidents')
+    mocker.patch.object(demisto, 'setLastRun')
+    mocker.patch.object(demisto, 'getLastRun', return_value={'time': '2019-10-13T10:00:00'})
+
+    splunk.fetch_incidents()
+    window_end = splunk.service.jobs.create.call_args[1]['index_latest']
+    demisto.setLastRun.assert_called_with({'time': window_end, 'offset': 0})
+    assert job.cancel.called
+    assert not job.touch.called
+
+
+def test_cancel_search_job_failure(mocker):
+    import SplunkPy as splunk
+    job = mocker.MagicMock()
+    job.cancel.side_effect = Exception('job not found')
+    mocker.patch.object(demisto, 'debug')
+    splunk.cancel_search_job(job)
+    assert 'job not found' in demisto.debug.call_args[0][0]
+
+
+def test_splunk_search_results_in_war_room(mocker):
+    import SplunkPy as splunk
+    events = [{'host': 'host{}'.format(i)} for i in range(3)]
+    mocker.patch.object(splunk, 'service')
+    splunk.service.jobs.create.return_value = build_job(mocker, 'sid1', events)
+    mocker.patch.object(demisto, 'args', return_value={'query': 'index=main', 'batch_limit': '2'})
+    mocker.patch.object(demisto, 'results')
+
+    splunk.splunk_search_command()
+    entry = demisto.results.call_args[0][0]
+    assert entry['Contents'] == events
+    assert entry['EntryContext']['Splunk.Result'] == events
+    assert len(entry['EntryContext']['DBotScore']) == 3
+
+
+def test_splunk_search_results_spill_to_a_file(mocker, tmpdir):
+    """
+    Given:
+        - A search with more results than max_war_room_results
+    When
+        - I run splunk-search
+    Then
+        - All the results are written to a file entry, one json result per line, instead of the war room
+    """
+    import SplunkPy as splunk
+    events = [{'host': 'host{}'.format(i)} for i in range(5)]
+    mocker.patch.object(splunk, 'service')
+    splunk.service.jobs.create.return_value = build_job(mocker, 'sid1', events)
+    mocker.patch.object(demisto, 'args', return_value={
+        'query': 'index=main', 'batch_limit': '2', 'max_war_room_results': '3'})
+    mocker.patch.object(demisto, 'uniqueFile', return_value='file_id')
+    mocker.patch.object(demisto, 'results')
+
+    with tmpdir.as_cwd():
+        splunk.splunk_search_command()
+    entry = demisto.results.call_args[0][0]
+    assert entry['FileID'] == 'file_id'
+    assert entry['File'] == splunk.SEARCH_RESULTS_FILE_NAME
+    assert '5 results were written' in entry['HumanReadable']
+    results_file = tmpdir.join(demisto.investigation()['id'] + '_file_id')
+    assert [json.loads(line) for line in results_file.readlines()] == events
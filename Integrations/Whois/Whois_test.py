@@ -1,6 +1,10 @@
 import Whois
 import demistomock as demisto
 import pytest
+import datetime
+import json
+import re
+import socket
 import subprocess
 import time
 import tempfile
@@ -53,3 +57,147 @@ def test_socks_proxy(mocker, request):
     assert_results_ok()
     tmp.seek(0)
     assert 'connected to' in tmp.read()  # make sure we went through microsocks
+
+
+def test_parse_raw_whois():
+    def serialize(data):
+        return json.loads(json.dumps(data, default=lambda o: o.isoformat() if isinstance(o, datetime.datetime) else o))
+
+    with open('./test_data/raw_whois_records.json') as f:
+        raw_records = json.load(f)
+    with open('./test_data/parsed_whois_records.json') as f:
+        parsed_records = json.load(f)
+    for domain, raw_data in raw_records.items():
+        assert serialize(Whois.parse_raw_whois(raw_data)) == parsed_records[domain]['parsed']
+        assert serialize(Whois.parse_raw_whois(raw_data, normalized=True)) == parsed_records[domain]['normalized']
+
+
+def test_compile_filter():
+    patterns = ['Registrar:\\s*(?P<val>.+)', '(C|c)hanged:\\s*(?P<val>.+)']
+    line_filter = Whois.compile_filter(patterns, re.IGNORECASE)
+    assert line_filter.groups == 0
+    for line in ('registrar: GANDI', 'Changed: 2018-03-12', 'Status: connect', 'registrar:'):
+        assert (line_filter.search(line) is None) == \
+            all(re.search(pattern, line, re.IGNORECASE) is None for pattern in patterns)
+
+
+def test_get_required_literal():
+    assert Whois.get_required_literal('Tech(?:nical)? ID:(?P<handle>.+)\\nTech Name:') == 'Tech'
+    assert Whois.get_required_literal('(?:Tech|Technical) ID:(?P<handle>.+)\\nTech Name:') == '\nTech Name:'
+    assert Whois.get_required_literal('owner:\\s+(?P<name>.+)') == 'owner:'
+    assert Whois.get_required_literal('owner:\\s+(?P<name>.+)', re.IGNORECASE) == ''
+    assert Whois.get_required_literal('(?i)owner:\\s+(?P<name>.+)') == ''
+    assert Whois.get_required_literal('Registrant\\.Name:\\s*(?P<name>.+)') == 'Registrant.Name:'
+    assert Whois.get_required_literal('Registrants?:\\n(?P<name>.+)') == 'Registrant'
+    assert Whois.get_required_literal('(?P<handle>.+) Tech:|Technical:') == ''
+
+
+def test_get_regex():
+    assert Whois.get_regex('owner:\\s+(?P<name>.+)') is Whois.get_regex('owner:\\s+(?P<name>.+)')
+    assert Whois.get_regex('owner:\\s+(?P<name>.+)').flags != \
+        Whois.get_regex('owner:\\s+(?P<name>.+)', re.IGNORECASE).flags
+
+
+def test_get_whois_caches_raw_records(mocker):
+    mocker.patch.object(demisto, 'params', return_value={'cache_ttl': '60'})
+    demisto.setIntegrationContext({})
+    get_whois_raw = mocker.patch.object(Whois, 'get_whois_raw', return_value=(['raw record'], ['whois.nic.io']))
+    mocker.patch.object(Whois, 'parse_raw_whois', return_value={'raw': ['raw record']})
+    mocker.patch.object(Whois.time, 'time', return_value=1000)
+
+    Whois.get_whois('example.io')
+    Whois.get_whois('Example.IO.')
+    assert get_whois_raw.call_count == 1
+    Whois.parse_raw_whois.assert_called_with(['raw record'], normalized=[], never_query_handles=False,
+                                             handle_server='whois.nic.io')
+
+    Whois.get_whois('example.io', use_cache=False)
+    assert get_whois_raw.call_count == 2
+
+    Whois.time.time.return_value = 1000 + 60 * 60
+    Whois.get_whois('example.io')
+    assert get_whois_raw.call_count == 3
+
+
+def test_get_whois_without_cache_ttl(mocker):
+    mocker.patch.object(demisto, 'params', return_value={'cache_ttl': '0'})
+    demisto.setIntegrationContext({})
+    get_whois_raw = mocker.patch.object(Whois, 'get_whois_raw', return_value=(['raw record'], ['whois.nic.io']))
+    mocker.patch.object(Whois, 'parse_raw_whois', return_value={})
+
+    Whois.get_whois('example.io')
+    Whois.get_whois('example.io')
+    assert get_whois_raw.call_count == 2
+    assert demisto.getIntegrationContext() == {}
+
+
+def test_set_cache_entry_evicts_expired_and_oldest_entries(mocker):
+    mocker.patch.object(demisto, 'params', return_value={'cache_ttl': '1'})
+    demisto.setIntegrationContext({'other': 'value'})
+    mocker.patch.object(Whois.time, 'time')
+    for now, key in ((0, 'expired'), (30, 'oldest'), (40, 'old'), (50, 'new')):
+        Whois.time.time.return_value = now
+        Whois.set_cache_entry('records', key, key, max_entries=2)
+    Whois.time.time.return_value = 60
+    Whois.set_cache_entry('records', 'newest', 'newest', max_entries=2)
+
+    context = demisto.getIntegrationContext()
+    assert context['other'] == 'value'
+    assert sorted(context[Whois.CACHE_KEY]['records']) == ['new', 'newest']
+    assert Whois.get_cache_entry('records', 'newest') == 'newest'
+    assert Whois.get_cache_entry('records', 'oldest') is None
+
+
+def test_get_root_server_cached(mocker):
+    mocker.patch.object(demisto, 'params', return_value={'cache_ttl': '60'})
+    demisto.setIntegrationContext({})
+    assert Whois.get_root_server('example.io', use_cache=True) == 'whois.nic.io'
+    assert demisto.getIntegrationContext()[Whois.CACHE_KEY]['root_servers']['io']['value'] == 'whois.nic.io'
+    mocker.patch.object(Whois, 'get_tlds')
+    assert Whois.get_root_server('example.io', use_cache=True) == 'whois.nic.io'
+    assert not Whois.get_tlds.called
+
+
+def test_whois_command_multiple_domains(mocker):
+    def get_whois_raw(domain, **kwargs):
+        if domain == 'unreachable.io':
+            raise Whois.WhoisException("Whois returned - Couldn't connect with the socket-server: timed out")
+        return ['Domain Name: {}'.format(domain)], ['whois.nic.io']
+
+    mocker.patch.object(demisto, 'args', return_value={'query': 'first.io,unreachable.io,second.io'})
+    mocker.patch.object(demisto, 'params', return_value={})
+    mocker.patch.object(demisto, 'results')
+    mocker.patch.object(Whois, 'get_whois_raw', side_effect=get_whois_raw)
+    mocker.patch.object(Whois, 'parse_raw_whois', side_effect=lambda raw_data, **kwargs: {'raw': raw_data})
+    Whois.whois_command()
+
+    entries = [call[0][0] for call in demisto.results.call_args_list]
+    assert [list(entry['EntryContext'].values())[0]['Name'] for entry in entries] == \
+        ['first.io', 'unreachable.io', 'second.io']
+    assert [list(entry['EntryContext'].values())[0]['Whois']['QueryStatus'] for entry in entries] == \
+        ['Success', 'Failed', 'Success']
+    assert "Couldn't connect with the socket-server" in entries[1]['Contents']
+    assert entries[1]['Type'] == Whois.ENTRY_TYPE
+
+
+def test_wait_for_server(mocker):
+    mocker.patch.object(Whois.time, 'time', return_value=1000)
+    mocker.patch.object(Whois.time, 'sleep')
+    Whois.wait_for_server('whois.throttled.test')
+    Whois.wait_for_server('whois.other.test')
+    assert not Whois.time.sleep.called
+    Whois.wait_for_server('whois.throttled.test')
+    Whois.wait_for_server('whois.throttled.test')
+    assert [call[0][0] for call in Whois.time.sleep.call_args_list] == \
+        [Whois.SERVER_QUERY_INTERVAL, 2 * Whois.SERVER_QUERY_INTERVAL]
+
+
+def test_whois_request_timeout(mocker, request):
+    mocker.patch.object(Whois, 'SOCKET_TIMEOUT', 0.2)
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    request.addfinalizer(server.close)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    with pytest.raises(Whois.WhoisException) as err:
+        Whois.whois_request('example.io', '127.0.0.1', port=server.getsockname()[1])
+    assert 'timed out' in str(err.value)
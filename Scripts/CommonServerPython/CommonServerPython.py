@@ -12,6 +12,9 @@ import os
 import re
 import base64
 import logging
+import random
+import threading
+from email.utils import parsedate_tz, mktime_tz
 from collections import OrderedDict
 import xml.etree.cElementTree as ET
 from datetime import datetime, timedelta
@@ -900,7 +903,7 @@ def appendContext(key, data, dedup=False):
         demisto.setContext(key, data)
 
 
-def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None):
+def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None, max_rows=None):
     """
        Converts a demisto table in JSON form to a Markdown table
 
@@ -923,20 +926,69 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
        :type metadata: ``str``
        :param metadata: Metadata about the table contents
 
+       :type max_rows: ``int``
+       :param max_rows: The maximal number of rows to present. The rest of the rows are replaced by a footer
+            with the number of truncated rows. Default will present all rows.
+
        :return: A string representation of the markdown table
        :rtype: ``str``
     """
+    chunks = list(table_to_markdown_chunks(name, t, headers=headers, headerTransform=headerTransform,
+                                           removeNull=removeNull, metadata=metadata, max_rows=max_rows))
+    try:
+        return ''.join(chunks)
+    except UnicodeDecodeError:
+        # on python 2 a non ascii title is a byte string while the rows may be unicode
+        return ''.join([str(chunk) for chunk in chunks])
 
-    mdResult = ''
+
+def table_to_markdown_chunks(name, t, headers=None, headerTransform=None, removeNull=False, metadata=None,
+                             max_rows=None, chunk_size=1000):
+    """
+       Converts a demisto table in JSON form to a Markdown table, yielding the table in chunks of rows.
+       Use it instead of tableToMarkdown for very large tables, to avoid building the whole table in memory.
+       Joining the chunks gives the same string as tableToMarkdown.
+
+       :type name: ``str``
+       :param name: The name of the table (required)
+
+       :type t: ``dict`` or ``list``
+       :param t: The JSON table - List of dictionaries with the same keys or a single dictionary (required)
+
+       :type headers: ``list`` or ``string``
+       :keyword headers: A list of headers to be presented in the output table (by order). If string will be passed
+            then table will have single header. Default will include all available headers.
+
+       :type headerTransform: ``function``
+       :keyword headerTransform: A function that formats the original data headers (optional)
+
+       :type removeNull: ``bool``
+       :keyword removeNull: Remove empty columns from the table. Default is False
+
+       :type metadata: ``str``
+       :param metadata: Metadata about the table contents
+
+       :type max_rows: ``int``
+       :param max_rows: The maximal number of rows to present. The rest of the rows are replaced by a footer
+            with the number of truncated rows. Default will present all rows.
+
+       :type chunk_size: ``int``
+       :param chunk_size: The number of table rows in each chunk. Default is 1000
+
+       :return: A generator of markdown strings
+       :rtype: ``generator``
+    """
+    title = []
     if name:
-        mdResult = '### ' + name + '\n'
+        title.append('### ' + name + '\n')
 
     if metadata:
-        mdResult += metadata + '\n'
+        title.append(metadata + '\n')
 
     if not t or len(t) == 0:
-        mdResult += '**No entries.**\n'
-        return mdResult
+        title.append('**No entries.**\n')
+        yield ''.join(title)
+        return
 
     if not isinstance(t, list):
         t = [t]
@@ -949,7 +1001,7 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
         # should be only one header
         if headers and len(headers) > 0:
             header = headers[0]
-            t = map(lambda item: dict((h, item) for h in [header]), t)
+            t = [{header: item} for item in t]
         else:
             raise Exception("Missing headers param for tableToMarkdown. Example: headers=['Some Header']")
 
@@ -959,46 +1011,132 @@ def tableToMarkdown(name, t, headers=None, headerTransform=None, removeNull=Fals
         headers.sort()
 
     if removeNull:
-        headers_aux = headers[:]
-        for header in headers_aux:
-            if all(obj.get(header) in ('', None, [], {}) for obj in t):
-                headers.remove(header)
-
-    if t and len(headers) > 0:
-        newHeaders = []
-        if headerTransform is None:  # noqa
-            headerTransform = lambda s: s  # noqa
-        for header in headers:
-            newHeaders.append(headerTransform(header))
-        mdResult += '|'
-        if len(newHeaders) == 1:
-            mdResult += newHeaders[0]
-        else:
-            mdResult += '|'.join(newHeaders)
-        mdResult += '|\n'
-        sep = '---'
-        mdResult += '|' + '|'.join([sep] * len(headers)) + '|\n'
+        # find the empty columns in a single pass over the rows
+        null_headers = set(headers)
         for entry in t:
-            vals = [stringEscapeMD((formatCell(entry.get(h, ''), False) if entry.get(h) is not None else ''),
-                                   True, True) for h in headers]
-            # this pipe is optional
-            mdResult += '| '
-            try:
-                mdResult += ' | '.join(vals)
-            except UnicodeDecodeError:
-                vals = [str(v) for v in vals]
-                mdResult += ' | '.join(vals)
-            mdResult += ' |\n'
+            if not null_headers:
+                break
+            null_headers = set(h for h in null_headers if entry.get(h) in ('', None, [], {}))
+        headers = [h for h in headers if h not in null_headers]
+
+    if len(headers) == 0:
+        title.append('**No entries.**\n')
+        yield ''.join(title)
+        return
 
+    if headerTransform is not None:
+        header_names = [headerTransform(header) for header in headers]
     else:
-        mdResult += '**No entries.**\n'
+        header_names = headers
+    title.append('|' + '|'.join(header_names) + '|\n')
+    title.append('|' + '|'.join(['---'] * len(headers)) + '|\n')
+    yield ''.join(title)
 
-    return mdResult
+    truncated = 0
+    if max_rows is not None and len(t) > max_rows:
+        truncated = len(t) - max_rows
+        t = t[:max_rows]
+
+    for i in range(0, len(t), chunk_size):
+        yield ''.join([_table_row_to_markdown(entry, headers) for entry in t[i:i + chunk_size]])
+
+    if truncated:
+        yield '\n**{} more rows truncated.**\n'.format(truncated)
+
+
+def _table_row_to_markdown(entry, headers):
+    """
+       Converts a single table row to a markdown table line
+
+       :type entry: ``dict``
+       :param entry: The table row (required)
+
+       :type headers: ``list``
+       :param headers: The headers of the table (required)
+
+       :return: The markdown table line
+       :rtype: ``str``
+    """
+    vals = []
+    for h in headers:
+        value = entry.get(h)
+        if value is None:
+            vals.append('')
+            continue
+        if not isinstance(value, STRING_TYPES):
+            value = formatCell(value, False)
+        # same as stringEscapeMD(value, True, True), which is called only when there is something to escape
+        if '|' in value or '\n' in value or '\r' in value:
+            value = stringEscapeMD(value, True, True)
+        vals.append(value)
+    # the first pipe is optional
+    try:
+        return '| ' + ' | '.join(vals) + ' |\n'
+    except UnicodeDecodeError:
+        return '| ' + ' | '.join([str(v) for v in vals]) + ' |\n'
 
 
 tblToMd = tableToMarkdown
 
 
+class ContextKeyPlan(object):
+    """
+        A compiled plan for converting dicts with flattened key values into nested dicts.
+        The nested path and the transformed name of every key are computed once, when the key is first seen,
+        and are reused for all the following dicts. Use it when converting many records with the same keys.
+
+        :type keyTransform: ``function``
+        :param keyTransform: A formatting function for the keys
+
+        :type removeNull: ``bool``
+        :param removeNull: True if empty values should be removed, false otherwise
+
+        :return: No data returned
+        :rtype: ``None``
+    """
+
+    def __init__(self, keyTransform=None, removeNull=False):
+        self.keyTransform = keyTransform
+        self.removeNull = removeNull
+        self._paths = {}  # type: dict
+
+    def _compile(self, key):
+        values = key.split('.')
+        leaf = self.keyTransform(values[-1]) if self.keyTransform is not None else values[-1]
+        path = (tuple(values[:-1]), leaf)
+        self._paths[key] = path
+        return path
+
+    def apply(self, obj, id=None):
+        """
+            Converts a single dict with flattened key values into nested dicts
+
+            :type obj: ``dict``
+            :param obj: The data to be converted (required)
+
+            :type id: ``str``
+            :param id: The ID of the context entry
+
+            :return: The converted context dict
+            :rtype: ``dict``
+        """
+        res = {}  # type: dict
+        paths = self._paths
+        for key, value in obj.items():
+            if self.removeNull and value in ('', None, [], {}):
+                continue
+            parents, leaf = paths.get(key) or self._compile(key)
+            current = res
+            for parent in parents:
+                current = current.setdefault(parent, {})
+            current[leaf] = value
+
+        if id is not None:
+            res.setdefault('ID', id)
+
+        return res
+
+
 def createContextSingle(obj, id=None, keyTransform=None, removeNull=False):
     """Receives a dict with flattened key values, and converts them into nested dicts
 
@@ -1017,24 +1155,7 @@ def createContextSingle(obj, id=None, keyTransform=None, removeNull=False):
     :return: The converted context list
     :rtype: ``list``
     """
-    res = {}  # type: dict
-    if keyTransform is None:
-        keyTransform = lambda s: s  # noqa
-    keys = obj.keys()
-    for key in keys:
-        if removeNull and obj[key] in ('', None, [], {}):
-            continue
-        values = key.split('.')
-        current = res
-        for v in values[:-1]:
-            current.setdefault(v, {})
-            current = current[v]
-        current[keyTransform(values[-1])] = obj[key]
-
-    if id is not None:
-        res.setdefault('ID', id)
-
-    return res
+    return ContextKeyPlan(keyTransform, removeNull).apply(obj, id)
 
 
 def createContext(data, id=None, keyTransform=None, removeNull=False):
@@ -1055,10 +1176,11 @@ def createContext(data, id=None, keyTransform=None, removeNull=False):
         :return: The converted context list
         :rtype: ``list``
     """
+    plan = ContextKeyPlan(keyTransform, removeNull)
     if isinstance(data, (list, tuple)):
-        return [createContextSingle(d, id, keyTransform, removeNull) for d in data]
+        return [plan.apply(d, id) for d in data]
     else:
-        return createContextSingle(data, id, keyTransform, removeNull)
+        return plan.apply(data, id)
 
 
 def sectionsToMarkdown(root):
@@ -1600,6 +1722,36 @@ def return_warning(message, exit=False, warning='', outputs=None, ignore_auto_ex
         sys.exit(0)
 
 
+def transform_keys(src, transform, cache=None):
+    """
+        Applies a transformation to all of the keys of a dictionary (or list of dictionaries).
+        The transformation of every distinct key is computed once and reused for all the dictionaries.
+
+        :type src: ``dict`` or ``list``
+        :param src: The dictionary (or list of dictionaries) to transform the keys for. (required)
+
+        :type transform: ``function``
+        :param transform: The function which transforms a single key. (required)
+
+        :type cache: ``dict``
+        :param cache: Already transformed keys. Pass the same dict to reuse the keys across calls.
+
+        :return: The dictionary (or list of dictionaries) with the transformed keys.
+        :rtype: ``dict`` or ``list``
+    """
+    if cache is None:
+        cache = {}
+    if isinstance(src, list):
+        return [transform_keys(x, transform, cache) for x in src]
+    res = {}
+    for key, value in src.items():
+        new_key = cache.get(key)
+        if new_key is None:
+            new_key = cache[key] = transform(key)
+        res[new_key] = value
+    return res
+
+
 def camelize(src, delim=' '):
     """
         Convert all keys of a dictionary (or list of dictionaries) to CamelCase (with capital first letter)
@@ -1620,9 +1772,7 @@ def camelize(src, delim=' '):
         components = src_str.split(delim)
         return ''.join(map(lambda x: x.title(), components))
 
-    if isinstance(src, list):
-        return [camelize(phrase, delim) for phrase in src]
-    return {camelize_str(key): value for key, value in src.items()}
+    return transform_keys(src, camelize_str)
 
 
 # Constants for common merge paths
@@ -1662,9 +1812,7 @@ def replace_in_keys(src, existing='.', new='_'):
             src_str = src_str.decode('utf-8')
         return src_str.replace(existing, new)
 
-    if isinstance(src, list):
-        return [replace_in_keys(x, existing, new) for x in src]
-    return {replace_str(k): v for k, v in src.items()}
+    return transform_keys(src, replace_str)
 
 
 # ############################## REGEX FORMATTING ###############################
@@ -1722,15 +1870,15 @@ def camel_case_to_underscore(s):
 
 
 def snakify(src):
-    """Convert all keys of a dictionary to snake_case (underscored separated)
+    """Convert all keys of a dictionary (or list of dictionaries) to snake_case (underscored separated)
 
-    :type src: ``dict``
-    :param src: The dictionary to convert the keys for. (required)
+    :type src: ``dict`` or ``list``
+    :param src: The dictionary (or list of dictionaries) to convert the keys for. (required)
 
-    :return: The dictionary (or list of dictionaries) with the keys in CamelCase.
-    :rtype: ``dict``
+    :return: The dictionary (or list of dictionaries) with the keys in snake_case.
+    :rtype: ``dict`` or ``list``
     """
-    return {camel_case_to_underscore(k): v for k, v in src.items()}
+    return transform_keys(src, camel_case_to_underscore)
 
 
 def pascalToSpace(s):
@@ -2226,6 +2374,44 @@ H || val.SSDeep && val.SSDeep == obj.SSDeep)': {'Malicious': {'Vendor': 'Vendor'
                                .format(indicator_type, INDICATOR_TYPE_TO_CONTEXT_KEY.keys()))
 
 
+class TokenBucket(object):
+    """Thread safe token bucket rate limiter
+
+    :type rate: ``float``
+    :param rate: The number of tokens added to the bucket per second.
+
+    :type capacity: ``int``
+    :param capacity: The maximal number of tokens in the bucket, which is the allowed burst. Default is 1.
+
+    :return: No data returned
+    :rtype: ``None``
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._last = time.time()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Waits until a token is available and takes it
+
+        :return: No data returned
+        :rtype: ``None``
+        """
+        while True:
+            with self._lock:
+                now = time.time()
+                self._tokens = min(self.capacity, self._tokens + max(0, now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
 # Will add only if 'requests' module imported
 if 'requests' in sys.modules:
     class BaseClient(object):
@@ -2254,23 +2440,66 @@ if 'requests' in sys.modules:
             The request authorization, for example: (username, password).
             Can be None.
 
+        :type timeout: ``float`` or ``tuple``
+        :param timeout:
+            The default timeout (in seconds) of the requests. Pass a (connect timeout, read timeout) tuple
+            to set them separately. Default is 10.
+
+        :type retries: ``int``
+        :param retries:
+            The number of times to retry a request which failed on a connection error or with one of
+            status_list_to_retry. Default is 0 (no retries).
+
+        :type status_list_to_retry: ``tuple``
+        :param status_list_to_retry: The response status codes to retry. Default is (429, 500, 502, 503, 504).
+
+        :type backoff_factor: ``float``
+        :param backoff_factor:
+            The exponential backoff factor (in seconds) between retries. The n-th retry waits
+            backoff_factor * 2^(n-1) seconds with a random jitter, or the time in the Retry-After header
+            of the response if there is one. Default is 1.
+
+        :type max_backoff: ``float``
+        :param max_backoff: The maximal time (in seconds) to wait between retries. Default is 60.
+
+        :type pool_size: ``int``
+        :param pool_size: The number of connections to keep open in the session connection pool.
+
+        :type rate_limit: ``float``
+        :param rate_limit: The maximal number of requests per second. Default is no limit.
+
+        :type rate_limit_burst: ``int``
+        :param rate_limit_burst: The number of requests allowed to exceed rate_limit in a burst. Default is 1.
+
         :return: No data returned
         :rtype: ``None``
         """
 
-        def __init__(self, base_url, verify=True, proxy=False, ok_codes=tuple(), headers=None, auth=None):
+        def __init__(self, base_url, verify=True, proxy=False, ok_codes=tuple(), headers=None, auth=None,
+                     timeout=10, retries=0, status_list_to_retry=(429, 500, 502, 503, 504), backoff_factor=1,
+                     max_backoff=60, pool_size=None, rate_limit=None, rate_limit_burst=1):
             self._base_url = base_url
             self._verify = verify
             self._ok_codes = ok_codes
             self._headers = headers
             self._auth = auth
+            self._timeout = timeout
+            self._retries = retries
+            self._status_list_to_retry = status_list_to_retry
+            self._backoff_factor = backoff_factor
+            self._max_backoff = max_backoff
+            self._rate_limiter = TokenBucket(rate_limit, rate_limit_burst) if rate_limit else None
             self._session = requests.Session()
+            if pool_size:
+                adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                self._session.mount('https://', adapter)
+                self._session.mount('http://', adapter)
             if not proxy:
                 self._session.trust_env = False
 
         def _http_request(self, method, url_suffix, full_url=None, headers=None,
                           auth=None, json_data=None, params=None, data=None, files=None,
-                          timeout=10, resp_type='json', ok_codes=None, **kwargs):
+                          timeout=None, resp_type='json', ok_codes=None, **kwargs):
             """A wrapper for requests lib to send our requests and handle requests and responses better.
 
             :type method: ``str``
@@ -2305,10 +2534,12 @@ if 'requests' in sys.modules:
             :type files: ``dict``
             :param files: The file data to send in a 'POST' request.
 
-            :type timeout: ``float``
+            :type timeout: ``float`` or ``tuple``
             :param timeout:
                 The amount of time (in seconds) that a request will wait for a client to
                 establish a connection to a remote machine before a timeout occurs.
+                Pass a (connect timeout, read timeout) tuple to set them separately.
+                If None, will use self._timeout.
 
             :type resp_type: ``str``
             :param resp_type:
@@ -2329,8 +2560,9 @@ if 'requests' in sys.modules:
                 address = full_url if full_url else self._base_url + url_suffix
                 headers = headers if headers else self._headers
                 auth = auth if auth else self._auth
+                timeout = timeout if timeout is not None else self._timeout
                 # Execute
-                res = self._session.request(
+                res = self._send_request(
                     method,
                     address,
                     verify=self._verify,
@@ -2391,6 +2623,107 @@ if 'requests' in sys.modules:
                     .format(err_type, exception.errno, exception.strerror)
                 raise DemistoException(err_msg, exception)
 
+        def _http_request_batch(self, requests_kwargs, max_workers=10):
+            """Sends several requests concurrently with _http_request, over a bounded thread pool.
+            The client rate limit and retries apply to every request. When using more than 10 workers,
+            set the pool_size of the client accordingly so the connections are reused.
+
+            :type requests_kwargs: ``list``
+            :param requests_kwargs:
+                The keyword arguments of _http_request for every request, for example:
+                [{'method': 'GET', 'url_suffix': 'ip/8.8.8.8'}, {'method': 'GET', 'url_suffix': 'ip/1.1.1.1'}]
+
+            :type max_workers: ``int``
+            :param max_workers: The maximal number of requests to send at the same time. Default is 10.
+
+            :return:
+                The results of the requests, in the same order as requests_kwargs. A request which failed
+                has the exception it raised instead of a result, so a single failure does not fail the batch.
+            :rtype: ``list``
+            """
+            def send(kwargs):
+                try:
+                    return self._http_request(**kwargs)
+                except Exception as exception:
+                    return exception
+
+            if len(requests_kwargs) <= 1 or max_workers <= 1:
+                return [send(kwargs) for kwargs in requests_kwargs]
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(min(max_workers, len(requests_kwargs)))
+            try:
+                return pool.map(send, requests_kwargs)
+            finally:
+                pool.close()
+                pool.join()
+
+        def _send_request(self, method, address, **kwargs):
+            """Sends the request in the session, waiting for the rate limiter and retrying failed requests.
+
+            :type method: ``str``
+            :param method: The HTTP method, for example: GET, POST, and so on.
+
+            :type address: ``str``
+            :param address: The request URL.
+
+            :return: The response of the last attempt.
+            :rtype: ``requests.Response``
+            """
+            attempt = 0
+            while True:
+                if self._rate_limiter:
+                    self._rate_limiter.acquire()
+                try:
+                    res = self._session.request(method, address, **kwargs)
+                except (requests.exceptions.SSLError, requests.exceptions.ProxyError):
+                    # retrying will not help
+                    raise
+                except requests.exceptions.ConnectionError:
+                    if attempt >= self._retries:
+                        raise
+                    delay = self._get_backoff(attempt)
+                else:
+                    if attempt >= self._retries or res.status_code not in self._status_list_to_retry:
+                        return res
+                    retry_after = self._get_retry_after(res)
+                    delay = min(retry_after, self._max_backoff) if retry_after is not None \
+                        else self._get_backoff(attempt)
+                attempt += 1
+                time.sleep(delay)
+
+        def _get_backoff(self, attempt):
+            """Returns the time to wait before the next retry - exponential backoff with jitter.
+
+            :type attempt: ``int``
+            :param attempt: The number of the failed attempt, starting from 0.
+
+            :return: The time to wait in seconds.
+            :rtype: ``float``
+            """
+            backoff = min(self._max_backoff, self._backoff_factor * (2 ** attempt))
+            return backoff / 2.0 + random.uniform(0, backoff / 2.0)
+
+        @staticmethod
+        def _get_retry_after(response):
+            """Returns the time to wait according to the Retry-After header of the response.
+
+            :type response: ``requests.Response``
+            :param response: The response of the failed attempt.
+
+            :return: The time to wait in seconds, or None if the response has no valid Retry-After header.
+            :rtype: ``float``
+            """
+            retry_after = response.headers.get('Retry-After')
+            if not retry_after:
+                return None
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                parsed_date = parsedate_tz(retry_after)
+                if parsed_date:
+                    return max(0.0, mktime_tz(parsed_date) - time.time())
+            return None
+
         def _is_status_code_valid(self, response, ok_codes=None):
             """If the status code is OK, return 'True'.
 
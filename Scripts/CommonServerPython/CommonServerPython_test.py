@@ -12,7 +12,8 @@ from CommonServerPython import xml2json, json2xml, entryTypes, formats, tableToM
     flattenCell, date_to_timestamp, datetime, camelize, pascalToSpace, argToList, \
     remove_nulls_from_dictionary, is_error, get_error, hash_djb2, fileResult, is_ip_valid, get_demisto_version, \
     IntegrationLogger, parse_date_string, IS_PY3, DebugLogger, b64_encode, parse_date_range, return_outputs, \
-    argToBoolean, ipv4Regex, ipv4cidrRegex, ipv6cidrRegex, ipv6Regex, batch
+    argToBoolean, ipv4Regex, ipv4cidrRegex, ipv6cidrRegex, ipv6Regex, batch, table_to_markdown_chunks, \
+    createContext, ContextKeyPlan, snakify, replace_in_keys
 
 try:
     from StringIO import StringIO
@@ -330,6 +331,28 @@ def test_tbl_to_md_header_with_special_character():
     assert table_with_character == expected_string_with_special_character
 
 
+def test_tbl_to_md_max_rows():
+    table = tableToMarkdown('tableToMarkdown test with max rows', DATA, max_rows=1)
+    expected_table = '''### tableToMarkdown test with max rows
+|header_1|header_2|header_3|
+|---|---|---|
+| a1 | b1 | c1 |
+
+**2 more rows truncated.**
+'''
+    assert table == expected_table
+    assert tableToMarkdown('tableToMarkdown test', DATA, max_rows=3) == tableToMarkdown('tableToMarkdown test', DATA)
+
+
+def test_tbl_to_md_chunks():
+    data = [{'header_1': i, 'header_2': None, 'header_3': 'a|b'} for i in range(10)]
+    chunks = list(table_to_markdown_chunks('tableToMarkdown test with chunks', data, removeNull=True, chunk_size=3))
+    # title and headers chunk and then 4 chunks of rows
+    assert len(chunks) == 5
+    assert chunks[1] == '| 0 | a\\|b |\n| 1 | a\\|b |\n| 2 | a\\|b |\n'
+    assert ''.join(chunks) == tableToMarkdown('tableToMarkdown test with chunks', data, removeNull=True)
+
+
 def test_flatten_cell():
     # sanity
     utf8_to_flatten = b'abcdefghijklmnopqrstuvwxyz1234567890!'.decode('utf8')
@@ -374,6 +397,32 @@ def test_camelize():
     assert camelize(non_camalized2, '_') == expected_output2
 
 
+def test_create_context():
+    data = [{'a.b': 1, 'a.c': '', 'd': 'e'}, {'a.b': 2, 'f.g.h': None, 'd': 'e2'}]
+    assert createContext(data, keyTransform=underscoreToCamelCase) == [
+        {'a': {'B': 1, 'C': ''}, 'D': 'e'},
+        {'a': {'B': 2}, 'f': {'g': {'H': None}}, 'D': 'e2'}
+    ]
+    assert createContext(data, id='1', removeNull=True) == [
+        {'a': {'b': 1}, 'd': 'e', 'ID': '1'},
+        {'a': {'b': 2}, 'd': 'e2', 'ID': '1'}
+    ]
+
+
+def test_context_key_plan_reuse():
+    plan = ContextKeyPlan(keyTransform=lambda s: s.upper())
+    assert plan.apply({'a.b': 1}) == {'a': {'B': 1}}
+    # seen keys are reused, new keys are compiled on first use
+    assert plan.apply({'a.b': 2, 'c': 3}) == {'a': {'B': 2}, 'C': 3}
+
+
+def test_transform_keys():
+    assert snakify([{'helloWorld': 1}, {'helloWorld': 2, 'fooBar': 3}]) == [
+        {'hello_world': 1}, {'hello_world': 2, 'foo_bar': 3}
+    ]
+    assert replace_in_keys({'a.b': 1, 'c': 2}) == {'a_b': 1, 'c': 2}
+
+
 # Note this test will fail when run locally (in pycharm/vscode) as it assumes the machine (docker image) has UTC timezone set
 def test_date_to_timestamp():
     assert date_to_timestamp('2018-11-06T08:56:41') == 1541494601000
@@ -892,6 +941,86 @@ class TestBaseClient:
         response.status_code = 400
         assert not self.client._is_status_code_valid(response)
 
+    def test_http_request_retry_with_retry_after(self, requests_mock, mocker):
+        from CommonServerPython import BaseClient
+        sleep = mocker.patch('time.sleep')
+        requests_mock.get('http://example.com/api/v2/event', [
+            {'status_code': 429, 'headers': {'Retry-After': '3'}},
+            {'status_code': 503},
+            {'status_code': 200, 'text': json.dumps(self.text)}
+        ])
+        client = BaseClient('http://example.com/api/v2/', retries=2, backoff_factor=2)
+        assert client._http_request('get', 'event') == self.text
+        assert requests_mock.call_count == 3
+        # first wait is from the Retry-After header, the second is a backoff of 4 seconds with jitter
+        assert sleep.call_args_list[0][0][0] == 3
+        assert 2 <= sleep.call_args_list[1][0][0] <= 4
+
+    def test_http_request_retries_exhausted(self, requests_mock, mocker):
+        from CommonServerPython import BaseClient, DemistoException
+        mocker.patch('time.sleep')
+        requests_mock.get('http://example.com/api/v2/event', status_code=500)
+        client = BaseClient('http://example.com/api/v2/', retries=2)
+        with raises(DemistoException, match='Error in API call \\[500\\]'):
+            client._http_request('get', 'event')
+        assert requests_mock.call_count == 3
+
+    def test_http_request_retry_connection_error(self, requests_mock, mocker):
+        from CommonServerPython import BaseClient
+        mocker.patch('time.sleep')
+        requests_mock.get('http://example.com/api/v2/event', [
+            {'exc': requests.exceptions.ConnectionError},
+            {'status_code': 200, 'text': json.dumps(self.text)}
+        ])
+        client = BaseClient('http://example.com/api/v2/', retries=1)
+        assert client._http_request('get', 'event') == self.text
+
+    def test_http_request_no_retries_by_default(self, requests_mock):
+        from CommonServerPython import DemistoException
+        requests_mock.get('http://example.com/api/v2/event', status_code=429)
+        with raises(DemistoException):
+            self.client._http_request('get', 'event')
+        assert requests_mock.call_count == 1
+
+    def test_http_request_timeout_from_client(self, requests_mock):
+        from CommonServerPython import BaseClient
+        requests_mock.get('http://example.com/api/v2/event', text=json.dumps(self.text))
+        client = BaseClient('http://example.com/api/v2/', timeout=(3, 30))
+        client._http_request('get', 'event')
+        assert requests_mock.last_request.timeout == (3, 30)
+        client._http_request('get', 'event', timeout=5)
+        assert requests_mock.last_request.timeout == 5
+
+    def test_http_request_batch(self, requests_mock):
+        from CommonServerPython import DemistoException
+        for i in range(5):
+            requests_mock.get('http://example.com/api/v2/event/{}'.format(i), text=json.dumps({'id': i}))
+        requests_mock.get('http://example.com/api/v2/event/bad', status_code=404)
+        requests_kwargs = [{'method': 'GET', 'url_suffix': 'event/{}'.format(i)} for i in (3, 'bad', 0, 1, 2, 4)]
+        results = self.client._http_request_batch(requests_kwargs, max_workers=3)
+        assert [r['id'] for r in results if not isinstance(r, Exception)] == [3, 0, 1, 2, 4]
+        assert isinstance(results[1], DemistoException)
+
+    def test_pool_size(self):
+        from CommonServerPython import BaseClient
+        client = BaseClient('http://example.com/api/v2/', pool_size=20)
+        assert client._session.get_adapter('https://example.com')._pool_maxsize == 20
+
+
+def test_token_bucket(mocker):
+    from CommonServerPython import TokenBucket
+    now = [1000.0]
+    mocker.patch('time.time', side_effect=lambda: now[0])
+
+    def sleep(seconds):
+        now[0] += seconds
+    mocker.patch('time.sleep', side_effect=sleep)
+    bucket = TokenBucket(rate=2, capacity=2)
+    for _ in range(6):
+        bucket.acquire()
+    # the burst of 2 is immediate, the other 4 requests wait 0.5 seconds each
+    assert now[0] == 1002.0
+
 
 def test_parse_date_string():
     # test unconverted data remains: Z
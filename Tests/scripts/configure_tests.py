@@ -9,6 +9,7 @@ import json
 import glob
 import random
 import argparse
+from collections import deque, defaultdict
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../..')
@@ -47,9 +48,17 @@ ALL_TESTS = ["scripts/script-CommonIntegration.yml", "scripts/script-CommonInteg
 # secrets white list file to be ignored in tests to prevent full tests running each time it is updated
 SECRETS_WHITE_LIST = 'secrets_white_list.json'
 
+ID_SET_PATH = "./Tests/id_set.json"
+
 # Global used to indicate if failed during any of the validation states
 _FAILED = False
 
+# Cache of the script packages we already globbed for a unittest
+_PACKAGES_WITH_UNITTEST = {}
+
+# Cache of the parsed yml files of the change set, so every file is parsed only once
+_YAML_CACHE = {}
+
 
 def checked_type(file_path, regex_list):
     """Check if the file_path is from the regex list"""
@@ -131,8 +140,21 @@ def get_modified_files(files_string):
             is_reputations_json, is_indicator_json)
 
 
+def get_cached_yaml(file_path):
+    """Parse a yml file of the change set, once per test collection"""
+    if file_path not in _YAML_CACHE:
+        _YAML_CACHE[file_path] = get_yaml(file_path)
+
+    return _YAML_CACHE[file_path]
+
+
+def get_versions(file_path):
+    data_dictionary = get_cached_yaml(file_path)
+    return get_from_version(file_path, data_dictionary), get_to_version(file_path, data_dictionary)
+
+
 def get_name(file_path):
-    data_dictionary = get_yaml(file_path)
+    data_dictionary = get_cached_yaml(file_path)
 
     if data_dictionary:
         return data_dictionary.get('name', '-')
@@ -140,13 +162,13 @@ def get_name(file_path):
 
 def get_tests(file_path):
     """Collect tests mentioned in file_path"""
-    data_dictionary = get_yaml(file_path)
+    data_dictionary = get_cached_yaml(file_path)
     # inject no tests to whitelist so adding values to white list will not force all tests
     if data_dictionary:
         return data_dictionary.get('tests', [])
 
 
-def collect_tests(script_ids, playbook_ids, integration_ids, catched_scripts, catched_playbooks, tests_set):
+def collect_tests(script_ids, playbook_ids, integration_ids, catched_scripts, catched_playbooks, tests_set, id_set):
     """Collect tests for the affected script_ids,playbook_ids,integration_ids.
 
     :param script_ids: The ids of the affected scripts in your change set.
@@ -155,6 +177,7 @@ def collect_tests(script_ids, playbook_ids, integration_ids, catched_scripts, ca
     :param catched_scripts: The names of the scripts we already identified a test for.
     :param catched_playbooks: The names of the scripts we already v a test for.
     :param tests_set: The names of the tests we alredy identified.
+    :param id_set: The loaded id_set.json.
 
     :return: (test_ids, missing_ids) - All the names of possible tests, the ids we didn't match a test for.
     """
@@ -163,9 +186,6 @@ def collect_tests(script_ids, playbook_ids, integration_ids, catched_scripts, ca
 
     test_ids, skipped_tests = get_test_ids()
 
-    with open("./Tests/id_set.json", 'r') as conf_file:
-        id_set = json.load(conf_file)
-
     integration_set = id_set['integrations']
     test_playbooks_set = id_set['TestPlaybooks']
     integration_to_command, _ = get_integration_commands(integration_ids, integration_set)
@@ -269,10 +289,13 @@ def find_tests_for_modified_files(modified_files):
     playbook_names = set([])
     integration_ids = set([])
 
+    with open(ID_SET_PATH, 'r') as id_set_file:
+        id_set = json.load(id_set_file)
+
     tests_set, catched_scripts, catched_playbooks = collect_changed_ids(integration_ids, playbook_names,
-                                                                        script_names, modified_files)
+                                                                        script_names, modified_files, id_set)
     test_ids, missing_ids, caught_missing_test = collect_tests(script_names, playbook_names, integration_ids,
-                                                               catched_scripts, catched_playbooks, tests_set)
+                                                               catched_scripts, catched_playbooks, tests_set, id_set)
     missing_ids = update_with_tests_sections(missing_ids, modified_files, test_ids, tests_set)
 
     if len(missing_ids) > 0:
@@ -295,7 +318,7 @@ def update_with_tests_sections(missing_ids, modified_files, test_ids, tests):
         for test in tests_from_file:
             if test in test_ids or re.match(NO_TESTS_FORMAT, test, re.IGNORECASE):
                 if checked_type(file_path, INTEGRATION_REGEXES):
-                    _id = get_script_or_integration_id(file_path)
+                    _id = get_script_or_integration_id(file_path, get_cached_yaml(file_path))
 
                 else:
                     _id = get_name(file_path)
@@ -312,7 +335,7 @@ def update_with_tests_sections(missing_ids, modified_files, test_ids, tests):
     return missing_ids
 
 
-def collect_changed_ids(integration_ids, playbook_names, script_names, modified_files):
+def collect_changed_ids(integration_ids, playbook_names, script_names, modified_files, id_set):
     tests_set = set([])
     updated_script_names = set([])
     updated_playbook_names = set([])
@@ -325,25 +348,22 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
         if checked_type(file_path, YML_SCRIPT_REGEXES):
             name = get_name(file_path)
             script_names.add(name)
-            script_to_version[name] = (get_from_version(file_path), get_to_version(file_path))
+            script_to_version[name] = get_versions(file_path)
 
             package_name = os.path.dirname(file_path)
-            if glob.glob(package_name + "/*_test.py"):
+            if has_unittest(package_name):
                 catched_scripts.add(name)
                 tests_set.add('Found a unittest for the script {}'.format(package_name))
 
         elif checked_type(file_path, YML_PLAYBOOKS_NO_TESTS_REGEXES):
             name = get_name(file_path)
             playbook_names.add(name)
-            playbook_to_version[name] = (get_from_version(file_path), get_to_version(file_path))
+            playbook_to_version[name] = get_versions(file_path)
 
         elif checked_type(file_path, INTEGRATION_REGEXES + YML_INTEGRATION_REGEXES):
-            _id = get_script_or_integration_id(file_path)
+            _id = get_script_or_integration_id(file_path, get_cached_yaml(file_path))
             integration_ids.add(_id)
-            integration_to_version[_id] = (get_from_version(file_path), get_to_version(file_path))
-
-    with open("./Tests/id_set.json", 'r') as conf_file:
-        id_set = json.load(conf_file)
+            integration_to_version[_id] = get_versions(file_path)
 
     script_set = id_set['scripts']
     playbook_set = id_set['playbooks']
@@ -353,20 +373,16 @@ def collect_changed_ids(integration_ids, playbook_names, script_names, modified_
                                                   playbook_set, playbook_names,
                                                   integration_set, integration_ids)
 
-    for script_id in script_names:
-        enrich_for_script_id(script_id, script_to_version[script_id], script_names, script_set, playbook_set,
-                             playbook_names, updated_script_names, updated_playbook_names, catched_scripts,
-                             catched_playbooks, tests_set)
-
     integration_to_command, deprecated_commands_message = get_integration_commands(integration_ids, integration_set)
-    for integration_id, integration_commands in integration_to_command.items():
-        enrich_for_integration_id(integration_id, integration_to_version[integration_id], integration_commands,
-                                  script_set, playbook_set, playbook_names, script_names, updated_script_names,
-                                  updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
 
-    for playbook_id in playbook_names:
-        enrich_for_playbook_id(playbook_id, playbook_to_version[playbook_id], playbook_names, script_set, playbook_set,
-                               updated_playbook_names, catched_playbooks, tests_set)
+    changed_entities = [('scripts', script_id, script_to_version[script_id], None) for script_id in script_names]
+    changed_entities.extend(('integrations', integration_id, integration_to_version[integration_id], commands)
+                            for integration_id, commands in integration_to_command.items())
+    changed_entities.extend(('playbooks', playbook_id, playbook_to_version[playbook_id], None)
+                            for playbook_id in playbook_names)
+
+    enrich_for_changed_ids(DependencyIndex(id_set), changed_entities, script_names, playbook_names,
+                           updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
 
     for new_script in updated_script_names:
         script_names.add(new_script)
@@ -449,152 +465,146 @@ def exclude_deprecated_entities(script_set, script_names,
     return deprecated_messages_dict
 
 
-def enrich_for_integration_id(integration_id, given_version, integration_commands, script_set, playbook_set,
-                              playbook_names, script_names, updated_script_names, updated_playbook_names,
-                              catched_scripts, catched_playbooks, tests_set):
+class DependencyIndex(object):
+    """Reverse dependency index over the id_set, built once per test collection.
+
+    Maps every script, playbook and integration command to the non deprecated scripts and playbooks which use it,
+    so the affected entities of a change set are found with a lookup instead of a scan of the whole id_set.
+    """
+
+    def __init__(self, id_set):
+        self.script_to_scripts = defaultdict(list)
+        self.script_to_playbooks = defaultdict(list)
+        self.playbook_to_playbooks = defaultdict(list)
+        self.command_to_scripts = defaultdict(list)
+        self.command_to_playbooks = defaultdict(list)
+
+        for script in id_set['scripts']:
+            script_data = list(script.values())[0]
+            if script_data.get('deprecated', False):
+                continue
+
+            for executed_script in set(script_data.get('script_executions', [])):
+                self.script_to_scripts[executed_script].append(script_data)
+
+            command_to_integration = script_data.get('command_to_integration', {})
+            for command in set(script_data.get('depends_on', [])):
+                if command in command_to_integration:
+                    self.command_to_scripts[command].append(script_data)
+
+        for playbook in id_set['playbooks']:
+            playbook_data = list(playbook.values())[0]
+            if playbook_data.get('deprecated', False):
+                continue
+
+            for script_name in set(playbook_data.get('implementing_scripts', [])):
+                self.script_to_playbooks[script_name].append(playbook_data)
+
+            for playbook_name in set(playbook_data.get('implementing_playbooks', [])):
+                self.playbook_to_playbooks[playbook_name].append(playbook_data)
+
+            for command in playbook_data.get('command_to_integration', {}):
+                self.command_to_playbooks[command].append(playbook_data)
+
+    def get_dependents(self, entity_type, entity_id, integration_commands=None):
+        """Get the scripts and playbooks which directly use the given entity.
+
+        :param entity_type: One of 'scripts', 'playbooks' or 'integrations'.
+        :param entity_id: The name of the script/playbook or the id of the integration.
+        :param integration_commands: The relevant commands of the integration (integrations only).
+
+        :return: A list of (entity_type, entity_data) tuples.
+        """
+        if entity_type == 'scripts':
+            return [('scripts', script_data) for script_data in self.script_to_scripts.get(entity_id, [])] + \
+                [('playbooks', playbook_data) for playbook_data in self.script_to_playbooks.get(entity_id, [])]
+
+        if entity_type == 'playbooks':
+            return [('playbooks', playbook_data) for playbook_data in self.playbook_to_playbooks.get(entity_id, [])]
+
+        dependents = []
+        for command in integration_commands:
+            for playbook_data in self.command_to_playbooks.get(command, []):
+                command_to_integration = playbook_data.get('command_to_integration', {})
+                if not command_to_integration.get(command) or command_to_integration.get(command) == entity_id:
+                    dependents.append(('playbooks', playbook_data))
+
+            for script_data in self.command_to_scripts.get(command, []):
+                if script_data['command_to_integration'][command] == entity_id:
+                    dependents.append(('scripts', script_data))
+
+        return dependents
+
+
+def has_unittest(package_name):
+    """Check whether a script package holds a unittest, globbing every package only once"""
+    if package_name not in _PACKAGES_WITH_UNITTEST:
+        _PACKAGES_WITH_UNITTEST[package_name] = bool(glob.glob(package_name + "/*_test.py"))
+
+    return _PACKAGES_WITH_UNITTEST[package_name]
+
+
+def enrich_for_changed_ids(dependency_index, changed_entities, script_names, playbook_names, updated_script_names,
+                           updated_playbook_names, catched_scripts, catched_playbooks, tests_set):
     """Enrich the list of affected scripts/playbooks by your change set.
 
-    :param integration_id: The name of the integration we changed.
-    :param given_version: the version of the integration we changed.
-    :param integration_commands: The commands of the changed integation
-    :param script_set: The set of existing scripts within Content repo.
-    :param playbook_set: The set of existing playbooks within Content repo.
-    :param playbook_names: The names of the playbooks affected by your changes.
+    Runs a BFS over the reverse dependency graph. A dependent entity is affected if its toversion is not lower than
+    the toversion of the entity it depends on. Entities which appear in the id_set several times with the same name
+    (one per version range) are enriched for every affected version, so the result does not depend on the order
+    the graph is traversed in.
+
+    :param dependency_index: The DependencyIndex of the id_set.
+    :param changed_entities: A list of (entity_type, entity_id, given_version, integration_commands) of the changed
+        scripts, integrations and playbooks.
     :param script_names: The names of the scripts affected by your changes.
+    :param playbook_names: The names of the playbooks affected by your changes.
     :param updated_script_names: The names of scripts we identify as affected to your change set.
     :param updated_playbook_names: The names of playbooks we identify as affected to your change set.
     :param catched_scripts: The names of scripts we found tests for.
     :param catched_playbooks: The names of playbooks we found tests for.
     :param tests_set: The names of the caught tests.
     """
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
-        if playbook_data.get('deprecated', False):
-            continue
-        playbook_name = playbook_data.get('name')
-        playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
-        playbook_toversion = playbook_data.get('toversion', '99.99.99')
-        command_to_integration = playbook_data.get('command_to_integration', {})
-        implementing_commands = command_to_integration.keys()
-        for integration_command in integration_commands:
-            if integration_command in implementing_commands and playbook_toversion >= given_version[1]:
-                if playbook_name not in playbook_names and playbook_name not in updated_playbook_names:
-                    if not command_to_integration.get(integration_command) or \
-                            command_to_integration.get(integration_command) == integration_id:
-
-                        tests = set(playbook_data.get('tests', []))
-                        if tests:
-                            catched_playbooks.add(playbook_name)
-                            update_test_set(tests, tests_set)
-
-                        updated_playbook_names.add(playbook_name)
-                        new_versions = (playbook_fromversion, playbook_toversion)
-                        enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
-                                               updated_playbook_names, catched_playbooks, tests_set)
-
-    for script in script_set:
-        script_data = list(script.values())[0]
-        if script_data.get('deprecated', False):
-            continue
-        script_name = script_data.get('name')
-        script_file_path = script_data.get('file_path')
-        script_fromversion = script_data.get('fromversion', '0.0.0')
-        script_toversion = script_data.get('toversion', '99.99.99')
-        command_to_integration = script_data.get('command_to_integration', {})
-        for integration_command in integration_commands:
-            if integration_command in script_data.get('depends_on', []):
-                if integration_command in command_to_integration.keys() and \
-                        command_to_integration[integration_command] == integration_id and \
-                        script_toversion >= given_version[1]:
-
-                    if script_name not in script_names and script_name not in updated_script_names:
-                        tests = script_data.get('tests', [])
-                        if tests:
-                            catched_scripts.add(script_name)
-                            update_test_set(tests, tests_set)
-
-                        package_name = os.path.dirname(script_file_path)
-                        if glob.glob(package_name + "/*_test.py"):
-                            catched_scripts.add(script_name)
-                            tests_set.add('Found a unittest for the script {}'.format(script_name))
-
-                        updated_script_names.add(script_name)
-                        new_versions = (script_fromversion, script_toversion)
-                        enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set,
-                                             playbook_names, updated_script_names, updated_playbook_names,
-                                             catched_scripts, catched_playbooks, tests_set)
-
-
-def enrich_for_playbook_id(given_playbook_id, given_version, playbook_names, script_set, playbook_set,
-                           updated_playbook_names, catched_playbooks, tests_set):
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
-        if playbook_data.get('deprecated', False):
-            continue
-        playbook_name = playbook_data.get('name')
-        playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
-        playbook_toversion = playbook_data.get('toversion', '99.99.99')
-        if given_playbook_id in playbook_data.get('implementing_playbooks', []) and \
-                playbook_toversion >= given_version[1]:
-
-            if playbook_name not in playbook_names and playbook_name not in updated_playbook_names:
-                tests = set(playbook_data.get('tests', []))
-                if tests:
-                    catched_playbooks.add(playbook_name)
-                    update_test_set(tests, tests_set)
-
-                updated_playbook_names.add(playbook_name)
-                new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
-                                       updated_playbook_names, catched_playbooks, tests_set)
+    visited = set([])
+    queue = deque(changed_entities)
+    while queue:
+        entity_type, entity_id, given_version, integration_commands = queue.popleft()
+        dependents = dependency_index.get_dependents(entity_type, entity_id, integration_commands)
+        for dependent_type, dependent_data in dependents:
+            dependent_name = dependent_data.get('name')
+            dependent_fromversion = dependent_data.get('fromversion', '0.0.0')
+            dependent_toversion = dependent_data.get('toversion', '99.99.99')
+            dependent_key = (dependent_type, dependent_name, dependent_fromversion, dependent_toversion)
+            if dependent_toversion < given_version[1] or dependent_key in visited:
+                continue
 
+            if dependent_type == 'scripts':
+                if dependent_name in script_names:
+                    continue
 
-def enrich_for_script_id(given_script_id, given_version, script_names, script_set, playbook_set, playbook_names,
-                         updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks, tests_set):
-    for script in script_set:
-        script_data = list(script.values())[0]
-        if script_data.get('deprecated', False):
-            continue
-        script_name = script_data.get('name')
-        script_file_path = script_data.get('file_path')
-        script_fromversion = script_data.get('fromversion', '0.0.0')
-        script_toversion = script_data.get('toversion', '99.99.99')
-        if given_script_id in script_data.get('script_executions', []) and script_toversion >= given_version[1]:
-            if script_name not in script_names and script_name not in updated_script_names:
-                tests = set(script_data.get('tests', []))
+                tests = dependent_data.get('tests', [])
                 if tests:
-                    catched_scripts.add(script_name)
+                    catched_scripts.add(dependent_name)
                     update_test_set(tests, tests_set)
 
-                package_name = os.path.dirname(script_file_path)
-                if glob.glob(package_name + "/*_test.py"):
-                    catched_scripts.add(script_name)
-                    tests_set.add('Found a unittest for the script {}'.format(script_name))
+                if has_unittest(os.path.dirname(dependent_data.get('file_path'))):
+                    catched_scripts.add(dependent_name)
+                    tests_set.add('Found a unittest for the script {}'.format(dependent_name))
 
-                updated_script_names.add(script_name)
-                new_versions = (script_fromversion, script_toversion)
-                enrich_for_script_id(script_name, new_versions, script_names, script_set, playbook_set, playbook_names,
-                                     updated_script_names, updated_playbook_names, catched_scripts, catched_playbooks,
-                                     tests_set)
+                updated_script_names.add(dependent_name)
 
-    for playbook in playbook_set:
-        playbook_data = list(playbook.values())[0]
-        if playbook_data.get('deprecated', False):
-            continue
-        playbook_name = playbook_data.get('name')
-        playbook_fromversion = playbook_data.get('fromversion', '0.0.0')
-        playbook_toversion = playbook_data.get('toversion', '99.99.99')
-        if given_script_id in playbook_data.get('implementing_scripts', []) and playbook_toversion >= given_version[1]:
-            if playbook_name not in playbook_names and playbook_name not in updated_playbook_names:
-                tests = set(playbook_data.get('tests', []))
+            else:
+                if dependent_name in playbook_names:
+                    continue
+
+                tests = dependent_data.get('tests', [])
                 if tests:
-                    catched_playbooks.add(playbook_name)
+                    catched_playbooks.add(dependent_name)
                     update_test_set(tests, tests_set)
 
-                updated_playbook_names.add(playbook_name)
-                new_versions = (playbook_fromversion, playbook_toversion)
-                enrich_for_playbook_id(playbook_name, new_versions, playbook_names, script_set, playbook_set,
-                                       updated_playbook_names, catched_playbooks, tests_set)
+                updated_playbook_names.add(dependent_name)
+
+            visited.add(dependent_key)
+            queue.append((dependent_type, dependent_name, (dependent_fromversion, dependent_toversion), None))
 
 
 def update_test_set(tests, tests_set):
@@ -1,6 +1,6 @@
 import glob
 
-from Tests.test_utils import re, print_error, print_warning, os, get_yaml
+from Tests.test_utils import re, print_error, print_warning, os, ContentRepository
 from Tests.scripts.constants import INTEGRATION_REGEX, BETA_INTEGRATION_REGEX, BETA_INTEGRATION_DISCLAIMER
 
 
@@ -10,12 +10,14 @@ class DescriptionValidator(object):
     Attributes:
         file_path (string): Path to the checked file.
         _is_valid (bool): the attribute which saves the valid/in-valid status of the current file.
+        content_repo (ContentRepository): the loaded content files of the validation run.
     """
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, content_repo=None):
         self._is_valid = True
 
         self.file_path = file_path
+        self.content_repo = content_repo or ContentRepository()
 
     def is_valid(self):
         self.is_duplicate_description()
@@ -24,7 +26,7 @@ class DescriptionValidator(object):
 
     def is_valid_beta_description(self):
         """Check if beta disclaimer exists in detailed description"""
-        data_dictionary = get_yaml(self.file_path)
+        data_dictionary = self.content_repo.get_yaml(self.file_path)
         description_in_yml = data_dictionary.get('detaileddescription', '') if data_dictionary else ''
 
         if not re.match(BETA_INTEGRATION_REGEX, self.file_path, re.IGNORECASE):
@@ -76,7 +78,7 @@ class DescriptionValidator(object):
             if md_file_path:
                 is_description_in_package = True
 
-        data_dictionary = get_yaml(self.file_path)
+        data_dictionary = self.content_repo.get_yaml(self.file_path)
 
         if not data_dictionary:
             return is_description_in_package
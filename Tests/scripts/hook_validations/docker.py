@@ -1,4 +1,4 @@
-from Tests.test_utils import get_yaml, print_error
+from Tests.test_utils import print_error, ContentRepository
 from distutils.version import LooseVersion
 from pkg_resources import parse_version
 from datetime import datetime, timedelta
@@ -22,10 +22,10 @@ DEFAULT_REGISTRY = 'registry-1.docker.io'
 
 class DockerImageValidator(object):
 
-    def __init__(self, yml_file_path, is_modified_file, is_integration):
+    def __init__(self, yml_file_path, is_modified_file, is_integration, content_repo=None):
         self.is_modified_file = is_modified_file
         self.is_integration = is_integration
-        self.yml_file = get_yaml(yml_file_path)
+        self.yml_file = (content_repo or ContentRepository()).get_yaml(yml_file_path)
         self.yml_docker_image = self.get_docker_image_from_yml()
         self.from_version = self.yml_file.get('fromversion', '0')
         self.docker_image_name, self.docker_image_tag = DockerImageValidator.parse_docker_image(self.yml_docker_image)
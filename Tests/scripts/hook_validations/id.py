@@ -3,7 +3,7 @@ import re
 import json
 from distutils.version import LooseVersion
 
-from Tests.test_utils import get_script_or_integration_id, collect_ids, print_error
+from Tests.test_utils import get_script_or_integration_id, collect_ids, print_error, ContentRepository
 from Tests.scripts.constants import INTEGRATION_REGEX, TEST_PLAYBOOK_REGEX, SCRIPT_JS_REGEX, \
     SCRIPT_REGEX, TEST_SCRIPT_REGEX, INTEGRATION_YML_REGEX, PLAYBOOK_REGEX, SCRIPT_YML_REGEX, SCRIPT_PY_REGEX
 from Tests.scripts.update_id_set import get_script_data, get_playbook_data, \
@@ -24,6 +24,7 @@ class IDSetValidator(object):
         playbook_set (set): Set of all the data regarding playbooks in our system.
         integration_set (set): Set of all the data regarding integrations in our system.
         test_playbook_set (set): Set of all the data regarding test playbooks in our system.
+        content_repo (ContentRepository): the loaded content files of the validation run.
     """
     SCRIPTS_SECTION = "scripts"
     PLAYBOOK_SECTION = "playbooks"
@@ -32,8 +33,9 @@ class IDSetValidator(object):
 
     ID_SET_PATH = "./Tests/id_set.json"
 
-    def __init__(self, is_circle, is_test_run=False):
+    def __init__(self, is_circle, is_test_run=False, content_repo=None):
         self.is_circle = is_circle
+        self.content_repo = content_repo or ContentRepository()
 
         if not is_test_run and is_circle:
             self.id_set = self.load_id_set()
@@ -103,23 +105,24 @@ class IDSetValidator(object):
         is_valid = True
         if self.is_circle:  # No need to check on local env because the id_set will contain this info after the commit
             if re.match(PLAYBOOK_REGEX, file_path, re.IGNORECASE):
-                playbook_data = get_playbook_data(file_path)
+                playbook_data = get_playbook_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
                 is_valid = self.is_valid_in_id_set(file_path, playbook_data, self.playbook_set)
 
             elif re.match(TEST_PLAYBOOK_REGEX, file_path, re.IGNORECASE):
-                playbook_data = get_playbook_data(file_path)
+                playbook_data = get_playbook_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
                 is_valid = self.is_valid_in_id_set(file_path, playbook_data, self.test_playbook_set)
 
             elif re.match(TEST_SCRIPT_REGEX, file_path, re.IGNORECASE) or \
                     re.match(SCRIPT_REGEX, file_path, re.IGNORECASE):
 
-                script_data = get_script_data(file_path)
+                script_data = get_script_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
                 is_valid = self.is_valid_in_id_set(file_path, script_data, self.script_set)
 
             elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
                     re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
 
-                integration_data = get_integration_data(file_path)
+                integration_data = get_integration_data(file_path,
+                                                        data_dictionary=self.content_repo.get_yaml(file_path))
                 is_valid = self.is_valid_in_id_set(file_path, integration_data, self.integration_set)
 
             elif re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
@@ -127,7 +130,8 @@ class IDSetValidator(object):
                     re.match(SCRIPT_JS_REGEX, file_path, re.IGNORECASE):
 
                 yml_path, code = get_script_package_data(os.path.dirname(file_path))
-                script_data = get_script_data(yml_path, script_code=code)
+                script_data = get_script_data(yml_path, script_code=code,
+                                              data_dictionary=self.content_repo.get_yaml(yml_path))
                 is_valid = self.is_valid_in_id_set(yml_path, script_data, self.script_set)
 
         return is_valid
@@ -189,36 +193,39 @@ class IDSetValidator(object):
         if self.is_circle:
             if re.match(TEST_PLAYBOOK_REGEX, file_path, re.IGNORECASE):
                 obj_type = self.TEST_PLAYBOOK_SECTION
-                obj_id = collect_ids(file_path)
-                obj_data = get_playbook_data(file_path)
+                obj_id = collect_ids(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
+                obj_data = get_playbook_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
 
             elif re.match(SCRIPT_REGEX, file_path, re.IGNORECASE) or \
                     re.match(TEST_SCRIPT_REGEX, file_path, re.IGNORECASE):
                 obj_type = self.SCRIPTS_SECTION
-                obj_id = get_script_or_integration_id(file_path)
-                obj_data = get_script_data(file_path)
+                obj_id = get_script_or_integration_id(file_path,
+                                                      data_dictionary=self.content_repo.get_yaml(file_path))
+                obj_data = get_script_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
 
             elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
                     re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
 
                 obj_type = self.INTEGRATION_SECTION
-                obj_id = get_script_or_integration_id(file_path)
-                obj_data = get_integration_data(file_path)
+                obj_id = get_script_or_integration_id(file_path,
+                                                      data_dictionary=self.content_repo.get_yaml(file_path))
+                obj_data = get_integration_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
 
             elif re.match(PLAYBOOK_REGEX, file_path, re.IGNORECASE):
                 obj_type = self.PLAYBOOK_SECTION
-                obj_id = collect_ids(file_path)
-                obj_data = get_playbook_data(file_path)
+                obj_id = collect_ids(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
+                obj_data = get_playbook_data(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
 
             elif re.match(SCRIPT_YML_REGEX, file_path, re.IGNORECASE) or \
                     re.match(SCRIPT_PY_REGEX, file_path, re.IGNORECASE) or \
                     re.match(SCRIPT_JS_REGEX, file_path, re.IGNORECASE):
 
                 yml_path, code = get_script_package_data(os.path.dirname(file_path))
-                obj_data = get_script_data(yml_path, script_code=code)
+                obj_data = get_script_data(yml_path, script_code=code,
+                                           data_dictionary=self.content_repo.get_yaml(yml_path))
 
                 obj_type = self.SCRIPTS_SECTION
-                obj_id = get_script_or_integration_id(yml_path)
+                obj_id = get_script_or_integration_id(yml_path, data_dictionary=self.content_repo.get_yaml(yml_path))
 
             else:  # In case of a json file
                 is_json_file = True
@@ -1,7 +1,7 @@
 import glob
 import base64
 
-from Tests.test_utils import re, print_error, os, get_yaml
+from Tests.test_utils import re, print_error, os, ContentRepository
 from Tests.scripts.constants import IMAGE_REGEX, INTEGRATION_REGEX, INTEGRATION_YML_REGEX, DEFAULT_IMAGE_BASE64
 
 
@@ -11,11 +11,13 @@ class ImageValidator(object):
     Attributes:
         file_path (string): Path to the checked file.
         _is_valid (bool): the attribute which saves the valid/in-valid status of the current file.
+        content_repo (ContentRepository): the loaded content files of the validation run.
     """
     IMAGE_MAX_SIZE = 10 * 1024  # 10kB
 
-    def __init__(self, file_path):
+    def __init__(self, file_path, content_repo=None):
         self._is_valid = True
+        self.content_repo = content_repo or ContentRepository()
 
         if re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE):
             self.file_path = file_path
@@ -50,7 +52,7 @@ class ImageValidator(object):
                 self._is_valid = False
 
         else:
-            data_dictionary = get_yaml(self.file_path)
+            data_dictionary = self.content_repo.get_yaml(self.file_path)
 
             if not data_dictionary:
                 return
@@ -66,7 +68,7 @@ class ImageValidator(object):
         is_image_in_yml = False
         is_image_in_package = False
 
-        data_dictionary = get_yaml(self.file_path)
+        data_dictionary = self.content_repo.get_yaml(self.file_path)
 
         if not data_dictionary:
             return False
@@ -92,7 +94,7 @@ class ImageValidator(object):
         return True
 
     def load_image_from_yml(self):
-        data_dictionary = get_yaml(self.file_path)
+        data_dictionary = self.content_repo.get_yaml(self.file_path)
 
         if not data_dictionary:
             print_error("{} isn't an image file or unified integration file.".format(self.file_path))
@@ -1,7 +1,7 @@
 """
 This module is designed to validate the correctness of incident field entities in content.
 """
-from Tests.test_utils import print_error, get_json, get_remote_file
+from Tests.test_utils import print_error, ContentRepository
 
 
 class IncidentFieldValidator(object):
@@ -12,19 +12,21 @@ class IncidentFieldValidator(object):
        file_path (str): the path to the file we are examining at the moment.
        current_incident_field (dict): Json representation of the current incident field from the branch.
        old_incident_field (dict): Json representation of the current incident field from master.
+       content_repo (ContentRepository): the loaded content files of the validation run.
     """
 
-    def __init__(self, file_path, check_git=True, old_file_path=None, old_git_branch='master'):
+    def __init__(self, file_path, check_git=True, old_file_path=None, old_git_branch='master', content_repo=None):
         self.file_path = file_path
         self.current_incident_field = {}
         self.old_incident_field = {}
+        self.content_repo = content_repo or ContentRepository()
 
         if check_git:
-            self.current_incident_field = get_json(file_path)
+            self.current_incident_field = self.content_repo.get_json(file_path)
             if old_file_path:
-                self.old_incident_field = get_remote_file(old_file_path, old_git_branch)
+                self.old_incident_field = self.content_repo.get_remote_file(old_file_path, old_git_branch)
             else:
-                self.old_incident_field = get_remote_file(file_path, old_git_branch)
+                self.old_incident_field = self.content_repo.get_remote_file(file_path, old_git_branch)
 
     def is_backward_compatible(self):
         """Check whether the Incident Field is backward compatible or not, update the _is_valid field to determine that
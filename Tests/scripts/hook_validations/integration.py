@@ -1,6 +1,5 @@
 from Tests.scripts.constants import PYTHON_SUBTYPES, INTEGRATION_CATEGORIES, REPUTATION_COMMANDS
-from Tests.test_utils import print_error, get_yaml, print_warning, get_remote_file, server_version_compare, \
-    get_dockerimage45
+from Tests.test_utils import print_error, print_warning, server_version_compare, get_dockerimage45, ContentRepository
 
 
 class IntegrationValidator(object):
@@ -12,17 +11,19 @@ class IntegrationValidator(object):
        file_path (str): the path to the file we are examining at the moment.
        current_integration (dict): Json representation of the current integration from the branch.
        old_integration (dict): Json representation of the current integration from master.
+       content_repo (ContentRepository): the loaded content files of the validation run.
     """
 
-    def __init__(self, file_path, check_git=True, old_file_path=None, old_git_branch='master'):
+    def __init__(self, file_path, check_git=True, old_file_path=None, old_git_branch='master', content_repo=None):
         self._is_valid = True
 
         self.file_path = file_path
+        self.content_repo = content_repo or ContentRepository()
         if check_git:
-            self.current_integration = get_yaml(file_path)
+            self.current_integration = self.content_repo.get_yaml(file_path)
 
             old_integration_file = old_file_path or file_path
-            self.old_integration = get_remote_file(old_integration_file, old_git_branch)
+            self.old_integration = self.content_repo.get_remote_file(old_integration_file, old_git_branch)
 
     def is_backward_compatible(self):
         """Check whether the Integration is backward compatible or not, update the _is_valid field to determine that"""
@@ -1,5 +1,5 @@
 from Tests.scripts.constants import PYTHON_SUBTYPES
-from Tests.test_utils import print_error, print_warning, get_yaml, get_remote_file, server_version_compare, get_dockerimage45
+from Tests.test_utils import print_error, print_warning, server_version_compare, get_dockerimage45, ContentRepository
 
 
 class ScriptValidator(object):
@@ -10,18 +10,20 @@ class ScriptValidator(object):
        file_path (str): the path to the file we are examining at the moment.
        current_script (dict): Json representation of the current script from the branch.
        old_script (dict): Json representation of the current script from master.
+       content_repo (ContentRepository): the loaded content files of the validation run.
     """
 
-    def __init__(self, file_path, check_git=True, old_file_path=None, old_git_branch='master'):
+    def __init__(self, file_path, check_git=True, old_file_path=None, old_git_branch='master', content_repo=None):
         self.file_path = file_path
         self.current_script = {}
         self.old_script = {}
+        self.content_repo = content_repo or ContentRepository()
 
         if check_git:
-            self.current_script = get_yaml(file_path)
+            self.current_script = self.content_repo.get_yaml(file_path)
 
             old_script_file = old_file_path or file_path
-            self.old_script = get_remote_file(old_script_file, old_git_branch)
+            self.old_script = self.content_repo.get_remote_file(old_script_file, old_git_branch)
 
     @classmethod
     def _is_sub_set(cls, supposed_bigger_list, supposed_smaller_list):
@@ -6,6 +6,8 @@ import json
 import string
 import argparse
 import PyPDF2
+from collections import Counter, deque
+from multiprocessing import Pool, cpu_count
 
 from bs4 import BeautifulSoup
 from Tests.scripts.constants import *
@@ -51,8 +53,23 @@ IPV4_REGEX = r'\b(?:(?:25[0-5]|2[0-4][0-9]|[01]?[0-9][0-9]?)\.){3}(?:25[0-5]|2[0
 DATES_REGEX = r'((\d{4}[/.-]\d{2}[/.-]\d{2})[T\s](\d{2}:?\d{2}:?\d{2}:?(\.\d{5,10})?([+-]\d{2}:?\d{2})?Z?)?)'
 # false positives
 UUID_REGEX = r'([\w]{8}-[\w]{4}-[\w]{4}-[\w]{4}-[\w]{8,12})'
+DOCKER_IMAGE_VERSION_REGEX = r'dockerimage:\s*\w*demisto/\w+:(\d+.\d+.\d+.\d+)'
 # disable-secrets-detection-end
 
+DATES_PATTERN = re.compile(DATES_REGEX)
+UUID_PATTERN = re.compile(UUID_REGEX)
+DOCKER_IMAGE_VERSION_PATTERN = re.compile(DOCKER_IMAGE_VERSION_REGEX)
+URLS_PATTERN = re.compile(URLS_REGEX)
+EMAIL_PATTERN = re.compile(EMAIL_REGEX)
+IPV6_PATTERN = re.compile(IPV6_REGEX)
+IPV4_PATTERN = re.compile(IPV4_REGEX)
+FALSE_POSITIVE_PATTERN = re.compile(r'([^\s]*[(\[{].*[)\]}][^\s]*)')
+DISABLE_SECRETS_DETECTION = 'disable-secrets-detection'
+PRINTABLE_CHARS_ORDER = {char: index for index, char in enumerate(string.printable)}
+
+# white list matchers by white list path, built once per process
+_WHITE_LIST_MATCHERS = {}
+
 
 def get_secrets(branch_name, is_circle):
     secrets_found = {}
@@ -119,74 +136,167 @@ def is_text_file(file_path):
     return False
 
 
-def search_potential_secrets(secrets_file_paths):
+def search_potential_secrets(secrets_file_paths, processes=None):
     """Returns potential secrets(sensitive data) found in committed and added files
     :param secrets_file_paths: paths of files that are being commited to git repo
+    :param processes: number of worker processes to scan the files with, defaults to the number of cpus
     :return: dictionary(filename: (list)secrets) of strings sorted by file name for secrets found in files
     """
     secrets_found = {}
-    for file_path in secrets_file_paths:
-        # Get if file path in pack and pack name
-        is_pack = is_file_path_in_pack(file_path)
-        pack_name = get_pack_name(file_path)
-        # Get generic/ioc/files white list sets based on if pack or not
-        secrets_white_list, ioc_white_list, files_white_list = get_white_listed_items(is_pack, pack_name)
-        # Skip white listed files
-        if file_path in files_white_list:
-            print("Skipping secrets detection for file: {} as it is white listed".format(file_path))
-            continue
-        # Init vars for current loop
-        file_name = os.path.basename(file_path)
-        high_entropy_strings = []
-        secrets_found_with_regex = []
-        _, file_extension = os.path.splitext(file_path)
-        skip_secrets = {'skip_once': False, 'skip_multi': False}
-        # get file contents
-        file_contents = get_file_contents(file_path, file_extension)
-        # in packs regard all items as regex as well, reset pack's whitelist in order to avoid repetition later
-        if is_pack:
-            file_contents = remove_white_list_regex(file_contents, secrets_white_list)
-            secrets_white_list = set()
-        yml_file_contents = get_related_yml_contents(file_path)
-        # Add all context output paths keywords to whitelist temporary
-        if file_extension == YML_FILE_EXTENSION or yml_file_contents:
-            temp_white_list = create_temp_white_list(yml_file_contents if yml_file_contents else file_contents)
-            secrets_white_list = secrets_white_list.union(temp_white_list)
-        # Search by lines after strings with high entropy / IoCs regex as possibly suspicious
-        for line in file_contents.split('\n'):
-            # if detected disable-secrets comments, skip the line/s
-            skip_secrets = is_secrets_disabled(line, skip_secrets)
-            if skip_secrets['skip_once'] or skip_secrets['skip_multi']:
-                skip_secrets['skip_once'] = False
-                continue
-            # REGEX scanning for IOCs and false positive groups
-            regex_secrets, false_positives = regex_for_secrets(line)
-            for regex_secret in regex_secrets:
-                if not any(ioc.lower() in regex_secret.lower() for ioc in ioc_white_list):
-                    secrets_found_with_regex.append(regex_secret)
-            # added false positives into white list array before testing the strings in line
-            secrets_white_list = secrets_white_list.union(false_positives)
-            # due to nature of eml files, skip string by string secret detection - only regex
-            if file_extension in SKIP_FILE_TYPE_ENTROPY_CHECKS or \
-                    any(demisto_type in file_name for demisto_type in SKIP_DEMISTO_TYPE_ENTROPY_CHECKS):
-                continue
-            line = remove_false_positives(line)
-            # calculate entropy for each string in the file
-            for string_ in line.split():
-                # compare the lower case of the string against both generic whitelist & temp white list
-                if not any(white_list_string.lower() in string_.lower() for white_list_string in secrets_white_list):
-                    entropy = calculate_shannon_entropy(string_)
-                    if entropy >= ENTROPY_THRESHOLD:
-                        high_entropy_strings.append(string_)
-
-        if high_entropy_strings or secrets_found_with_regex:
-            # uniquify identical matches between lists
-            file_secrets = list(set(high_entropy_strings + secrets_found_with_regex))
+    secrets_file_paths = list(secrets_file_paths)
+    if len(secrets_file_paths) > 1 and processes != 1:
+        pool = Pool(processes=min(processes or cpu_count(), len(secrets_file_paths)))
+        try:
+            files_secrets = pool.map(search_file_secrets, secrets_file_paths)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        files_secrets = [search_file_secrets(file_path) for file_path in secrets_file_paths]
+
+    for file_name, file_secrets in files_secrets:
+        if file_secrets:
             secrets_found[file_name] = file_secrets
 
     return secrets_found
 
 
+def search_file_secrets(file_path):
+    """Search a single file for potential secrets
+    :param file_path: path of a file that is being commited to git repo
+    :return: tuple(file name, (list)secrets found in the file)
+    """
+    # Get if file path in pack and pack name
+    is_pack = is_file_path_in_pack(file_path)
+    pack_name = get_pack_name(file_path)
+    # Get generic/ioc/files white list sets based on if pack or not
+    secrets_white_list, ioc_white_list, files_white_list = get_white_listed_items(is_pack, pack_name)
+    file_name = os.path.basename(file_path)
+    # Skip white listed files
+    if file_path in files_white_list:
+        print("Skipping secrets detection for file: {} as it is white listed".format(file_path))
+        return file_name, []
+    # Init vars for current file
+    high_entropy_strings = []
+    secrets_found_with_regex = []
+    _, file_extension = os.path.splitext(file_path)
+    skip_secrets = {'skip_once': False, 'skip_multi': False}
+    white_list_matcher, ioc_white_list_matcher = get_white_list_matchers(is_pack, pack_name, secrets_white_list,
+                                                                         ioc_white_list)
+    # get file contents
+    file_contents = get_file_contents(file_path, file_extension)
+    # in packs regard all items as regex as well, the pack's whitelist is not used as strings later
+    if is_pack:
+        file_contents = remove_white_list_regex(file_contents, secrets_white_list)
+    yml_file_contents = get_related_yml_contents(file_path)
+    # Add all context output paths keywords to whitelist temporary
+    temp_white_list_matcher = WhiteListMatcher()
+    if file_extension == YML_FILE_EXTENSION or yml_file_contents:
+        temp_white_list = create_temp_white_list(yml_file_contents if yml_file_contents else file_contents)
+        temp_white_list_matcher = WhiteListMatcher(temp_white_list)
+    # false positives found in the file so far are white listed for the rest of it
+    false_positives_white_list = set()
+    # due to nature of eml files, skip string by string secret detection - only regex
+    skip_entropy_checks = file_extension in SKIP_FILE_TYPE_ENTROPY_CHECKS or \
+        any(demisto_type in file_name for demisto_type in SKIP_DEMISTO_TYPE_ENTROPY_CHECKS)
+    # Search by lines after strings with high entropy / IoCs regex as possibly suspicious
+    for line in file_contents.split('\n'):
+        # if detected disable-secrets comments, skip the line/s
+        skip_secrets = is_secrets_disabled(line, skip_secrets)
+        if skip_secrets['skip_once'] or skip_secrets['skip_multi']:
+            skip_secrets['skip_once'] = False
+            continue
+        # REGEX scanning for IOCs and false positive groups
+        regex_secrets, false_positives = regex_for_secrets(line)
+        for regex_secret in regex_secrets:
+            if not ioc_white_list_matcher.matches(regex_secret.lower()):
+                secrets_found_with_regex.append(regex_secret)
+        # added false positives into white list array before testing the strings in line
+        false_positives_white_list.update(false_positive.lower() for false_positive in false_positives)
+        if skip_entropy_checks:
+            continue
+        line = remove_false_positives(line)
+        # calculate entropy for each string in the file
+        for string_ in line.split():
+            # compare the lower case of the string against both generic whitelist & temp white list
+            lower_string = string_.lower()
+            if white_list_matcher.matches(lower_string) or temp_white_list_matcher.matches(lower_string) or \
+                    any(white_list_string in lower_string for white_list_string in false_positives_white_list):
+                continue
+            entropy = calculate_shannon_entropy(string_)
+            if entropy >= ENTROPY_THRESHOLD:
+                high_entropy_strings.append(string_)
+
+    # uniquify identical matches between lists
+    return file_name, list(set(high_entropy_strings + secrets_found_with_regex))
+
+
+class WhiteListMatcher(object):
+    """Aho-Corasick automaton of white listed strings.
+
+    Checks whether a string contains any of the white listed strings in a single pass over the string,
+    instead of a substring search per white listed string.
+    """
+
+    def __init__(self, white_list=()):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.is_match = [False]
+        for white_list_string in white_list:
+            state = 0
+            for char in white_list_string:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.fail.append(0)
+                    self.is_match.append(False)
+                state = next_state
+            self.is_match[state] = True
+
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                fail_state = self.fail[state]
+                while fail_state and char not in self.transitions[fail_state]:
+                    fail_state = self.fail[fail_state]
+                self.fail[next_state] = self.transitions[fail_state].get(char, 0)
+                self.is_match[next_state] = self.is_match[next_state] or self.is_match[self.fail[next_state]]
+                queue.append(next_state)
+
+    def matches(self, data):
+        """Check if data contains any of the white listed strings
+        :param data: string to check
+        :return: bool
+        """
+        transitions, fail, is_match = self.transitions, self.fail, self.is_match
+        if is_match[0]:
+            return True
+        state = 0
+        for char in data:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if is_match[state]:
+                return True
+        return False
+
+
+def get_white_list_matchers(is_pack, pack_name, secrets_white_list, ioc_white_list):
+    """Get the matchers of the generic and ioc white lists, built once per white list file
+    :return: tuple(white list matcher, ioc white list matcher)
+    """
+    whitelist_key = pack_name if is_pack else WHITELIST_PATH
+    if whitelist_key not in _WHITE_LIST_MATCHERS:
+        # pack's white list is only used as regexes, see remove_white_list_regex
+        white_list = [] if is_pack else secrets_white_list
+        _WHITE_LIST_MATCHERS[whitelist_key] = (WhiteListMatcher(item.lower() for item in white_list),
+                                               WhiteListMatcher(ioc.lower() for ioc in ioc_white_list))
+    return _WHITE_LIST_MATCHERS[whitelist_key]
+
+
 def remove_white_list_regex(file_contents, secrets_white_list):
     for regex in secrets_white_list:
         file_contents = re.sub(regex, '', file_contents)
@@ -231,36 +341,38 @@ def regex_for_secrets(line):
     false_positives = []
 
     # Dates REGEX for false positive preventing since they have high entropy
-    dates = re.findall(DATES_REGEX, line)
+    dates = DATES_PATTERN.findall(line)
     if dates:
         false_positives += [date[0].lower() for date in dates]
+    # the following regexes are only run on lines containing the characters all of their matches must contain
     # UUID REGEX
-    uuids = re.findall(UUID_REGEX, line)
+    uuids = UUID_PATTERN.findall(line) if '-' in line else []
     if uuids:
         false_positives += uuids
     # docker images version are detected as ips. so we ignore and whitelist them
     # example: dockerimage: demisto/duoadmin:1.0.0.147
-    re_res = re.search(r'dockerimage:\s*\w*demisto/\w+:(\d+.\d+.\d+.\d+)', line)
+    re_res = DOCKER_IMAGE_VERSION_PATTERN.search(line) if 'dockerimage:' in line else None
     if re_res:
         docker_version = re_res.group(1)
         false_positives.append(docker_version)
         line = line.replace(docker_version, '')
     # URL REGEX
-    urls = re.findall(URLS_REGEX, line)
+    urls = URLS_PATTERN.findall(line) if '://' in line else []
     if urls:
         potential_secrets += urls
     # EMAIL REGEX
-    emails = re.findall(EMAIL_REGEX, line)
+    emails = EMAIL_PATTERN.findall(line) if '@' in line else []
     if emails:
         potential_secrets += emails
     # IPV6 REGEX
-    ipv6_list = re.findall(IPV6_REGEX, line)
+    # all ipv6 alternatives contain '::' except the full address, which has at least 6 colons
+    ipv6_list = IPV6_PATTERN.findall(line) if '::' in line or line.count(':') >= 6 else []
     if ipv6_list:
         for ipv6 in ipv6_list:
             if ipv6 != '::' and len(ipv6) > 4:
                 potential_secrets.append(ipv6)
     # IPV4 REGEX
-    ipv4_list = re.findall(IPV4_REGEX, line)
+    ipv4_list = IPV4_PATTERN.findall(line) if '.' in line else []
     if ipv4_list:
         potential_secrets += ipv4_list
 
@@ -276,13 +388,13 @@ def calculate_shannon_entropy(data):
     if not data:
         return 0
     entropy = 0
-    # each unicode code representation of all characters which are considered printable
-    for char in (ord(c) for c in string.printable):
+    chars_count = Counter(data)
+    # all characters which are considered printable, summed in string.printable order
+    for char in sorted((c for c in chars_count if c in PRINTABLE_CHARS_ORDER), key=PRINTABLE_CHARS_ORDER.get):
         # probability of event X
-        p_x = float(data.count(chr(char))) / len(data)
-        if p_x > 0:
-            # the information in every possible news, in bits
-            entropy += - p_x * math.log(p_x, 2)
+        p_x = float(chars_count[char]) / len(data)
+        # the information in every possible news, in bits
+        entropy += - p_x * math.log(p_x, 2)
     return entropy
 
 
@@ -371,7 +483,9 @@ def extract_text_from_md_html(file_path):
 
 
 def remove_false_positives(line):
-    false_positive = re.search(r'([^\s]*[(\[{].*[)\]}][^\s]*)', line)
+    if not any(char in line for char in '([{') or not any(char in line for char in ')]}'):
+        return line
+    false_positive = FALSE_POSITIVE_PATTERN.search(line)
     if false_positive:
         false_positive = false_positive.group(1)
         line = line.replace(false_positive, '')
@@ -379,6 +493,8 @@ def remove_false_positives(line):
 
 
 def is_secrets_disabled(line, skip_secrets):
+    if DISABLE_SECRETS_DETECTION not in line:
+        return skip_secrets
     if bool(re.findall(r'(disable-secrets-detection-start)', line)):
         skip_secrets['skip_multi'] = True
     elif bool(re.findall(r'(disable-secrets-detection-end)', line)):
@@ -1,15 +1,14 @@
-import json
-import yaml
 import os
 import re
 import sys
 
 from Tests.scripts.constants import *
-from Tests.test_utils import print_error, print_warning, run_command, get_yaml, get_json, checked_type, \
-    get_release_notes_file_path, get_latest_release_notes_text
+from Tests.test_utils import print_error, print_warning, run_command, checked_type, \
+    get_release_notes_file_path, get_latest_release_notes_text, ContentRepository
 
 try:
     from pykwalify.core import Core
+    from pykwalify.compat import yml
 except ImportError:
     print('Please install pykwalify, you can do it by running: `pip install -I pykwalify`')
     sys.exit(1)
@@ -22,6 +21,7 @@ class StructureValidator(object):
         _is_valid (bool): the attribute which saves the valid/in-valid status of the current file.
         file_path (str): the path to the file we are examining at the moment.
         is_added_file (bool): whether the file is modified or added.
+        content_repo (ContentRepository): the loaded content files of the validation run.
     """
     VERSION_SCHEMAS = [
         INTEGRATION_REGEX,
@@ -72,12 +72,15 @@ class StructureValidator(object):
     }
 
     SCHEMAS_PATH = "Tests/schemas/"
+    # loaded schemas by name, shared by all the validators of the process
+    _schemas = {}
 
-    def __init__(self, file_path, is_added_file=False, is_renamed=False):
+    def __init__(self, file_path, is_added_file=False, is_renamed=False, content_repo=None):
         self._is_valid = True
         self.file_path = file_path
         self.is_added_file = is_added_file
         self.is_renamed = is_renamed
+        self.content_repo = content_repo or ContentRepository()
 
     def is_file_valid(self):
         """Check if the file as a valid structure.
@@ -121,7 +124,7 @@ class StructureValidator(object):
         if matching_regex not in self.SKIPPED_SCHEMAS or os.path.isfile(self.file_path):
             if matching_regex is not None and self.REGEXES_TO_SCHEMA_DICT.get(matching_regex):
                 c = Core(source_file=self.file_path,
-                         schema_files=[self.SCHEMAS_PATH + self.REGEXES_TO_SCHEMA_DICT.get(matching_regex) + '.yml'])
+                         schema_data=self.get_schema(self.REGEXES_TO_SCHEMA_DICT.get(matching_regex)))
                 try:
                     c.validate(raise_exception=True)
                 except Exception as err:
@@ -135,6 +138,22 @@ class StructureValidator(object):
 
         return self._is_valid
 
+    @classmethod
+    def get_schema(cls, schema_name):
+        """Load a schema from SCHEMAS_PATH, once per process.
+
+        Args:
+            schema_name (str): the name of the schema file, without the extension.
+
+        Returns:
+            dict. The loaded schema.
+        """
+        if schema_name not in cls._schemas:
+            with open(cls.SCHEMAS_PATH + schema_name + '.yml', 'r') as schema_file:
+                cls._schemas[schema_name] = yml.load(schema_file)
+
+        return cls._schemas[schema_name]
+
     @staticmethod
     def validate_reputations_file(json_dict):
         """Validate that the reputations file as version of -1."""
@@ -166,7 +185,7 @@ class StructureValidator(object):
         reputations_valid = True
         layouts_valid = True
         if file_extension == '.yml':
-            yaml_dict = get_yaml(self.file_path)
+            yaml_dict = self.content_repo.get_yaml(self.file_path)
             version_number = yaml_dict.get('commonfields', {}).get('version')
             if not version_number:  # some files like playbooks do not have commonfields key
                 version_number = yaml_dict.get('version')
@@ -174,7 +193,7 @@ class StructureValidator(object):
         elif file_extension == '.json':
             if checked_type(self.file_path, self.VERSION_SCHEMAS):
                 file_name = os.path.basename(self.file_path)
-                json_dict = get_json(self.file_path)
+                json_dict = self.content_repo.get_json(self.file_path)
                 if file_name == "reputations.json":
                     reputations_valid = self.validate_reputations_file(json_dict)
                 elif re.match(LAYOUT_REGEX, self.file_path, re.IGNORECASE):
@@ -271,8 +290,8 @@ class StructureValidator(object):
 
     def load_data_from_file(self):
         file_type_suffix_to_loading_func = {
-            '.yml': yaml.safe_load,
-            '.json': json.load,
+            '.yml': self.content_repo.get_yaml,
+            '.json': self.content_repo.get_json,
         }
 
         file_extension = os.path.splitext(self.file_path)[1]
@@ -280,9 +299,7 @@ class StructureValidator(object):
             print_error("An unknown error has occurred. Please retry.")
 
         load_function = file_type_suffix_to_loading_func[file_extension]
-        with open(self.file_path, 'r') as file_obj:
-            loaded_file_data = load_function(file_obj)
-            return loaded_file_data
+        return load_function(self.file_path)
 
     @staticmethod
     def get_file_id_from_loaded_file_data(loaded_file_data):
@@ -304,7 +321,7 @@ class StructureValidator(object):
         """
         loaded_file_data = self.load_data_from_file()
         file_id = self.get_file_id_from_loaded_file_data(loaded_file_data)
-        if (not file_id and loaded_file_data['name'] == 'reputations'):
+        if (not file_id and loaded_file_data.get('name') == 'reputations'):
             return True
         if not file_id or '/' in file_id:
             self._is_valid = False
@@ -51,3 +51,47 @@ class TestGetRemoteFile:
     def test_get_remote_file_invalid_origin_branch(self):
         invalid_yml = test_utils.get_remote_file('Integrations/Gmail/Gmail.yml', 'origin/NoSuchBranch')
         assert not invalid_yml
+
+
+class TestContentRepository:
+    PATH_TO_HERE = './Tests/scripts/hook_validations/tests/tests_data/'
+
+    def test_files_are_loaded_once(self, mocker):
+        content_repo = test_utils.ContentRepository()
+        get_yaml = mocker.spy(test_utils, 'get_yaml')
+        get_json = mocker.spy(test_utils, 'get_json')
+
+        integration = content_repo.get_yaml('{}fake_integration.yml'.format(self.PATH_TO_HERE))
+        assert content_repo.get_yaml('{}fake_integration.yml'.format(self.PATH_TO_HERE)) is integration
+        assert integration == test_utils.get_yaml('{}fake_integration.yml'.format(self.PATH_TO_HERE))
+        assert content_repo.get_json('{}fake_json.json'.format(self.PATH_TO_HERE)) == {"im a fake json": ["really!"]}
+        assert content_repo.get_json('{}fake_json.json'.format(self.PATH_TO_HERE)) == {"im a fake json": ["really!"]}
+
+        assert get_yaml.call_count == 2
+        assert get_json.call_count == 1
+
+    def test_remote_files_are_fetched_once_per_tag(self, mocker):
+        content_repo = test_utils.ContentRepository()
+        get_remote_file = mocker.patch.object(test_utils, 'get_remote_file', return_value={'name': 'Gmail'})
+
+        assert content_repo.get_remote_file('Integrations/Gmail/Gmail.yml') == {'name': 'Gmail'}
+        assert content_repo.get_remote_file('Integrations/Gmail/Gmail.yml') == {'name': 'Gmail'}
+        assert content_repo.get_remote_file('Integrations/Gmail/Gmail.yml', '19.10.0') == {'name': 'Gmail'}
+
+        assert get_remote_file.call_count == 2
+
+
+class TestGetFileHash:
+    def test_dir_hash_ignores_test_artifacts(self, tmpdir):
+        pkg_dir = tmpdir.mkdir('Pkg')
+        pkg_dir.join('Pkg.py').write('print(1)')
+        pkg_hash = test_utils.get_file_hash(str(pkg_dir))
+
+        pkg_dir.mkdir('.pytest_cache').join('v').write('cache')
+        pkg_dir.mkdir('__pycache__').join('Pkg.cpython-37.pyc').write('cache')
+        pkg_dir.join('conftest.py').write('')
+        assert test_utils.get_file_hash(str(pkg_dir), ignored_files=('conftest.py',)) == pkg_hash
+        assert test_utils.get_file_hash(str(pkg_dir)) != pkg_hash
+
+        pkg_dir.join('Pkg.py').write('print(2)')
+        assert test_utils.get_file_hash(str(pkg_dir), ignored_files=('conftest.py',)) != pkg_hash
@@ -33,3 +33,37 @@ class TestingVersion:
         finally:
             if os.path.isfile(test_path):
                 os.remove(test_path)
+
+
+class TestUnifyPackages:
+    @staticmethod
+    def fake_merge(package_path, dir_name, dest_path):
+        output_path = os.path.join(dest_path, 'script-{}.yml'.format(os.path.basename(os.path.dirname(package_path))))
+        with open(output_path, 'w') as f:
+            f.write('unified')
+        return [output_path], None, None, None, None
+
+    def test_unify_packages_reuses_unchanged_packages(self, tmpdir, mocker):
+        import content_creator
+        cache_dir = tmpdir.join('cache')
+        mocker.patch.object(content_creator, 'UNIFIED_CACHE_DIR', str(cache_dir))
+        mocker.patch.object(content_creator, 'UNIFIED_CACHE_MANIFEST', str(cache_dir.join('manifest.json')))
+        merge = mocker.patch.object(content_creator, 'merge_script_package_to_yml', side_effect=self.fake_merge)
+        pool = mocker.patch.object(content_creator, 'Pool')
+        pool.return_value.imap_unordered.side_effect = lambda func, items: map(func, items)
+        for name in ('First', 'Second'):
+            tmpdir.mkdir(name).join(name + '.py').write('print("{}")'.format(name))
+        packages = [(str(tmpdir.join(name)) + '/', 'Scripts', content_creator.BUNDLE_POST) for name in ('First', 'Second')]
+
+        unified_packages = content_creator.unify_packages(packages)
+        assert merge.call_count == 2
+        assert unified_packages[packages[0][0]]['files'] == ['script-First.yml']
+
+        assert content_creator.unify_packages(packages) == unified_packages
+        assert merge.call_count == 2
+
+        tmpdir.join('Second', 'Second.py').write('print("changed")')
+        content_creator.unify_packages(packages)
+        assert merge.call_count == 3
+        assert merge.call_args[0][0] == packages[1][0]
+        assert cache_dir.join(content_creator.BUNDLE_POST, 'script-Second.yml').check()
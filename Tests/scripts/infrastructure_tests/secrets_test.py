@@ -2,7 +2,7 @@ import os
 from Tests.scripts.hook_validations.secrets import get_secrets, get_diff_text_files, is_text_file, \
     search_potential_secrets, remove_white_list_regex, create_temp_white_list, get_file_contents, \
     retrieve_related_yml, regex_for_secrets, calculate_shannon_entropy, get_packs_white_list, get_generic_white_list, \
-    remove_false_positives, is_secrets_disabled, ignore_base64
+    remove_false_positives, is_secrets_disabled, ignore_base64, WhiteListMatcher
 
 
 class TestSecrets:
@@ -59,6 +59,18 @@ class TestSecrets:
         assert '123e4567-e89b-12d3-a456-426655440000' in false_positives
         assert '199.199.178.199' in secrets
 
+    def test_regex_for_secrets_ipv6(self):
+        secrets, _ = regex_for_secrets('fe80::1ff:fe23:4567:890a 2001:0db8:85a3:0000:0000:8a2e:0370:7334 a:b')
+        assert 'fe80::1ff:fe23:4567:890a' in secrets
+        assert '2001:0db8:85a3:0000:0000:8a2e:0370:7334' in secrets
+
+    def test_white_list_matcher(self):
+        white_list = ['sade', 'boop', 'aboopa', 'shmoop']
+        matcher = WhiteListMatcher(white_list)
+        for string_ in ['sade', 'xxboopxx', 'aboo', 'shmoo', 'asadboop', 'hmoopa', '']:
+            assert matcher.matches(string_) == any(item in string_ for item in white_list)
+        assert not WhiteListMatcher().matches('sade')
+
     def test_calculate_shannon_entropy(self):
         test_string = 'SADE'
         entropy = calculate_shannon_entropy(test_string)
@@ -0,0 +1,194 @@
+import json
+import re
+import threading
+import time
+
+import demisto_client
+from mock import patch
+
+from Tests.test_content import group_tests_by_integration, run_tests_concurrently
+from Tests.test_integration import test_integration as run_integration_test, Backoff
+from Tests.scripts.constants import PB_Status
+
+try:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+except ImportError:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class StandInDemistoServer(object):
+    """Emulates the endpoints of the Demisto API used by test_integration.
+
+    Every playbook is in progress for the first polls of its state and then completes. The server records when two
+    instances of the same integration are enabled at the same time.
+    """
+    def __init__(self, polls_until_completed=2):
+        self.polls_until_completed = polls_until_completed
+        self.lock = threading.RLock()
+        self.next_id = 0
+        self.enabled_brands = {}
+        self.conflicts = []
+        self.playbook_polls = {}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), self.create_handler())
+        self.url = 'http://127.0.0.1:{}'.format(self.httpd.server_address[1])
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def new_id(self):
+        with self.lock:
+            self.next_id += 1
+            return str(self.next_id)
+
+    def set_instance(self, instance):
+        with self.lock:
+            if not instance.get('id'):
+                instance_id = self.new_id()
+                if self.enabled_brands.get(instance['brand']):
+                    self.conflicts.append(instance['brand'])
+                self.enabled_brands[instance['brand']] = instance_id
+                return {'id': instance_id}
+            if instance.get('enable') == 'false' and self.enabled_brands.get(instance['brand']) == instance['id']:
+                self.enabled_brands[instance['brand']] = None
+            return {'id': instance['id']}
+
+    def get_playbook_state(self, investigation_id):
+        with self.lock:
+            polls = self.playbook_polls.get(investigation_id, 0) + 1
+            self.playbook_polls[investigation_id] = polls
+        return PB_Status.COMPLETED if polls > self.polls_until_completed else PB_Status.IN_PROGRESS
+
+    def handle(self, method, path, body):
+        if method == 'POST' and path == '/settings/integration/search':
+            name = body['query'].split(':', 1)[1]
+            return {'configurations': [{'name': name, 'category': 'Utilities', 'configuration': []}]}
+        if method == 'PUT' and path == '/settings/integration':
+            return self.set_instance(body)
+        if method == 'DELETE' and path.startswith('/settings/integration/'):
+            return {}
+        if method == 'POST' and path == '/incident':
+            incident_id = self.new_id()
+            return {'id': incident_id, 'investigationId': incident_id, 'name': body.get('name')}
+        if method == 'POST' and path == '/incidents/search':
+            incident_id = body['filter']['query'].split(':', 1)[1]
+            return {'total': 1, 'data': [{'id': incident_id, 'investigationId': incident_id}]}
+        if method == 'GET' and path.startswith('/inv-playbook/'):
+            return {'state': self.get_playbook_state(path.rsplit('/', 1)[1])}
+        if method == 'POST' and path == '/incident/batchDelete':
+            return {}
+        return None
+
+    def create_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+                result = server.handle(self.command, re.sub(r'\?.*$', '', self.path), body)
+                data = json.dumps(result).encode('utf-8')
+                self.send_response(200 if result is not None else 404)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = respond
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def test_group_tests_by_integration():
+    tests = [
+        {'playbookID': 'a', 'integrations': 'A'},
+        {'playbookID': 'no integrations'},
+        {'playbookID': 'b', 'integrations': ['B']},
+        {'playbookID': 'a and c', 'integrations': ['C', 'A']},
+        {'playbookID': 'c', 'integrations': ['C']},
+        {'playbookID': 'd', 'integrations': ['D']},
+    ]
+    groups = group_tests_by_integration(tests)
+    assert [[t['playbookID'] for t in group] for group in groups] == [
+        ['a', 'a and c', 'c'],
+        ['no integrations'],
+        ['b'],
+        ['d'],
+    ]
+
+
+def test_run_tests_concurrently_never_runs_conflicting_tests_together():
+    tests = [{'playbookID': str(i), 'integrations': ['shared' if i % 2 else str(i)]} for i in range(8)]
+    lock = threading.Lock()
+    running_integrations = []
+    conflicts = []
+    finished = []
+
+    def run_test(t):
+        with lock:
+            if set(t['integrations']).intersection(running_integrations):
+                conflicts.append(t['playbookID'])
+            running_integrations.extend(t['integrations'])
+        time.sleep(0.05)
+        with lock:
+            for integration in t['integrations']:
+                running_integrations.remove(integration)
+            finished.append(t['playbookID'])
+
+    run_tests_concurrently(tests, run_test, workers=4)
+    assert not conflicts
+    assert sorted(finished) == sorted(t['playbookID'] for t in tests)
+
+
+def test_run_tests_concurrently_with_one_worker_keeps_the_order():
+    tests = [{'playbookID': str(i), 'integrations': [str(i % 3)]} for i in range(6)]
+    finished = []
+    run_tests_concurrently(tests, lambda t: finished.append(t['playbookID']))
+    assert finished == [t['playbookID'] for t in tests]
+
+
+def test_backoff_never_sleeps_past_the_deadline():
+    with patch('Tests.test_integration.time') as time_mock:
+        time_mock.time.return_value = 100
+        backoff = Backoff(3, initial_interval=1, max_interval=2, factor=2)
+        backoff.sleep()
+        backoff.sleep()
+        time_mock.time.return_value = 102.5
+        backoff.sleep()
+        assert [call[0][0] for call in time_mock.sleep.call_args_list] == [1, 2, 0.5]
+        assert not backoff.expired()
+        time_mock.time.return_value = 103.5
+        assert backoff.expired()
+
+
+def test_integration_against_stand_in_server():
+    tests = [{'playbookID': 'playbook_{}'.format(i), 'integrations': ['shared' if i % 2 else 'integration_{}'.format(i)]}
+             for i in range(4)]
+    results = {}
+
+    with StandInDemistoServer() as server:
+        def run_test(t):
+            client = demisto_client.configure(base_url=server.url, api_key='api key', verify_ssl=False)
+            integrations = [{'name': name, 'params': {}, 'validate_test': False} for name in t['integrations']]
+            results[t['playbookID']] = run_integration_test(client, integrations, t['playbookID'], {'timeout': 30})
+
+        run_tests_concurrently(tests, run_test, workers=4)
+
+    assert not server.conflicts
+    assert sorted(results) == sorted(t['playbookID'] for t in tests)
+    assert all(status == PB_Status.COMPLETED for status, _ in results.values())
@@ -1,6 +1,11 @@
+import json
+import os
+import shutil
 import unittest
 import pytest
-from Tests.scripts.update_id_set import has_duplicate, get_integration_data, get_script_data, get_playbook_data
+from Tests.scripts import update_id_set
+from Tests.scripts.update_id_set import has_duplicate, get_integration_data, get_script_data, get_playbook_data, \
+    find_duplicates
 
 MOCKED_DATA = [
     (
@@ -83,6 +88,20 @@ def test_had_duplicates(id_set, id_to_check, result):
     assert result == has_duplicate(id_set, id_to_check)
 
 
+def test_find_duplicates():
+    id_set = {
+        'scripts': MOCKED_DATA[0][0],
+        'integrations': MOCKED_DATA[1][0],
+        'playbooks': MOCKED_DATA[2][0],
+        'TestPlaybooks': [],
+    }
+    scripts, integrations, playbooks, test_playbooks = find_duplicates(id_set)
+    assert scripts == ['BluecatAddressManager']
+    assert integrations == []
+    assert playbooks == ['Test3']
+    assert test_playbooks == []
+
+
 INTEGRATION_DATA = {
     "Cortex XDR - IR": {
         "name": "Cortex XDR - IR",
@@ -161,5 +180,64 @@ class TestIntegration(unittest.TestCase):
         self.assertDictEqual(data['command_to_integration'], PLAYBOOK_DATA['command_to_integration'])
 
 
+class TestIncrementalIdSet(object):
+    CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    ITEMS = [
+        'Integrations/AlienVault_OTX_v2',
+        'Scripts/IsInCidrRanges',
+        'Scripts/script-AddEvidence.yml',
+        'Playbooks/playbook-Access_Investigation_-_Generic.yml',
+        'TestPlaybooks/Test-URLhaus.yml',
+    ]
+
+    @pytest.fixture
+    def content(self, tmpdir, mocker):
+        for item in self.ITEMS:
+            src = os.path.join(self.CONTENT_DIR, item)
+            dst = tmpdir.join(item)
+            if os.path.isdir(src):
+                shutil.copytree(src, str(dst))
+            else:
+                dst.dirpath().ensure(dir=True)
+                shutil.copy(src, str(dst))
+        tmpdir.mkdir('Tests')
+        # process the items in this process
+        pool = mocker.MagicMock(imap=lambda func, items, chunksize=1: map(func, items))
+        mocker.patch('Tests.scripts.update_id_set.Pool', return_value=pool)
+        with tmpdir.as_cwd():
+            yield tmpdir
+
+    @staticmethod
+    def read_id_set():
+        with open(update_id_set.ID_SET_PATH) as id_set_file:
+            return json.load(id_set_file)
+
+    def test_incremental_same_as_full(self, content, mocker):
+        update_id_set.re_create_id_set()
+        full_id_set = self.read_id_set()
+        assert len(full_id_set['integrations']) == 1
+        assert len(full_id_set['scripts']) == 2
+
+        process = mocker.spy(update_id_set, 'get_integration_data')
+        update_id_set.re_create_id_set(incremental=True)
+        assert self.read_id_set() == full_id_set
+        # nothing changed so nothing was parsed again
+        assert process.call_count == 0
+
+    def test_incremental_changed_and_deleted(self, content):
+        update_id_set.re_create_id_set()
+        yml = content.join('Integrations', 'AlienVault_OTX_v2', 'AlienVault_OTX_v2.yml')
+        yml.write(yml.read().replace('name: AlienVault OTX v2', 'name: AlienVault OTX v3', 1))
+        content.join('Scripts', 'script-AddEvidence.yml').remove()
+
+        update_id_set.re_create_id_set(incremental=True)
+        id_set = self.read_id_set()
+        assert id_set['integrations'][0]['AlienVault OTX v2']['name'] == 'AlienVault OTX v3'
+        assert [list(script.keys())[0] for script in id_set['scripts']] == ['IsInCidrRanges']
+
+        update_id_set.re_create_id_set()
+        assert self.read_id_set() == id_set
+
+
 if __name__ == '__main__':
     unittest.main()
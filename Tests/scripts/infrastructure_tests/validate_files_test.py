@@ -1,4 +1,5 @@
-from Tests.scripts.validate_files import FilesValidator
+from Tests.scripts.validate_files import FilesValidator, load_validation_cache
+from Tests.scripts.hook_validations.structure import StructureValidator
 # from Tests.scripts.hook_validations.conf_json import ConfJsonValidator
 
 
@@ -74,3 +75,49 @@ D       Integrations/integration-Recorded_Future.yml'''
     assert len(modified) == 0
     assert len(added) == 0
     assert len(deleted) == 0
+
+
+def test_validate_all_files_cache(mocker, tmpdir):
+    mocker.patch('Tests.scripts.hook_validations.conf_json.ConfJsonValidator.load_conf_file', return_value={})
+    mocker.patch('Tests.scripts.validate_files.VALIDATION_CACHE_PATH', str(tmpdir.join('validate_files_cache.json')))
+    pool = mocker.patch('Tests.scripts.validate_files.Pool')
+    pool.return_value.imap.side_effect = lambda func, items, chunksize=1: map(func, items)
+    mocker.patch.object(FilesValidator, 'get_all_files_to_validate', return_value=[
+        ('Validating Integrations directory:', None),
+        ('Validating Integrations/PagerDuty/PagerDuty.yml', 'Integrations/PagerDuty/PagerDuty.yml')
+    ])
+    is_valid_scheme = mocker.spy(StructureValidator, 'is_valid_scheme')
+
+    file_validator = FilesValidator()
+    file_validator.validate_all_files()
+    assert file_validator._is_valid
+    assert is_valid_scheme.call_count == 1
+    assert len(load_validation_cache()) == 1
+
+    # unchanged valid files are not validated again
+    file_validator.validate_all_files()
+    assert file_validator._is_valid
+    assert is_valid_scheme.call_count == 1
+
+
+def test_validate_all_files_cache_is_per_path(mocker, tmpdir):
+    mocker.patch('Tests.scripts.hook_validations.conf_json.ConfJsonValidator.load_conf_file', return_value={})
+    mocker.patch('Tests.scripts.validate_files.VALIDATION_CACHE_PATH', str(tmpdir.join('validate_files_cache.json')))
+    pool = mocker.patch('Tests.scripts.validate_files.Pool')
+    pool.return_value.imap.side_effect = lambda func, items, chunksize=1: map(func, items)
+    # the same content in another path
+    mocker.patch('Tests.scripts.validate_files.get_file_hash', return_value='same hash')
+    get_all_files_to_validate = mocker.patch.object(FilesValidator, 'get_all_files_to_validate', return_value=[
+        ('Validating Integrations/PagerDuty/PagerDuty.yml', 'Integrations/PagerDuty/PagerDuty.yml')
+    ])
+    is_valid_scheme = mocker.spy(StructureValidator, 'is_valid_scheme')
+
+    file_validator = FilesValidator()
+    file_validator.validate_all_files()
+    assert is_valid_scheme.call_count == 1
+
+    get_all_files_to_validate.return_value = [
+        ('Validating Integrations/QRadar/QRadar.yml', 'Integrations/QRadar/QRadar.yml')
+    ]
+    file_validator.validate_all_files()
+    assert is_valid_scheme.call_count == 2
@@ -7,6 +7,7 @@ import os
 import hashlib
 import sys
 import shutil
+import tempfile
 import time
 from datetime import datetime
 
@@ -68,6 +69,19 @@ def get_python_version(docker_image):
     return py_num
 
 
+def get_script_python_version(script_obj):
+    """
+    Get the python version of an integration/script by its subtype, used when running without docker
+
+    Arguments:
+        script_obj {dict} -- the script object of the integration/script yml
+
+    Return:
+        python version as a float (2.7, 3.7)
+    """
+    return 3.7 if script_obj.get('subtype') == 'python3' else 2.7
+
+
 def get_pipenv_dir(py_version):
     """
     Get the direcotry holding pipenv files for the specified python version
@@ -244,6 +258,37 @@ def docker_run(project_dir, docker_image, no_test, no_lint, keep_container, use_
             print("Test container [{}] was left available".format(container_id))
 
 
+def local_run(project_dir, py_num, no_test, no_lint, cpu_num=0):
+    """
+    Run pylint and pytest (RUN_SH_FILE) on the project dir with the local python2/python3 instead of in a docker
+    container. The dev requirements should be installed for that python (for example in the active virtualenv).
+
+    Arguments:
+        project_dir {string} -- the integration/script dir
+        py_num {float} -- python version as float (2.7, 3.7)
+        no_test {bool} -- skip pytest
+        no_lint {bool} -- skip pylint
+        cpu_num {int} -- number of CPUs to run pytest on
+    """
+    python_exe = 'python2' if py_num < 3 else 'python3'
+    python_path = shutil.which(python_exe)
+    if not python_path:
+        raise ValueError("{} was not found, it is required for running {} locally".format(python_exe, project_dir))
+    print_v('Using: {} to run pylint and pytest'.format(python_path))
+    env = dict(os.environ, PYLINT_FILES=get_lint_files(project_dir), CPU_NUM=str(cpu_num),
+               CI=os.getenv("CI", "false"))
+    if no_test:
+        env['PYTEST_SKIP'] = '1'
+    if no_lint:
+        env['PYLINT_SKIP'] = '1'
+    # RUN_SH_FILE runs `python`, point it to the python of the project
+    with tempfile.TemporaryDirectory() as bin_dir:
+        os.symlink(python_path, os.path.join(bin_dir, 'python'))
+        env['PATH'] = bin_dir + os.pathsep + env.get('PATH', '')
+        print(subprocess.check_output(['sh', RUN_SH_FILE], cwd=project_dir, env=env,
+                                      universal_newlines=True, stderr=subprocess.STDOUT))
+
+
 def run_flake8(project_dir, py_num):
     print("========= Running flake8 ===============")
     python_exe = 'python2' if py_num < 3 else 'python3'
@@ -296,6 +341,9 @@ Will lookup up what docker image to use and will setup the dev dependencies and
     parser.add_argument("-r", "--root", help="Run pytest container with root user", action='store_true')
     parser.add_argument("-k", "--keep-container", help="Keep the test container", action='store_true')
     parser.add_argument("-v", "--verbose", help="Verbose output", action='store_true')
+    parser.add_argument("-l", "--local", action='store_true',
+                        help="Run pylint and pytest with the local python2/python3 instead of in the docker image. "
+                             "The python version is taken from the subtype of the integration/script")
     parser.add_argument(
         "--cpu-num",
         help="Number of CPUs to run pytest on (can set to `auto` for automatic detection of the number of CPUs.)",
@@ -327,10 +375,16 @@ Will lookup up what docker image to use and will setup the dev dependencies and
         print('Script is not of type "python". Found type: {}. Nothing to do.'.format(script_type))
         return 1
     dockers = get_docker_images(script_obj)
+    if args.local:
+        dockers = [None]
     for docker in dockers:
         for try_num in (1, 2):
-            print_v("Using docker image: {}".format(docker))
-            py_num = get_python_version(docker)
+            if args.local:
+                py_num = get_script_python_version(script_obj)
+                print("Running locally with python version: [{}]".format(py_num))
+            else:
+                print_v("Using docker image: {}".format(docker))
+                py_num = get_python_version(docker)
             setup_dev_files(project_dir)
             try:
                 if not args.no_flake8:
@@ -339,7 +393,9 @@ Will lookup up what docker image to use and will setup the dev dependencies and
                     run_mypy(project_dir, py_num)
                 if not args.no_bandit:
                     run_bandit(project_dir, py_num)
-                if not args.no_test or not args.no_pylint:
+                if args.local and (not args.no_test or not args.no_pylint):
+                    local_run(project_dir, py_num, args.no_test, args.no_pylint, args.cpu_num)
+                elif not args.no_test or not args.no_pylint:
                     requirements = get_dev_requirements(py_num)
                     docker_image_created = docker_image_create(docker, requirements)
                     docker_run(
@@ -1,26 +1,84 @@
 #!/usr/bin/env python3
 import os
 import sys
+import json
+import time
+import hashlib
 import subprocess
 import concurrent.futures
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from pkg_dev_test_tasks import get_dev_requirements
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../..')
 sys.path.append(CONTENT_DIR)
-from Tests.test_utils import print_color, LOG_COLORS  # noqa: E402
+from Tests.test_utils import print_color, print_warning, LOG_COLORS, update_file_hash  # noqa: E402
 
+RESULTS_CACHE_PATH = CONTENT_DIR + '/Tests/.pkg_dev_tasks_cache.json'
+RESULTS_CACHE_VERSION = 1
+# files pkg_dev_test_tasks.py copies into the package dir before running
+DEV_SETUP_FILES = ('demistomock.py', 'CommonServerPython.py', 'CommonServerUserPython.py', 'conftest.py')
+# a change in any of these changes the results of all the packages
+DEV_ENV_PATHS = [
+    'Scripts/CommonServerPython/CommonServerPython.py',
+    'Tests/demistomock/demistomock.py',
+    'Tests/scripts/dev_envs',
+    'Tests/scripts/pkg_dev_test_tasks.py',
+    'Tests/scripts/run_dev_tasks.sh',
+    'Tests/scripts/run_mypy.sh',
+    'Tests/scripts/pkg_dev_container_setup.sh',
+]
 
-def run_dev_task(pkg_dir: str, params: Optional[List[str]]) -> Tuple[subprocess.CompletedProcess, str]:
+
+def run_dev_task(pkg_dir: str, params: Optional[List[str]]) -> Tuple[subprocess.CompletedProcess, str, float]:
     args = [SCRIPT_DIR + '/pkg_dev_test_tasks.py', '-d', pkg_dir]
     if params:
         args.extend(params)
     cmd_line = " ".join(args)
     # color stderr in red and remove the warning about no config file from pylint
     cmd_line += r" 2> >(sed '/No config file found, using default configuration/d' | sed $'s,.*,\x1B[31m&\x1B[0m,'>&1)"
+    start = time.time()
     res = subprocess.run(cmd_line, text=True, capture_output=True, shell=True, executable='/bin/bash')
-    return res, pkg_dir
+    return res, pkg_dir, time.time() - start
+
+
+def get_dev_env_hash(params: Optional[List[str]]) -> str:
+    """Hash of CommonServerPython, the dev requirements, the dev tasks scripts and the dev tasks parameters"""
+    sha1 = hashlib.sha1(" ".join(params or []).encode('utf-8'))
+    for path in DEV_ENV_PATHS:
+        update_file_hash(sha1, os.path.join(CONTENT_DIR, path))
+    return sha1.hexdigest()
+
+
+def get_pkg_cache_key(pkg_dir: str, dev_env_hash: str) -> str:
+    sha1 = hashlib.sha1(dev_env_hash.encode('utf-8'))
+    update_file_hash(sha1, pkg_dir, ignored_files=DEV_SETUP_FILES)
+    return sha1.hexdigest()
+
+
+def load_results_cache() -> Dict[str, dict]:
+    """Load the results of previous runs: package dir to its last duration and the cache key of its last pass"""
+    if os.getenv('SKIP_RESULTS_CACHE') or not os.path.isfile(RESULTS_CACHE_PATH):
+        return {}
+    try:
+        with open(RESULTS_CACHE_PATH, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except ValueError:
+        print_warning('Ignoring the corrupted dev tasks results cache {}'.format(RESULTS_CACHE_PATH))
+        return {}
+    if cache.get('version') != RESULTS_CACHE_VERSION:
+        return {}
+    return cache.get('packages', {})
+
+
+def save_results_cache(results: Dict[str, dict]):
+    with open(RESULTS_CACHE_PATH, 'w') as cache_file:
+        json.dump({'version': RESULTS_CACHE_VERSION, 'packages': results}, cache_file, indent=1, sort_keys=True)
+
+
+def sort_by_duration(pkg_dirs: List[str], results: Dict[str, dict]) -> List[str]:
+    """Order the packages so the slowest start first (packages without a recorded duration are assumed slow)"""
+    return sorted(pkg_dirs, key=lambda pkg_dir: -results.get(pkg_dir, {}).get('duration', float('inf')))
 
 
 def should_run_pkg(pkg_dir: str) -> bool:
@@ -36,7 +94,7 @@ def should_run_pkg(pkg_dir: str) -> bool:
     return False
 
 
-def handle_run_res(res: Tuple[subprocess.CompletedProcess, str], fail_pkgs: list, good_pkgs: list):
+def handle_run_res(res: Tuple[subprocess.CompletedProcess, str, float], fail_pkgs: list, good_pkgs: list):
     if res[0].returncode != 0:
         fail_pkgs.append(res[1])
         print_color("============= {} =============".format(res[1]), LOG_COLORS.RED)
@@ -61,7 +119,9 @@ def main():
         print("Run pkg_dev_test_tasks.py in parallel. Accepts same parameters as pkg_dev_test_tasks.py.\n"
               "Additionally you can specify the following environment variables:\n"
               "DIFF_COMPARE: specify how to do a git compare. Leave empty to run on all.\n"
-              "MAX_WORKERS: max amount of workers to use for running "
+              "MAX_WORKERS: max amount of workers to use for running\n"
+              "SKIP_RESULTS_CACHE: run all the packages, even the ones which passed before and did not change since.\n"
+              "Pass --local to run pylint and pytest with the local python instead of in docker."
               )
         sys.exit(1)
     max_workers = int(os.getenv("MAX_WORKERS", "10"))
@@ -72,24 +132,45 @@ def main():
     for dir in pkg_dirs:
         if should_run_pkg(dir):
             pkgs_to_run.append(dir)
-    print("Starting parallel run for [{}] packages with [{}] max workers".format(len(pkgs_to_run), max_workers))
     params = sys.argv[1::]
     fail_pkgs = []
     good_pkgs = []
-    if len(pkgs_to_run) > 1:  # setup pipenv before hand to avoid conflics
-        get_dev_requirements(2.7)
-        get_dev_requirements(3.7)
-    # run CommonServer non parallel to avoid conflicts
-    # when we modify the file for mypy includes
-    if 'Scripts/CommonServerPython' in pkgs_to_run:
-        pkgs_to_run.remove('Scripts/CommonServerPython')
-        res = run_dev_task('Scripts/CommonServerPython', params)
+    results = load_results_cache()
+    dev_env_hash = get_dev_env_hash(params)
+    cache_keys = {pkg_dir: get_pkg_cache_key(pkg_dir, dev_env_hash) for pkg_dir in pkgs_to_run}
+    cached_pkgs = [pkg_dir for pkg_dir in pkgs_to_run
+                   if results.get(pkg_dir, {}).get('passed_key') == cache_keys[pkg_dir]]
+    for pkg_dir in cached_pkgs:
+        pkgs_to_run.remove(pkg_dir)
+        good_pkgs.append(pkg_dir)
+        print("============= {} (cached pass) =============".format(pkg_dir))
+    pkgs_to_run = sort_by_duration(pkgs_to_run, results)
+
+    def handle_and_record_run_res(res: Tuple[subprocess.CompletedProcess, str, float]):
         handle_run_res(res, fail_pkgs, good_pkgs)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures_submit = [executor.submit(run_dev_task, dir, params) for dir in pkgs_to_run]
-        for future in concurrent.futures.as_completed(futures_submit):
-            res = future.result()
-            handle_run_res(res, fail_pkgs, good_pkgs)
+        _, pkg_dir, duration = res
+        results[pkg_dir] = {'duration': round(duration, 1)}
+        if res[0].returncode == 0:
+            results[pkg_dir]['passed_key'] = cache_keys[pkg_dir]
+
+    print("Starting parallel run for [{}] packages ([{}] cached) with [{}] max workers".format(
+        len(pkgs_to_run), len(cached_pkgs), max_workers))
+    try:
+        if len(pkgs_to_run) > 1 and '--local' not in params and '-l' not in params:
+            # setup pipenv before hand to avoid conflics
+            get_dev_requirements(2.7)
+            get_dev_requirements(3.7)
+        # run CommonServer non parallel to avoid conflicts
+        # when we modify the file for mypy includes
+        if 'Scripts/CommonServerPython' in pkgs_to_run:
+            pkgs_to_run.remove('Scripts/CommonServerPython')
+            handle_and_record_run_res(run_dev_task('Scripts/CommonServerPython', params))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures_submit = [executor.submit(run_dev_task, dir, params) for dir in pkgs_to_run]
+            for future in concurrent.futures.as_completed(futures_submit):
+                handle_and_record_run_res(future.result())
+    finally:
+        save_results_cache(results)
     create_failed_unittests_file(fail_pkgs)
     if fail_pkgs:
         print_color("\n******* FAIL PKGS: *******", LOG_COLORS.RED)
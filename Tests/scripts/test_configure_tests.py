@@ -2,7 +2,7 @@ import os
 import re
 import unittest
 
-from Tests.scripts.configure_tests import get_modified_files, get_test_list
+from Tests.scripts.configure_tests import get_modified_files, get_test_list, DependencyIndex, enrich_for_changed_ids
 
 FILTER_CONF = "Tests/filter_file.txt"
 
@@ -174,5 +174,65 @@ A       Integrations/Active_Directory_Query/key.pem
         self.assertIn('Integrations/Active_Directory_Query/Active_Directory_Query.yml', files_list)
 
 
+class TestConfigureTests_DependencyIndex(unittest.TestCase):
+    ID_SET = {
+        'scripts': [
+            {'BaseScript': {'name': 'BaseScript', 'file_path': 'Scripts/BaseScript/BaseScript.yml'}},
+            {'WrapperScript': {'name': 'WrapperScript', 'file_path': 'Scripts/script-WrapperScript.yml',
+                               'script_executions': ['BaseScript'], 'tests': ['WrapperScript Test']}},
+            {'OldScript': {'name': 'OldScript', 'file_path': 'Scripts/script-OldScript.yml', 'toversion': '4.1.9',
+                           'script_executions': ['BaseScript'], 'tests': ['OldScript Test']}},
+            {'CommandScript': {'name': 'CommandScript', 'file_path': 'Scripts/script-CommandScript.yml',
+                               'depends_on': ['my-command'], 'command_to_integration': {'my-command': 'MyIntegration'},
+                               'tests': ['CommandScript Test']}},
+            {'DeprecatedScript': {'name': 'DeprecatedScript', 'file_path': 'Scripts/script-DeprecatedScript.yml',
+                                  'deprecated': True, 'script_executions': ['BaseScript'],
+                                  'tests': ['DeprecatedScript Test']}}
+        ],
+        'playbooks': [
+            {'Child': {'name': 'Child', 'implementing_scripts': ['WrapperScript'], 'tests': ['Child Test']}},
+            {'Parent': {'name': 'Parent', 'implementing_playbooks': ['Child'], 'tests': ['Parent Test']}},
+            {'OldChild': {'name': 'OldChild', 'implementing_scripts': ['OldScript']}},
+            {'OldChild': {'name': 'OldChild', 'toversion': '4.1.9', 'implementing_scripts': ['OldScript']}},
+            {'OldParent': {'name': 'OldParent', 'toversion': '4.1.9', 'implementing_playbooks': ['OldChild'],
+                           'tests': ['OldParent Test']}},
+            {'OtherIntegration': {'name': 'OtherIntegration', 'command_to_integration': {'my-command': 'Other'},
+                                  'tests': ['OtherIntegration Test']}},
+            {'AnyIntegration': {'name': 'AnyIntegration', 'command_to_integration': {'my-command': ''}}}
+        ]
+    }
+
+    def collect(self, changed_entities):
+        updated_script_names, updated_playbook_names = set(), set()
+        catched_scripts, catched_playbooks, tests_set = set(), set(), set()
+        enrich_for_changed_ids(DependencyIndex(self.ID_SET), changed_entities, set(), set(), updated_script_names,
+                               updated_playbook_names, catched_scripts, catched_playbooks, tests_set)
+        return updated_script_names, updated_playbook_names, tests_set
+
+    def test_changed_script(self):
+        scripts, playbooks, tests = self.collect([('scripts', 'BaseScript', ('0.0.0', '99.99.99'), None)])
+
+        self.assertEqual(scripts, {'WrapperScript'})
+        self.assertEqual(playbooks, {'Child', 'Parent'})
+        self.assertEqual(tests, {'WrapperScript Test', 'Child Test', 'Parent Test'})
+
+    def test_changed_old_script(self):
+        scripts, playbooks, tests = self.collect([('scripts', 'BaseScript', ('0.0.0', '4.1.0'), None)])
+
+        self.assertEqual(scripts, {'WrapperScript', 'OldScript'})
+        self.assertIn('OldScript Test', tests)
+        # OldParent only uses the 4.1.9 version of OldChild
+        self.assertIn('OldChild', playbooks)
+        self.assertIn('OldParent Test', tests)
+
+    def test_changed_integration(self):
+        scripts, playbooks, tests = self.collect([('integrations', 'MyIntegration', ('0.0.0', '99.99.99'),
+                                                   ['my-command'])])
+
+        self.assertEqual(scripts, {'CommandScript'})
+        self.assertEqual(playbooks, {'AnyIntegration'})
+        self.assertEqual(tests, {'CommandScript Test'})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,4 @@
 #!/usr/bin/env python
-import itertools
 import re
 import os
 import glob
@@ -18,9 +17,14 @@ sys.path.append(CONTENT_DIR)
 
 from Tests.scripts.constants import *  # noqa: E402
 from Tests.test_utils import get_yaml, get_to_version, get_from_version, collect_ids, get_script_or_integration_id, \
-    LOG_COLORS, print_color, run_command, print_error, print_warning  # noqa: E402
+    LOG_COLORS, print_color, run_command, print_error, print_warning, get_file_hash  # noqa: E402
 
 
+ID_SET_PATH = './Tests/id_set.json'
+# per content item hash and id_set data, used by the incremental re-creation of the id_set
+ID_SET_CACHE_PATH = './Tests/.id_set_cache.json'
+ID_SET_CACHE_VERSION = 1
+
 CHECKED_TYPES_REGEXES = (
     # Integrations
     INTEGRATION_REGEX,
@@ -123,9 +127,10 @@ def get_commmands_from_playbook(data_dict):
     return command_to_integration
 
 
-def get_integration_data(file_path):
+def get_integration_data(file_path, data_dictionary=None):
     integration_data = OrderedDict()
-    data_dictionary = get_yaml(file_path)
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
     id = data_dictionary.get('commonfields', {}).get('id', '-')
     name = data_dictionary.get('name', '-')
 
@@ -159,9 +164,10 @@ def get_integration_data(file_path):
     return {id: integration_data}
 
 
-def get_playbook_data(file_path):
+def get_playbook_data(file_path, data_dictionary=None):
     playbook_data = OrderedDict()
-    data_dictionary = get_yaml(file_path)
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
     id = data_dictionary.get('id', '-')
     name = data_dictionary.get('name', '-')
 
@@ -193,9 +199,10 @@ def get_playbook_data(file_path):
     return {id: playbook_data}
 
 
-def get_script_data(file_path, script_code=None):
+def get_script_data(file_path, script_code=None, data_dictionary=None):
     script_data = OrderedDict()
-    data_dictionary = get_yaml(file_path)
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
     id = data_dictionary.get('commonfields', {}).get('id', '-')
     if script_code is None:
         script_code = data_dictionary.get('script', '')
@@ -446,34 +453,111 @@ def get_test_playbooks_paths():
     return test_playbook_files
 
 
-def re_create_id_set():
+def get_content_items():
+    """
+    All the content items of the id_set, in the order they are added to the id_set
+
+    Returns:
+        list -- (content type, path) pairs
+    """
+    return [('integration', path) for path in get_integrations_paths()] + \
+        [('playbook', path) for path in get_playbooks_paths()] + \
+        [('script', path) for path in get_scripts_paths()] + \
+        [('test_playbook', path) for path in get_test_playbooks_paths()]
+
+
+CONTENT_ITEM_PROCESSORS = {
+    'integration': process_integration,
+    'playbook': process_playbook,
+    'script': process_script,
+    'test_playbook': process_test_playbook_path,
+}
+
+
+def process_content_item(item):
+    """
+    Process a content item of any type, unless it did not change since it was cached
+
+    Arguments:
+        item {tuple} -- content type, path and cached hash (None if not cached)
+
+    Returns:
+        tuple -- content type, path, hash and the process function result (None if the cached hash matches)
+    """
+    content_type, file_path, cached_hash = item
+    file_hash = get_file_hash(file_path)
+    if file_hash == cached_hash:
+        return content_type, file_path, file_hash, None
+
+    return content_type, file_path, file_hash, CONTENT_ITEM_PROCESSORS[content_type](file_path)
+
+
+def load_id_set_cache():
+    if not os.path.isfile(ID_SET_CACHE_PATH):
+        return {}
+    try:
+        with open(ID_SET_CACHE_PATH, 'r') as cache_file:
+            cache = json.load(cache_file, object_pairs_hook=OrderedDict)
+    except ValueError:
+        print_warning('Ignoring the corrupted id_set cache {}'.format(ID_SET_CACHE_PATH))
+        return {}
+    if cache.get('version') != ID_SET_CACHE_VERSION:
+        return {}
+    return cache.get('files', {})
+
+
+def save_id_set_cache(files_cache):
+    with open(ID_SET_CACHE_PATH, 'w') as cache_file:
+        json.dump({'version': ID_SET_CACHE_VERSION, 'files': files_cache}, cache_file)
+
+
+def re_create_id_set(incremental=False):
+    """
+    Re-create the id_set from all the content items, in a single pool pass over all the content types.
+    The hash and the id_set data of every content item are saved in the id_set cache. In incremental mode, only
+    content items which changed since the cache was saved are parsed, and the output is the same as a full re-creation.
+
+    Arguments:
+        incremental {bool} -- reuse the cached data of content items which did not change
+    """
     start_time = time.time()
     scripts_list = []
     playbooks_list = []
     integration_list = []
     testplaybooks_list = []
 
+    files_cache = load_id_set_cache() if incremental and os.path.isfile(ID_SET_PATH) else {}
+    new_files_cache = OrderedDict()
+    parsed_count = 0
+
     pool = Pool(processes=cpu_count() * 2)
 
     print_color("Starting the creation of the id_set", LOG_COLORS.GREEN)
-    print_color("Starting iterating over Integrations", LOG_COLORS.GREEN)
-    for arr in pool.map(process_integration, get_integrations_paths()):
-        integration_list.extend(arr)
-
-    print_color("Starting iterating over Playbooks", LOG_COLORS.GREEN)
-    for arr in pool.map(process_playbook, get_playbooks_paths()):
-        playbooks_list.extend(arr)
-
-    print_color("Starting iterating over Scripts", LOG_COLORS.GREEN)
-    for arr in pool.map(process_script, get_scripts_paths()):
-        scripts_list.extend(arr)
+    items = [(content_type, path, files_cache.get(path, {}).get('hash') if
+              files_cache.get(path, {}).get('type') == content_type else None)
+             for content_type, path in get_content_items()]
+    # imap keeps the order of the items, so the id_set is the same as when processing each type separately
+    for content_type, file_path, file_hash, result in pool.imap(process_content_item, items, chunksize=8):
+        if result is None:
+            result = files_cache[file_path]['result']
+        else:
+            parsed_count += 1
+        new_files_cache[file_path] = {'type': content_type, 'hash': file_hash, 'result': result}
+
+        if content_type == 'integration':
+            integration_list.extend(result)
+        elif content_type == 'playbook':
+            playbooks_list.extend(result)
+        elif content_type == 'script':
+            scripts_list.extend(result)
+        else:
+            if result[0]:
+                testplaybooks_list.append(result[0])
+            if result[1]:
+                scripts_list.append(result[1])
 
-    print_color("Starting iterating over TestPlaybooks", LOG_COLORS.GREEN)
-    for pair in pool.map(process_test_playbook_path, get_test_playbooks_paths()):
-        if pair[0]:
-            testplaybooks_list.append(pair[0])
-        if pair[1]:
-            scripts_list.append(pair[1])
+    pool.close()
+    pool.join()
 
     new_ids_dict = OrderedDict()
     # we sort each time the whole set in case someone manually changed something
@@ -483,10 +567,12 @@ def re_create_id_set():
     new_ids_dict['integrations'] = sort(integration_list)
     new_ids_dict['TestPlaybooks'] = sort(testplaybooks_list)
 
-    with open('./Tests/id_set.json', 'w') as id_set_file:
+    with open(ID_SET_PATH, 'w') as id_set_file:
         json.dump(new_ids_dict, id_set_file, indent=4)
+    save_id_set_cache(new_files_cache)
     exec_time = time.time() - start_time
-    print_color("Finished the creation of the id_set. Total time: {} seconds".format(exec_time), LOG_COLORS.GREEN)
+    print_color("Finished the creation of the id_set. Parsed {} of {} content items. Total time: {} seconds".format(
+        parsed_count, len(items), exec_time), LOG_COLORS.GREEN)
 
     duplicates = find_duplicates(new_ids_dict)
     if any(duplicates):
@@ -494,70 +580,104 @@ def re_create_id_set():
 
 
 def find_duplicates(id_set):
-    scripts = id_set['scripts']
-    script_ids = set(list(script.keys())[0] for script in scripts)
+    scripts_list = get_duplicate_ids(id_set['scripts'])
+    integration_list = get_duplicate_ids(id_set['integrations'])
+    playbooks_list = get_duplicate_ids(id_set['playbooks'])
+    test_playbooks_list = get_duplicate_ids(id_set['TestPlaybooks'])
 
-    scripts_list = []
-    for script_id in script_ids:
-        if has_duplicate(scripts, script_id):
-            scripts_list.append(script_id)
+    return scripts_list, integration_list, playbooks_list, test_playbooks_list
 
-    integrations = id_set['integrations']
-    integration_ids = set(list(integration.keys())[0] for integration in integrations)
 
-    integration_list = []
-    for integration_id in integration_ids:
-        if has_duplicate(integrations, integration_id):
-            integration_list.append(integration_id)
+def group_by_id(id_set):
+    """
+    Group the objects of an id_set section by their ID
 
-    playbooks = id_set['playbooks']
-    playbook_ids = set(list(playbook.keys())[0] for playbook in playbooks)
+    Arguments:
+        id_set {list} -- id_set section, list of {id: object data} dicts
 
-    playbooks_list = []
-    for playbook_id in playbook_ids:
-        if has_duplicate(playbooks, playbook_id):
-            integration_list.append(playbook_id)
+    Returns:
+        OrderedDict -- ID to the list of the data of the objects with this ID
+    """
+    groups = OrderedDict()
+    for obj in id_set:
+        for obj_id, obj_data in obj.items():
+            groups.setdefault(obj_id, []).append(obj_data)
 
-    test_playbooks = id_set['TestPlaybooks']
-    test_playbook_ids = set(list(test_playbook.keys())[0] for test_playbook in test_playbooks)
+    return groups
 
-    test_playbooks_list = []
-    for test_playbook_id in test_playbook_ids:
-        if has_duplicate(test_playbooks, test_playbook_id):
-            test_playbooks_list.append(test_playbook_id)
 
-    return scripts_list, integration_list, playbooks_list, test_playbooks_list
+def get_duplicate_ids(id_set):
+    """
+    Find the IDs of an id_set section which have objects with overlapping versions
+
+    Arguments:
+        id_set {list} -- id_set section, list of {id: object data} dicts
+
+    Returns:
+        list -- the duplicate IDs
+    """
+    return [obj_id for obj_id, objects in group_by_id(id_set).items()
+            if len(objects) > 1 and has_version_overlap(objects)]
 
 
 def has_duplicate(id_set, id_to_check):
-    duplicates = [duplicate for duplicate in id_set if duplicate.get(id_to_check)]
+    duplicates = [duplicate[id_to_check] for duplicate in id_set if duplicate.get(id_to_check)]
 
     if len(duplicates) < 2:
         return False
 
-    for dup1, dup2 in itertools.combinations(duplicates, 2):
-        dict1 = list(dup1.values())[0]
-        dict2 = list(dup2.values())[0]
-        dict1_from_version = LooseVersion(dict1.get('fromversion', '0.0.0'))
-        dict2_from_version = LooseVersion(dict2.get('fromversion', '0.0.0'))
-        dict1_to_version = LooseVersion(dict1.get('toversion', '99.99.99'))
-        dict2_to_version = LooseVersion(dict2.get('toversion', '99.99.99'))
-
-        if dict1['name'] != dict2['name']:
-            print_warning('The following objects has the same ID but different names: '
-                          '"{}", "{}".'.format(dict1['name'], dict2['name']))
-
-        # A: 3.0.0 - 3.6.0
-        # B: 3.5.0 - 4.5.0
-        # C: 3.5.2 - 3.5.4
-        # D: 4.5.0 - 99.99.99
-        if any([
-                dict1_from_version <= dict2_from_version < dict1_to_version,  # will catch (B, C), (A, B), (A, C)
-                dict1_from_version < dict2_to_version <= dict1_to_version,  # will catch (B, C), (A, C)
-                dict2_from_version <= dict1_from_version < dict2_to_version,  # will catch (C, B), (B, A), (C, A)
-                dict2_from_version < dict1_to_version <= dict2_to_version,  # will catch (C, B), (C, A)
-        ]):
+    return has_version_overlap(duplicates)
+
+
+def get_version_range(obj_data):
+    return LooseVersion(obj_data.get('fromversion', '0.0.0')), LooseVersion(obj_data.get('toversion', '99.99.99'))
+
+
+def is_version_range_overlap(range1, range2):
+    from_version1, to_version1 = range1
+    from_version2, to_version2 = range2
+    # A: 3.0.0 - 3.6.0
+    # B: 3.5.0 - 4.5.0
+    # C: 3.5.2 - 3.5.4
+    # D: 4.5.0 - 99.99.99
+    return any([
+        from_version1 <= from_version2 < to_version1,  # will catch (B, C), (A, B), (A, C)
+        from_version1 < to_version2 <= to_version1,  # will catch (B, C), (A, C)
+        from_version2 <= from_version1 < to_version2,  # will catch (C, B), (B, A), (C, A)
+        from_version2 < to_version1 <= to_version2,  # will catch (C, B), (C, A)
+    ])
+
+
+def has_version_overlap(objects):
+    """
+    Check if the version ranges of objects with the same ID overlap, using a sort and sweep over the ranges.
+
+    Arguments:
+        objects {list} -- the data of the objects with the same ID
+
+    Returns:
+        bool -- True if any two of the objects have overlapping versions
+    """
+    names = set(obj_data['name'] for obj_data in objects)
+    if len(names) > 1:
+        print_warning('The following objects has the same ID but different names: '
+                      '{}.'.format(', '.join('"{}"'.format(name) for name in sorted(names))))
+
+    ranges = [get_version_range(obj_data) for obj_data in objects]
+    # when sorted by fromversion, a range overlaps one of the ranges before it
+    # only if it starts before the maximal toversion seen so far
+    max_to_version = None
+    for from_version, to_version in sorted(r for r in ranges if r[0] < r[1]):
+        if max_to_version is not None and from_version < max_to_version:
             return True
+        if max_to_version is None or to_version > max_to_version:
+            max_to_version = to_version
+
+    # empty or reversed ranges (fromversion >= toversion) are rare, check them against all the other ranges
+    for i, version_range in enumerate(ranges):
+        if not version_range[0] < version_range[1]:
+            if any(is_version_range_overlap(version_range, other) for j, other in enumerate(ranges) if i != j):
+                return True
 
     return False
 
@@ -681,11 +801,14 @@ def update_id_set():
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Utility CircleCI usage')
     parser.add_argument('-r', '--reCreate', action='store_true', help='Is re-create id_set or update it')
+    parser.add_argument('-i', '--incremental', action='store_true',
+                        help='Re-create the id_set, parsing only the content items which changed since the last '
+                             're-creation')
     options = parser.parse_args()
 
-    if options.reCreate:
+    if options.reCreate or options.incremental:
         print("Re creating the id_set.json")
-        re_create_id_set()
+        re_create_id_set(incremental=options.incremental)
 
     else:
         if os.path.isfile('./Tests/id_set.json'):
@@ -14,12 +14,19 @@ from __future__ import print_function
 import os
 import re
 import sys
+import json
 import glob
 import logging
 import argparse
 import subprocess
+from multiprocessing import Pool, cpu_count
 import yaml
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 CONTENT_DIR = os.path.abspath(SCRIPT_DIR + '/../..')
 sys.path.append(CONTENT_DIR)
@@ -37,7 +44,54 @@ from Tests.scripts.hook_validations.incident_field import IncidentFieldValidator
 from Tests.scripts.hook_validations.pack_unique_files import PackUniqueFilesValidator  # noqa: E402
 from Tests.scripts.hook_validations.docker import DockerImageValidator  # noqa: E402
 from Tests.test_utils import checked_type, run_command, print_error, print_warning, print_color, LOG_COLORS, \
-    get_yaml, filter_packagify_changes, collect_ids, str2bool, is_file_path_in_pack, get_pack_name  # noqa: E402
+    get_yaml, filter_packagify_changes, collect_ids, str2bool, is_file_path_in_pack, get_pack_name, \
+    ContentRepository, get_file_hash  # noqa: E402
+
+VALIDATION_CACHE_PATH = './Tests/.validate_files_cache.json'
+VALIDATION_CACHE_VERSION = 2
+
+
+def validate_file_scheme(file_path):
+    """Validate the scheme of a single file, capturing the output so it can be printed in order.
+
+    Args:
+        file_path (str): the path of the file to validate.
+
+    Returns:
+        (file_path, is_valid, output). Tuple of the file path, whether the scheme is valid and the validation output.
+    """
+    stdout = sys.stdout
+    sys.stdout = output = StringIO()
+    try:
+        is_valid = StructureValidator(file_path).is_valid_scheme()
+    finally:
+        sys.stdout = stdout
+
+    return file_path, is_valid, output.getvalue()
+
+
+def load_validation_cache():
+    """Load the keys of the files which were found valid in previous runs.
+
+    Returns:
+        set. Keys of the (file path, file content hash, schemas hash) of valid files.
+    """
+    if not os.path.isfile(VALIDATION_CACHE_PATH):
+        return set()
+    try:
+        with open(VALIDATION_CACHE_PATH, 'r') as cache_file:
+            cache = json.load(cache_file)
+    except ValueError:
+        print_warning('Ignoring the corrupted validation cache {}'.format(VALIDATION_CACHE_PATH))
+        return set()
+    if cache.get('version') != VALIDATION_CACHE_VERSION:
+        return set()
+    return set(cache.get('valid_files', []))
+
+
+def save_validation_cache(valid_files):
+    with open(VALIDATION_CACHE_PATH, 'w') as cache_file:
+        json.dump({'version': VALIDATION_CACHE_VERSION, 'valid_files': sorted(valid_files)}, cache_file)
 
 
 class FilesValidator(object):
@@ -51,6 +105,7 @@ class FilesValidator(object):
         print_ignored_files (bool): should print ignored files when iterating over changed files.
         conf_json_validator (ConfJsonValidator): object for validating the conf.json file.
         id_set_validator (IDSetValidator): object for validating the id_set.json file(Created in Circle only).
+        content_repo (ContentRepository): the content files loaded during the run, shared by all the validators.
     """
 
     def __init__(self, is_circle=False, print_ignored_files=False):
@@ -58,12 +113,13 @@ class FilesValidator(object):
         self.is_circle = is_circle
         self.print_ignored_files = print_ignored_files
 
+        self.content_repo = ContentRepository()
         self.conf_json_validator = ConfJsonValidator()
-        self.id_set_validator = IDSetValidator(is_circle)
+        self.id_set_validator = IDSetValidator(is_circle, content_repo=self.content_repo)
 
     @staticmethod
-    def is_py_script_or_integration(file_path):
-        file_yml = get_yaml(file_path)
+    def is_py_script_or_integration(file_path, content_repo=None):
+        file_yml = content_repo.get_yaml(file_path) if content_repo else get_yaml(file_path)
 
         if checked_type(file_path, [INTEGRATION_REGEX, INTEGRATION_YML_REGEX, BETA_INTEGRATION_REGEX,
                                     BETA_INTEGRATION_YML_REGEX]):
@@ -220,7 +276,7 @@ class FilesValidator(object):
             if isinstance(file_path, tuple):
                 old_file_path, file_path = file_path
 
-            is_python_file = FilesValidator.is_py_script_or_integration(file_path)
+            is_python_file = FilesValidator.is_py_script_or_integration(file_path, self.content_repo)
 
             print('Validating {}'.format(file_path))
             if not checked_type(file_path):
@@ -228,7 +284,8 @@ class FilesValidator(object):
                 continue
 
             structure_validator = StructureValidator(file_path, is_added_file=not (False or is_backward_check),
-                                                     is_renamed=old_file_path is not None)
+                                                     is_renamed=old_file_path is not None,
+                                                     content_repo=self.content_repo)
             if not structure_validator.is_file_valid():
                 self._is_valid = False
 
@@ -238,41 +295,45 @@ class FilesValidator(object):
             elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
                     re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
 
-                image_validator = ImageValidator(file_path)
+                image_validator = ImageValidator(file_path, content_repo=self.content_repo)
                 if not image_validator.is_valid():
                     self._is_valid = False
 
-                description_validator = DescriptionValidator(file_path)
+                description_validator = DescriptionValidator(file_path, content_repo=self.content_repo)
                 if not description_validator.is_valid():
                     self._is_valid = False
 
                 integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path,
-                                                             old_git_branch=old_branch)
+                                                             old_git_branch=old_branch, content_repo=self.content_repo)
                 if is_backward_check and not integration_validator.is_backward_compatible():
                     self._is_valid = False
                 if not integration_validator.is_valid_integration():
                     self._is_valid = False
 
                 if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True)
+                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True,
+                                                                  content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
             elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
                     re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
-                description_validator = DescriptionValidator(file_path)
+                description_validator = DescriptionValidator(file_path, content_repo=self.content_repo)
                 if not description_validator.is_valid_beta_description():
                     self._is_valid = False
-                integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path)
+                integration_validator = IntegrationValidator(file_path, old_file_path=old_file_path,
+                                                             content_repo=self.content_repo)
                 if not integration_validator.is_valid_beta_integration():
                     self._is_valid = False
                 if is_python_file:
-                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True)
+                    docker_image_validator = DockerImageValidator(file_path, is_modified_file=True, is_integration=True,
+                                                                  content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
             elif re.match(SCRIPT_REGEX, file_path, re.IGNORECASE):
-                script_validator = ScriptValidator(file_path, old_file_path=old_file_path, old_git_branch=old_branch)
+                script_validator = ScriptValidator(file_path, old_file_path=old_file_path, old_git_branch=old_branch,
+                                                   content_repo=self.content_repo)
                 if is_backward_check and not script_validator.is_backward_compatible():
                     self._is_valid = False
                 if not script_validator.is_valid_script():
@@ -280,7 +341,7 @@ class FilesValidator(object):
 
                 if is_python_file:
                     docker_image_validator = DockerImageValidator(file_path, is_modified_file=True,
-                                                                  is_integration=False)
+                                                                  is_integration=False, content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
@@ -289,24 +350,26 @@ class FilesValidator(object):
                     re.match(SCRIPT_JS_REGEX, file_path, re.IGNORECASE):
 
                 yml_path, _ = get_script_package_data(os.path.dirname(file_path))
-                script_validator = ScriptValidator(yml_path, old_file_path=old_file_path, old_git_branch=old_branch)
+                script_validator = ScriptValidator(yml_path, old_file_path=old_file_path, old_git_branch=old_branch,
+                                                   content_repo=self.content_repo)
                 if is_backward_check and not script_validator.is_backward_compatible():
                     self._is_valid = False
 
                 if is_python_file:
                     docker_image_validator = DockerImageValidator(file_path, is_modified_file=True,
-                                                                  is_integration=False)
+                                                                  is_integration=False, content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
             elif re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
-                image_validator = ImageValidator(file_path)
+                image_validator = ImageValidator(file_path, content_repo=self.content_repo)
                 if not image_validator.is_valid():
                     self._is_valid = False
 
             elif re.match(INCIDENT_FIELD_REGEX, file_path, re.IGNORECASE):
                 incident_field_validator = IncidentFieldValidator(file_path, old_file_path=old_file_path,
-                                                                  old_git_branch=old_branch)
+                                                                  old_git_branch=old_branch,
+                                                                  content_repo=self.content_repo)
                 if not incident_field_validator.is_valid():
                     self._is_valid = False
                 if is_backward_check and not incident_field_validator.is_backward_compatible():
@@ -321,10 +384,10 @@ class FilesValidator(object):
             added_files (set): A set of the modified files in the current branch.
         """
         for file_path in added_files:
-            is_python_file = FilesValidator.is_py_script_or_integration(file_path)
+            is_python_file = FilesValidator.is_py_script_or_integration(file_path, self.content_repo)
             print('Validating {}'.format(file_path))
 
-            structure_validator = StructureValidator(file_path, is_added_file=True)
+            structure_validator = StructureValidator(file_path, is_added_file=True, content_repo=self.content_repo)
             if not structure_validator.is_file_valid():
                 self._is_valid = False
 
@@ -335,28 +398,29 @@ class FilesValidator(object):
                 self._is_valid = False
 
             if re.match(TEST_PLAYBOOK_REGEX, file_path, re.IGNORECASE):
-                if not self.conf_json_validator.is_test_in_conf_json(collect_ids(file_path)):
+                test_playbook_id = collect_ids(file_path, data_dictionary=self.content_repo.get_yaml(file_path))
+                if not self.conf_json_validator.is_test_in_conf_json(test_playbook_id):
                     self._is_valid = False
 
             elif re.match(INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
                     re.match(INTEGRATION_YML_REGEX, file_path, re.IGNORECASE) or \
                     re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
 
-                image_validator = ImageValidator(file_path)
+                image_validator = ImageValidator(file_path, content_repo=self.content_repo)
                 if not image_validator.is_valid():
                     self._is_valid = False
 
-                description_validator = DescriptionValidator(file_path)
+                description_validator = DescriptionValidator(file_path, content_repo=self.content_repo)
                 if not description_validator.is_valid():
                     self._is_valid = False
 
-                integration_validator = IntegrationValidator(file_path)
+                integration_validator = IntegrationValidator(file_path, content_repo=self.content_repo)
                 if not integration_validator.is_valid_integration():
                     self._is_valid = False
 
                 if is_python_file:
                     docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
-                                                                  is_integration=True)
+                                                                  is_integration=True, content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
@@ -366,33 +430,33 @@ class FilesValidator(object):
 
                 if is_python_file:
                     docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
-                                                                  is_integration=False)
+                                                                  is_integration=False, content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
             elif re.match(BETA_INTEGRATION_REGEX, file_path, re.IGNORECASE) or \
                     re.match(BETA_INTEGRATION_YML_REGEX, file_path, re.IGNORECASE):
-                description_validator = DescriptionValidator(file_path)
+                description_validator = DescriptionValidator(file_path, content_repo=self.content_repo)
                 if not description_validator.is_valid_beta_description():
                     self._is_valid = False
 
-                integration_validator = IntegrationValidator(file_path)
+                integration_validator = IntegrationValidator(file_path, content_repo=self.content_repo)
                 if not integration_validator.is_valid_beta_integration(is_new=True):
                     self._is_valid = False
 
                 if is_python_file:
                     docker_image_validator = DockerImageValidator(file_path, is_modified_file=False,
-                                                                  is_integration=True)
+                                                                  is_integration=True, content_repo=self.content_repo)
                     if not docker_image_validator.is_docker_image_valid():
                         self._is_valid = False
 
             elif re.match(IMAGE_REGEX, file_path, re.IGNORECASE):
-                image_validator = ImageValidator(file_path)
+                image_validator = ImageValidator(file_path, content_repo=self.content_repo)
                 if not image_validator.is_valid():
                     self._is_valid = False
 
             elif re.match(INCIDENT_FIELD_REGEX, file_path, re.IGNORECASE):
-                incident_field_validator = IncidentFieldValidator(file_path)
+                incident_field_validator = IncidentFieldValidator(file_path, content_repo=self.content_repo)
                 if not incident_field_validator.is_valid():
                     self._is_valid = False
 
@@ -404,7 +468,7 @@ class FilesValidator(object):
         """
         invalid_files = []
         for f in old_format_files:
-            yaml_data = get_yaml(f)
+            yaml_data = self.content_repo.get_yaml(f)
             if 'toversion' not in yaml_data:  # we only fail on old format if no toversion (meaning it is latest)
                 invalid_files.append(f)
         if invalid_files:
@@ -444,33 +508,79 @@ class FilesValidator(object):
                 print_error(pack_errors)
                 self._is_valid = False
 
-    def validate_all_files(self):
-        """Validate all files in the repo are in the right format."""
+    @staticmethod
+    def get_all_files_to_validate():
+        """Walk the content directories and list all the files to validate, in validation order.
+
+        Returns:
+            list. Tuples of (message, file_path), file_path is None for directory messages.
+        """
+        files_to_validate = []
         for regex in CHECKED_TYPES_REGEXES:
             splitted_regex = regex.split('.*')
             directory = splitted_regex[0]
             for root, dirs, files in os.walk(directory):
                 if root not in DIR_LIST:  # Skipping in case we entered a package
                     continue
-                print_color('Validating {} directory:'.format(directory), LOG_COLORS.GREEN)
+                files_to_validate.append(('Validating {} directory:'.format(directory), None))
                 for file_name in files:
                     file_path = os.path.join(root, file_name)
                     # skipping hidden files
                     if file_name.startswith('.'):
                         continue
 
-                    print('Validating ' + file_name)
-                    structure_validator = StructureValidator(file_path)
-                    if not structure_validator.is_valid_scheme():
-                        self._is_valid = False
+                    files_to_validate.append(('Validating ' + file_name, file_path))
 
                 if root in PACKAGE_SUPPORTING_DIRECTORIES:
                     for inner_dir in dirs:
                         file_path = glob.glob(os.path.join(root, inner_dir, '*.yml'))[0]
-                        print('Validating ' + file_path)
-                        structure_validator = StructureValidator(file_path)
-                        if not structure_validator.is_valid_scheme():
-                            self._is_valid = False
+                        files_to_validate.append(('Validating ' + file_path, file_path))
+
+        return files_to_validate
+
+    def validate_all_files(self, processes=None):
+        """Validate all files in the repo are in the right format.
+
+        The files are validated across a process pool and the output is printed in the walking order. Out of circle,
+        files which were found valid in a previous run and did not change since (nor did the schemas) are skipped.
+
+        Args:
+            processes (int): number of worker processes, defaults to the number of cpus.
+        """
+        files_to_validate = self.get_all_files_to_validate()
+        file_paths = sorted(set(file_path for _, file_path in files_to_validate if file_path))
+
+        valid_files_cache = set() if self.is_circle else load_validation_cache()
+        schemas_hash = get_file_hash(StructureValidator.SCHEMAS_PATH)
+        # the schema of a file depends on its path, so a file moved to another content dir is validated again
+        file_keys = {file_path: '{}:{}:{}'.format(file_path, get_file_hash(file_path), schemas_hash)
+                     for file_path in file_paths}
+        files_to_check = [file_path for file_path in file_paths if file_keys[file_path] not in valid_files_cache]
+
+        pool = Pool(processes=processes or cpu_count())
+        try:
+            results = {file_path: (is_valid, output) for file_path, is_valid, output in
+                       pool.imap(validate_file_scheme, files_to_check, chunksize=8)}
+        finally:
+            pool.close()
+            pool.join()
+
+        for message, file_path in files_to_validate:
+            if file_path is None:
+                print_color(message, LOG_COLORS.GREEN)
+                continue
+
+            print(message)
+            is_valid, output = results.get(file_path, (True, ''))
+            if output:
+                print(output, end='')
+            if not is_valid:
+                self._is_valid = False
+
+        if not self.is_circle:
+            valid_files = set(file_keys[file_path] for file_path in file_paths
+                              if results.get(file_path, (True, ''))[0])
+            save_validation_cache(valid_files)
 
     def is_valid_structure(self, branch_name, is_backward_check=True, prev_ver=None):
         """Check if the structure is valid for the case we are in, master - all files, branch - changed files.
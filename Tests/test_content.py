@@ -6,6 +6,7 @@ import requests
 import subprocess
 import urllib3
 from time import sleep
+from multiprocessing.pool import ThreadPool
 
 import demisto_client.demisto_api
 from slackclient import SlackClient
@@ -50,6 +51,9 @@ def options_handler():
                              'dmst_content_nightly_memory_data', default=False)
     parser.add_argument('-d', '--serverVersion', help='Which server version to run the '
                                                       'tests on(Valid only when using AMI)', default="NonAMI")
+    parser.add_argument('-w', '--workers', type=int, default=1,
+                        help='How many mock-disabled tests to run concurrently. Tests sharing an integration '
+                             'never run at the same time')
 
     options = parser.parse_args()
 
@@ -407,6 +411,80 @@ def organize_tests(tests, unmockable_integrations, skipped_integrations_conf, ni
     return mock_tests, mockless_tests
 
 
+def group_tests_by_integration(tests):
+    """Splits the tests into groups that can run concurrently.
+
+    Tests that share an integration, directly or through other tests, end up in the same group so their
+    instances are never configured at the same time. Each group keeps the original order of its tests and
+    the largest groups come first, so they start as early as possible.
+
+    Args:
+        tests: list of the tests from conf.json.
+
+    Returns:
+        list. Lists of tests.
+    """
+    # union-find over the integration names, each test is joined with the first integration it uses
+    parents = {}
+
+    def find(name):
+        while parents.setdefault(name, name) != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+        return name
+
+    test_roots = []
+    for index, test in enumerate(tests):
+        integrations_conf = test.get('integrations', [])
+        if not isinstance(integrations_conf, list):
+            integrations_conf = [integrations_conf, ]
+
+        if not integrations_conf:
+            test_roots.append(('test', index))
+            continue
+
+        root = find(('integration', integrations_conf[0]))
+        for integration in integrations_conf[1:]:
+            parents[find(('integration', integration))] = root
+        test_roots.append(root)
+
+    groups = {}
+    group_order = []
+    for test, root in zip(tests, test_roots):
+        root = find(root)
+        if root not in groups:
+            groups[root] = []
+            group_order.append(root)
+        groups[root].append(test)
+
+    return sorted((groups[root] for root in group_order), key=len, reverse=True)
+
+
+def run_tests_concurrently(tests, run_test_func, workers=1):
+    """Runs run_test_func on every test, running up to workers groups of group_tests_by_integration at a time.
+
+    Args:
+        tests: list of the tests from conf.json.
+        run_test_func: function that runs a single test.
+        workers: how many tests to run at the same time, 1 runs the tests one after the other in their order.
+    """
+    if workers <= 1:
+        for t in tests:
+            run_test_func(t)
+        return
+
+    def run_group(group):
+        for t in group:
+            run_test_func(t)
+
+    pool = ThreadPool(processes=workers)
+    try:
+        pool.map(run_group, group_tests_by_integration(tests), chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
 def run_test_scenario(t, proxy, default_test_timeout, skipped_tests_conf, nightly_integrations,
                       skipped_integrations_conf, skipped_integration, is_nightly, run_all_tests, is_filter_configured,
                       filtered_tests, skipped_tests, secret_params, failed_playbooks,
@@ -497,6 +575,7 @@ def execute_testing(server, server_ip, server_version, server_numeric_version, i
     secret_conf_path = options.secret
     is_nightly = options.nightly
     is_memory_check = options.memCheck
+    workers = options.workers
     slack = options.slack
     circle_ci = options.circleci
     build_number = options.buildNumber
@@ -569,7 +648,9 @@ def execute_testing(server, server_ip, server_version, server_numeric_version, i
             print_error('Request to reset containers failed with status code "{}"\n{}'.format(status_code, body))
             sys.exit(1)
         sleep(10)
-    for t in mockless_tests:
+
+    # the mock tests above share the single proxy so they run one at a time, these don't use it
+    def run_mockless_test(t):
         run_test_scenario(t, proxy, default_test_timeout, skipped_tests_conf, nightly_integrations,
                           skipped_integrations_conf, skipped_integration, is_nightly, run_all_tests,
                           is_filter_configured,
@@ -577,6 +658,8 @@ def execute_testing(server, server_ip, server_version, server_numeric_version, i
                           unmockable_integrations, succeed_playbooks, slack, circle_ci, build_number, server,
                           build_name, server_numeric_version, demisto_api_key, is_ami)
 
+    run_tests_concurrently(mockless_tests, run_mockless_test, workers)
+
     print_test_summary(succeed_playbooks, failed_playbooks, skipped_tests, skipped_integration, unmockable_integrations,
                        proxy, is_ami)
 
@@ -2,13 +2,17 @@ import copy
 import time
 from pprint import pformat
 import uuid
-import urllib
 import urllib3
 import ast
 import requests.exceptions
 from demisto_client.demisto_api.rest import ApiException
 import demisto_client
 
+try:
+    from urllib import quote
+except ImportError:
+    from urllib.parse import quote
+
 from Tests.test_utils import print_error, print_warning, print_color, LOG_COLORS
 from Tests.scripts.constants import PB_Status
 
@@ -19,6 +23,34 @@ urllib3.disable_warnings()
 DEFAULT_TIMEOUT = 60
 DEFAULT_INTERVAL = 20
 ENTRY_TYPE_ERROR = 4
+INITIAL_POLLING_INTERVAL = 0.5
+MAX_POLLING_INTERVAL = 10
+POLLING_BACKOFF_FACTOR = 1.5
+
+
+class Backoff(object):
+    """Paces the polling of the server until a deadline.
+
+    The interval between polls starts short, so quick playbooks are noticed right away, and grows up to
+    max_interval, so long running ones don't flood the server. A sleep never passes the deadline.
+    """
+    def __init__(self, timeout, initial_interval=INITIAL_POLLING_INTERVAL, max_interval=MAX_POLLING_INTERVAL,
+                 factor=POLLING_BACKOFF_FACTOR):
+        self.deadline = time.time() + timeout
+        self.interval = initial_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.attempts = 0
+
+    def expired(self):
+        return time.time() > self.deadline
+
+    def sleep(self):
+        remaining = self.deadline - time.time()
+        if remaining > 0:
+            time.sleep(min(self.interval, remaining))
+        self.interval = min(self.interval * self.factor, self.max_interval)
+        self.attempts += 1
 
 
 # ----- Functions ----- #
@@ -37,17 +69,21 @@ def __get_integration_config(client, integration_name):
         return None
 
     res = ast.literal_eval(res_raw[0])
-    TIMEOUT = 180
-    SLEEP_INTERVAL = 5
-    total_sleep = 0
+    backoff = Backoff(180)
     while 'configurations' not in res:
-        if total_sleep == TIMEOUT:
+        if backoff.expired():
             print_error("Timeout - failed to get integration {} configuration. Error: {}".format(
                 integration_name, res))
             return None
 
-        time.sleep(SLEEP_INTERVAL)
-        total_sleep += SLEEP_INTERVAL
+        backoff.sleep()
+        try:
+            res_raw = demisto_client.generic_request_func(self=client, path='/settings/integration/search',
+                                                          method='POST', body=body)
+        except ApiException as conn_error:
+            print(conn_error)
+            return None
+        res = ast.literal_eval(res_raw[0])
 
     all_configurations = res['configurations']
     match_configurations = [x for x in all_configurations if x['name'] == integration_name]
@@ -267,18 +303,18 @@ def __create_incident_with_playbook(client, name, playbook_id, integrations):
         print(err)
 
     # poll the incidents queue for a max time of 25 seconds
-    timeout = time.time() + 25
+    backoff = Backoff(25)
     while incidents['total'] != 1:
-        try:
-            incidents = client.search_incidents(filter=search_filter)
-        except ApiException as err:
-            print(err)
-        if time.time() > timeout:
+        if backoff.expired():
             print_error('Got timeout for searching incident with id {}, '
                         'got {} incidents in the search'.format(inc_id, incidents['total']))
             return False, -1
 
-        time.sleep(1)
+        backoff.sleep()
+        try:
+            incidents = client.search_incidents(filter=search_filter)
+        except ApiException as err:
+            print(err)
 
     return incidents['data'][0], inc_id
 
@@ -332,7 +368,7 @@ def __delete_incident(client, incident):
 def __delete_integration_instance(client, instance_id):
     try:
         res = demisto_client.generic_request_func(self=client, method='DELETE',
-                                                  path='/settings/integration/' + urllib.quote(
+                                                  path='/settings/integration/' + quote(
                                                       instance_id))
     except requests.exceptions.RequestException as conn_err:
         print_error(
@@ -359,7 +395,7 @@ def __print_investigation_error(client, playbook_id, investigation_id, color=LOG
     try:
         empty_json = {"pageSize": 1000}
         res = demisto_client.generic_request_func(self=client, method='POST',
-                                                  path='/investigation/' + urllib.quote(
+                                                  path='/investigation/' + quote(
                                                       investigation_id), body=empty_json)
     except requests.exceptions.RequestException as conn_err:
         print_error(
@@ -437,13 +473,12 @@ def test_integration(client, integrations, playbook_id, options=None, is_mock_ru
     print('Investigation ID: {}'.format(investigation_id))
 
     timeout_amount = options['timeout'] if 'timeout' in options else DEFAULT_TIMEOUT
-    timeout = time.time() + timeout_amount
+    backoff = Backoff(timeout_amount)
 
-    i = 1
     # wait for playbook to finish run
     while True:
         # give playbook time to run
-        time.sleep(1)
+        backoff.sleep()
 
         # fetch status
         playbook_state = __get_investigation_playbook_state(client, investigation_id)
@@ -460,13 +495,12 @@ def test_integration(client, integrations, playbook_id, options=None, is_mock_ru
                 print_error(playbook_id + ' failed with error/s')
                 __print_investigation_error(client, playbook_id, investigation_id)
             break
-        if time.time() > timeout:
+        if backoff.expired():
             print_error(playbook_id + ' failed on timeout')
             break
 
-        if i % DEFAULT_INTERVAL == 0:
-            print('loop no. {}, playbook state is {}'.format(i / DEFAULT_INTERVAL, playbook_state))
-        i = i + 1
+        if backoff.attempts % DEFAULT_INTERVAL == 0:
+            print('loop no. {}, playbook state is {}'.format(backoff.attempts / DEFAULT_INTERVAL, playbook_state))
 
     __disable_integrations_instances(client, module_instances)
 
@@ -2,6 +2,7 @@ import re
 import os
 import sys
 import json
+import hashlib
 import argparse
 from subprocess import Popen, PIPE
 from distutils.version import LooseVersion
@@ -11,9 +12,17 @@ import requests
 from Tests.scripts.constants import CHECKED_TYPES_REGEXES, PACKAGE_SUPPORTING_DIRECTORIES, CONTENT_GITHUB_LINK, \
     PACKAGE_YML_FILE_REGEX, UNRELEASE_HEADER, RELEASE_NOTES_REGEX, PACKS_DIR_REGEX, PACKS_DIR
 
+try:
+    from yaml import CSafeLoader as YAMLSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLSafeLoader
+
 # disable insecure warnings
 requests.packages.urllib3.disable_warnings()
 
+# dirs written by the tests and linters of a package, their files never change a package hash
+HASH_IGNORED_DIRS = ('__pycache__', '.pytest_cache', '.mypy_cache')
+
 
 class LOG_COLORS:
     NATIVE = '\033[m'
@@ -80,7 +89,7 @@ def get_remote_file(full_file_path, tag='master'):
     if full_file_path.endswith('json'):
         details = json.loads(res.content)
     else:
-        details = yaml.safe_load(res.content)
+        details = yaml_safe_load(res.content)
 
     return details
 
@@ -113,7 +122,7 @@ def filter_packagify_changes(modified_files, added_files, removed_files, tag='ma
     for file_path in added_files:
         if file_path.split("/")[0] in PACKAGE_SUPPORTING_DIRECTORIES:
             with open(file_path) as f:
-                details = yaml.safe_load(f.read())
+                details = yaml_safe_load(f.read())
 
             uniq_identifier = '_'.join([
                 details['name'],
@@ -166,32 +175,71 @@ def get_file(method, file_path, type_of_file):
     return {}
 
 
+def yaml_safe_load(stream):
+    """yaml.safe_load, using the libyaml based loader when PyYAML was built with it."""
+    return yaml.load(stream, Loader=YAMLSafeLoader)
+
+
 def get_yaml(file_path):
-    return get_file(yaml.safe_load, file_path, ('yml', 'yaml'))
+    return get_file(yaml_safe_load, file_path, ('yml', 'yaml'))
 
 
 def get_json(file_path):
     return get_file(json.load, file_path, 'json')
 
 
-def get_script_or_integration_id(file_path):
-    data_dictionary = get_yaml(file_path)
+class ContentRepository(object):
+    """The content files loaded during a single validation run.
+
+    Each file, and each old version of a file fetched from github, is parsed once and the same dictionary is handed to
+    every validator that asks for it, so the validators must not modify the returned data.
+    """
+
+    def __init__(self):
+        self._yaml_files = {}  # type: dict
+        self._json_files = {}  # type: dict
+        self._remote_files = {}  # type: dict
+
+    def get_yaml(self, file_path):
+        if file_path not in self._yaml_files:
+            self._yaml_files[file_path] = get_yaml(file_path)
+
+        return self._yaml_files[file_path]
+
+    def get_json(self, file_path):
+        if file_path not in self._json_files:
+            self._json_files[file_path] = get_json(file_path)
+
+        return self._json_files[file_path]
+
+    def get_remote_file(self, full_file_path, tag='master'):
+        if (full_file_path, tag) not in self._remote_files:
+            self._remote_files[(full_file_path, tag)] = get_remote_file(full_file_path, tag)
+
+        return self._remote_files[(full_file_path, tag)]
+
+
+def get_script_or_integration_id(file_path, data_dictionary=None):
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
 
     if data_dictionary:
         commonfields = data_dictionary.get('commonfields', {})
         return commonfields.get('id', ['-', ])
 
 
-def collect_ids(file_path):
+def collect_ids(file_path, data_dictionary=None):
     """Collect id mentioned in file_path"""
-    data_dictionary = get_yaml(file_path)
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
 
     if data_dictionary:
         return data_dictionary.get('id', '-')
 
 
-def get_from_version(file_path):
-    data_dictionary = get_yaml(file_path)
+def get_from_version(file_path, data_dictionary=None):
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
 
     if data_dictionary:
         from_version = data_dictionary.get('fromversion', '0.0.0')
@@ -207,8 +255,9 @@ def get_from_version(file_path):
     return '0.0.0'
 
 
-def get_to_version(file_path):
-    data_dictionary = get_yaml(file_path)
+def get_to_version(file_path, data_dictionary=None):
+    if data_dictionary is None:
+        data_dictionary = get_yaml(file_path)
 
     if data_dictionary:
         to_version = data_dictionary.get('toversion', '99.99.99')
@@ -342,3 +391,42 @@ def get_pack_name(file_path):
 
 def pack_name_to_path(pack_name):
     return os.path.join(PACKS_DIR, pack_name)
+
+
+def update_file_hash(sha1, file_path, ignored_files=()):
+    """
+    Add the paths and contents of a file, or of all the files under a dir, to a hash
+
+    Arguments:
+        sha1 {hashlib hash} -- the hash to update
+        file_path {string} -- path to a file or a dir
+        ignored_files {tuple} -- names of files under the dir that are not hashed
+    """
+    if os.path.isfile(file_path):
+        paths = [file_path]
+    else:
+        paths = []
+        for root, dirs, files in os.walk(file_path):
+            dirs[:] = sorted(d for d in dirs if d not in HASH_IGNORED_DIRS)
+            paths.extend(os.path.join(root, f) for f in sorted(files)
+                         if f not in ignored_files and not f.endswith('.pyc'))
+    for path in paths:
+        sha1.update(path.encode('utf-8'))
+        with open(path, 'rb') as f:
+            sha1.update(f.read())
+
+
+def get_file_hash(file_path, ignored_files=()):
+    """
+    Hash of a file, or of all the files under a dir
+
+    Arguments:
+        file_path {string} -- path to a file or a dir
+        ignored_files {tuple} -- names of files under the dir that are not hashed
+
+    Returns:
+        string -- sha1 hex digest
+    """
+    sha1 = hashlib.sha1()
+    update_file_hash(sha1, file_path, ignored_files)
+    return sha1.hexdigest()
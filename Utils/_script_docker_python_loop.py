@@ -1,8 +1,15 @@
 import os
+import __future__
 import threading
 import sys
 import json
 import traceback
+import copy
+import types
+import hashlib
+import marshal
+import tempfile
+from collections import OrderedDict
 
 if sys.version_info[0] < 3:
     import Queue as queue
@@ -53,21 +60,27 @@ from __future__ import print_function
 import json
 import uuid
 import sys
+import threading
 
 class Demisto:
     """Wrapper class to interface with the Demisto server via stdin, stdout"""
 
     def __init__(self, context):
         self.callingContext = context
+        # messages which do not need a reply are buffered and sent in one batch frame,
+        # only if the server supports it. Otherwise every message is a round trip as before.
+        self.__pending = []
+        self.__batch_size = context.get(u'batchSize', 100) if context.get(u'batchMessages') else 0
+        # the messages may be sent from several threads (e.g. debug logs of concurrent requests), a message and its
+        # reply, and the buffered messages, must not interleave with the messages of other threads
+        self.__lock = threading.RLock()
         args = self.args()
         if 'demisto_machine_learning_magic_key' in  args:
             import os
             os.environ['DEMISTO_MACHINE_LEARNING_MAGIC_KEY'] = args['demisto_machine_learning_magic_key']
 
     def log(self, msg):
-        json.dump({'type': 'entryLog', 'args': {'message': msg}}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        self.__send({'type': 'entryLog', 'args': {'message': msg}})
 
     def investigation(self):
         return self.callingContext[u'context'][u'Inv']
@@ -115,18 +128,27 @@ class Demisto:
     def executeCommand(self, command, args):
         return self.__do({'type': 'executeCommand', 'command': command.strip(), 'args': args})
 
+    def executeCommandBatch(self, commands):
+        """ Execute a list of commands ({'command': ..., 'args': ...}) in one round trip.
+        Returns the results in the same order as the commands """
+        if not self.__batch_size:
+            # server does not support batches
+            return [self.executeCommand(c['command'], c.get('args', {})) for c in commands]
+        return self.__do({'type': 'executeCommandBatch',
+                          'commands': [{'command': c['command'].strip(), 'args': c.get('args', {})} for c in commands]})
+
     def demistoUrls(self):
         return self.__do({'type': 'demistoUrls'})
 
     def info(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'info', 'args': argsObj})
+        self.__do_no_reply({'type': 'log', 'command': 'info', 'args': argsObj})
 
     def error(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'error', 'args': argsObj})
+        self.__do_no_reply({'type': 'log', 'command': 'error', 'args': argsObj})
 
     def exception(self, ex):
         return self.__do({'type': 'exception', 'command': 'exception', 'args': ex})
@@ -134,7 +156,7 @@ class Demisto:
     def debug(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'debug', 'args': argsObj})
+        self.__do_no_reply({'type': 'log', 'command': 'debug', 'args': argsObj})
 
     def getAllSupportedCommands(self):
         return self.__do({'type': 'getAllModulesSupportedCmds'})
@@ -143,22 +165,46 @@ class Demisto:
         return self.__do({'type': 'getAllModules'})
 
     def setContext(self, name, value):
-        return self.__do({'type': 'setContext', 'name': name, 'value': value})
+        return self.__do_no_reply({'type': 'setContext', 'name': name, 'value': value})
 
     def dt(self, data, q):
         return self.__do({'type': 'dt', 'name': q, 'value': data})['result']
 
-    def __do(self, cmd):
-        # Watch out there is another defintion like this
-        # prepare command to send to server
-        json.dump(cmd, sys.stdout)
-        sys.stdout.write('\\n')
+    def flush(self):
+        """ Send all the buffered messages to the server """
+        with self.__lock:
+            if self.__pending:
+                pending = self.__pending
+                self.__pending = []
+                self.__write({'type': 'batch', 'commands': pending})
 
-        # send command to Demisto server
+    def __write(self, msg):
+        json.dump(msg, sys.stdout)
+        sys.stdout.write('\\n')
         sys.stdout.flush()
 
-        # wait to receive response from Demisto server
-        data = globals()['__readWhileAvailable']()
+    def __send(self, msg):
+        with self.__lock:
+            # buffered messages go first to keep the order of the messages
+            self.flush()
+            self.__write(msg)
+
+    def __do_no_reply(self, cmd):
+        if not self.__batch_size:
+            return self.__do(cmd)
+        with self.__lock:
+            self.__pending.append(cmd)
+            if len(self.__pending) >= self.__batch_size:
+                self.flush()
+
+    def __do(self, cmd):
+        # Watch out there is another defintion like this
+        with self.__lock:
+            # send command to Demisto server
+            self.__send(cmd)
+
+            # wait to receive response from Demisto server
+            data = globals()['__readWhileAvailable']()
         if data.find('$$##') > -1:
             raise ValueError(data[4:])
         return json.loads(data)
@@ -189,9 +235,7 @@ class Demisto:
         else:
             res.append(converted)
 
-        json.dump({'type': 'result', 'results': res}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        self.__send({'type': 'result', 'results': res})
 
 demisto = Demisto(context)
 
@@ -222,21 +266,27 @@ from __future__ import print_function
 import json
 import uuid
 import sys
+import threading
 
 class Demisto:
     """Wrapper class to interface with the Demisto server via stdin, stdout"""
 
     def __init__(self, context):
         self.callingContext = context
+        # messages which do not need a reply are buffered and sent in one batch frame,
+        # only if the server supports it. Otherwise every message is a round trip as before.
+        self.__pending = []
+        self.__batch_size = context.get(u'batchSize', 100) if context.get(u'batchMessages') else 0
+        # the messages may be sent from several threads (e.g. debug logs of concurrent requests), a message and its
+        # reply, and the buffered messages, must not interleave with the messages of other threads
+        self.__lock = threading.RLock()
         args = self.args()
         if 'demisto_machine_learning_magic_key' in  args:
             import os
             os.environ['DEMISTO_MACHINE_LEARNING_MAGIC_KEY'] = args['demisto_machine_learning_magic_key']
 
     def log(self, msg):
-        json.dump({'type': 'entryLog', 'args': {'message': 'Integration log: ' + msg}}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        self.__send({'type': 'entryLog', 'args': {'message': 'Integration log: ' + msg}})
 
     def investigation(self):
         return self.callingContext[u'context'][u'Inv']
@@ -299,17 +349,17 @@ class Demisto:
     def info(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'info', 'args': argsObj})
+        self.__do_no_reply({'type': 'log', 'command': 'info', 'args': argsObj})
 
     def error(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'error', 'args': argsObj})
+        self.__do_no_reply({'type': 'log', 'command': 'error', 'args': argsObj})
 
     def debug(self, *args):
         argsObj = {}
         argsObj["args"] = list(args)
-        self.__do({'type': 'log', 'command': 'debug', 'args': argsObj})
+        self.__do_no_reply({'type': 'log', 'command': 'debug', 'args': argsObj})
 
     def gets(self, obj, field):
         return str(self.get(obj, field))
@@ -323,12 +373,38 @@ class Demisto:
     def dt(self, data, q):
         return self.__do({'type': 'dt', 'name': q, 'value': data})['result']
 
-    def __do(self, cmd):
-        # Watch out there is another defintion like this
-        json.dump(cmd, sys.stdout)
+    def flush(self):
+        """ Send all the buffered messages to the server """
+        with self.__lock:
+            if self.__pending:
+                pending = self.__pending
+                self.__pending = []
+                self.__write({'type': 'batch', 'commands': pending})
+
+    def __write(self, msg):
+        json.dump(msg, sys.stdout)
         sys.stdout.write('\\n')
         sys.stdout.flush()
-        data = globals()['__readWhileAvailable']()
+
+    def __send(self, msg):
+        with self.__lock:
+            # buffered messages go first to keep the order of the messages
+            self.flush()
+            self.__write(msg)
+
+    def __do_no_reply(self, cmd):
+        if not self.__batch_size:
+            return self.__do(cmd)
+        with self.__lock:
+            self.__pending.append(cmd)
+            if len(self.__pending) >= self.__batch_size:
+                self.flush()
+
+    def __do(self, cmd):
+        # Watch out there is another defintion like this
+        with self.__lock:
+            self.__send(cmd)
+            data = globals()['__readWhileAvailable']()
         if data.find('$$##') > -1:
             raise ValueError(data[4:])
         return json.loads(data)
@@ -356,9 +432,7 @@ class Demisto:
             res = converted
         else:
             res.append(converted)
-        json.dump({'type': 'result', 'results': res}, sys.stdout)
-        sys.stdout.write('\\n')
-        sys.stdout.flush()
+        self.__send({'type': 'result', 'results': res})
 
     def incidents(self, incidents):
         self.results({'Type': 1, 'Contents': json.dumps(incidents), 'ContentsFormat': 'json'})
@@ -388,6 +462,152 @@ print = demisto_print
 ###CODE_HERE###
 '''
 
+# the templates import print_function, script code compiled on its own (warm mode) needs the same flag
+SCRIPT_COMPILER_FLAGS = __future__.print_function.compiler_flag
+# max number of compiled code objects kept in memory by the loop process
+CODE_CACHE_SIZE = int(os.environ.get('DEMISTO_CODE_CACHE_SIZE', '64'))
+# optional directory for a marshal cache shared by all the loop processes of the container
+CODE_CACHE_DIR = os.environ.get('DEMISTO_CODE_CACHE_DIR')
+
+
+class CodeCache(object):
+    """LRU cache of compiled code objects keyed on the sha256 of the source code and the compiler flags.
+
+    Compiled code is optionally persisted with marshal to CODE_CACHE_DIR so a newly started
+    loop process can reuse what its siblings already compiled. Marshal data is specific to the
+    python version, so the version is part of the key.
+    """
+
+    def __init__(self, max_size=CODE_CACHE_SIZE, cache_dir=CODE_CACHE_DIR):
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries)}
+
+    def key(self, source, flags=0):
+        sha = hashlib.sha256('{}:{}:'.format(sys.version, flags).encode('utf-8'))
+        sha.update(source.encode('utf-8') if not isinstance(source, bytes) else source)
+        return sha.hexdigest()
+
+    def compile(self, source, filename='<string>', flags=0):
+        key = self.key(source, flags)
+        code = self.entries.pop(key, None)
+        if code is None:
+            code = self.load(key)
+        if code is None:
+            self.misses += 1
+            # the future statements of the loop itself must not leak into the scripts
+            code = compile(source, filename, 'exec', flags, True)
+            self.store(key, code)
+        else:
+            self.hits += 1
+        self.entries[key] = code
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return code
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + '.marshal')
+
+    def load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self.path(key), 'rb') as f:
+                return marshal.load(f)
+        except Exception:
+            # missing or corrupted entry - just compile again
+            return None
+
+    def store(self, key, code):
+        if not self.cache_dir:
+            return
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            # write to a temp file and rename so other processes never read a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump(code, f)
+            os.rename(tmp_path, self.path(key))
+        except Exception:
+            # the disk cache is best effort only
+            pass
+
+
+code_cache = CodeCache()
+
+
+def script_globals(context):
+    """The globals every executed script (and the warm common server module) starts with"""
+    return {
+        '__readWhileAvailable': __readWhileAvailable,
+        'context': context,
+        'win': win
+    }
+
+
+class WarmCommonServer(object):
+    """CommonServerPython imported once per loop process as a real module.
+
+    Used when the server sends the common server code separately from the script code (the
+    `commonScript` key of the context). The template and the common server code are executed
+    once into the module namespace and a snapshot of the resulting globals is kept. Before every
+    execution the namespace is reset to the snapshot, so nothing a previous script defined or
+    changed leaks into the next one, and only the per execution state is built again:
+    a fresh `demisto` object, `LOG` (with its credentials scan) and the debug requests logger.
+    Scripts are then executed directly in the module namespace, so the common server functions
+    see the fresh `demisto` object.
+    """
+
+    def __init__(self, template, common_code, context):
+        self.key = code_cache.key(common_code)
+        self.module = types.ModuleType('CommonServerPython')
+        namespace = self.module.__dict__
+        namespace.update(script_globals(context))
+        code = code_cache.compile(template.replace('###CODE_HERE###', common_code))
+        exec(code, namespace, namespace)  # guardrails-disable-line
+        self.snapshot = dict(namespace)
+        # the debug logger is rebuilt per execution - drop the one created at import
+        # so it is released (and restores the logging state) on the first reset
+        if self.snapshot.get('_requests_logger') is not None:
+            self.snapshot['_requests_logger'] = None
+
+    def reset(self, context):
+        namespace = self.module.__dict__
+        namespace.clear()
+        for name, value in self.snapshot.items():
+            if not name.startswith('__') and isinstance(value, (dict, list, set)):
+                # module level tables (outputPaths, INDICATOR_TYPE_TO_CONTEXT_KEY...) may be modified by scripts
+                value = copy.deepcopy(value)
+            namespace[name] = value
+        namespace['context'] = context
+        namespace['demisto'] = namespace['Demisto'](context)
+        if 'IntegrationLogger' in namespace:
+            namespace['LOG'] = namespace['IntegrationLogger']()
+        if 'DebugLogger' in namespace and namespace['is_debug_mode']():
+            namespace['_requests_logger'] = namespace['DebugLogger']()
+        sys.modules['CommonServerPython'] = self.module
+        return namespace
+
+
+# warm common server modules by script type (integration or script)
+warm_common_servers = {}
+
+
+def get_warm_namespace(is_integ_script, common_code, context):
+    template = integ_template_code if is_integ_script else template_code
+    warm = warm_common_servers.get(is_integ_script)
+    if warm is None or warm.key != code_cache.key(common_code):
+        warm_common_servers.pop(is_integ_script, None)
+        warm = WarmCommonServer(template, common_code, context)
+        warm_common_servers[is_integ_script] = warm
+    return warm.reset(context)
+
 # rollback file system to its previous state
 # delete home dir and tmp dir
 
@@ -395,7 +615,7 @@ print = demisto_print
 # notifies demisto server that the current executed script is completed
 # and the process is ready to execute the next script
 def send_script_completed():
-    json.dump({'type': 'completed'}, sys.stdout)
+    json.dump({'type': 'completed', 'codeCache': code_cache.stats()}, sys.stdout)
     sys.stdout.write('\\n')
     sys.stdout.flush()
 
@@ -410,6 +630,16 @@ def send_script_exception(exc_type, exc_value, exc_traceback):
     sys.stdout.flush()
 
 
+def flush_script_messages(sub_globals):
+    # send the messages the script's demisto object still buffers
+    try:
+        script_demisto = sub_globals.get('demisto')
+        if script_demisto is not None and hasattr(script_demisto, 'flush'):
+            script_demisto.flush()
+    except Exception:
+        pass
+
+
 def send_pong():
     json.dump({'type': 'pong'}, sys.stdout)
     sys.stdout.write('\\n')
@@ -448,31 +678,34 @@ while True:
 
     code_string = contextJSON['script']
     contextJSON.pop('script', None)
+    # warm mode - the server sends the common server code separately from the script code
+    common_code = contextJSON.pop('commonScript', None)
 
     is_integ_script = contextJSON['integration']
-    complete_code = ''
-    if is_integ_script:
-        complete_code = integ_template_code.replace('###CODE_HERE###', code_string)
-    else:
-        complete_code = template_code.replace('###CODE_HERE###', code_string)
 
+    sub_globals = {}
     try:
-        code = compile(complete_code, '<string>', 'exec')
-
-        sub_globals = {
-            '__readWhileAvailable': __readWhileAvailable,
-            'context': contextJSON,
-            'win': win
-        }
+        if common_code:
+            code = code_cache.compile(code_string, flags=SCRIPT_COMPILER_FLAGS)
+            sub_globals = get_warm_namespace(is_integ_script, common_code, contextJSON)
+        else:
+            if is_integ_script:
+                complete_code = integ_template_code.replace('###CODE_HERE###', code_string)
+            else:
+                complete_code = template_code.replace('###CODE_HERE###', code_string)
+            code = code_cache.compile(complete_code)
+            sub_globals = script_globals(contextJSON)
 
         exec(code, sub_globals, sub_globals)  # guardrails-disable-line
+        flush_script_messages(sub_globals)
 
     except Exception as ex:
         exc_type, exc_value, exc_traceback = sys.exc_info()
+        flush_script_messages(sub_globals)
         send_script_exception(exc_type, exc_value, exc_traceback)
     except SystemExit:
         # print 'Will not stop on sys.exit(0)'
-        pass
+        flush_script_messages(sub_globals)
 
     rollback_system()
 
@@ -0,0 +1,75 @@
+"""Micro benchmark of the CommonServerPython context key transformations.
+
+Compares the per record key handling (what createContext and camelize did before the key plans)
+with the compiled key plans, on 10k and 100k records.
+
+Usage: python Utils/benchmarks/common_server_context_benchmark.py
+"""
+import os
+import sys
+import timeit
+
+CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.append(os.path.join(CONTENT_DIR, 'Tests', 'demistomock'))
+sys.path.append(os.path.join(CONTENT_DIR, 'Scripts', 'CommonServerPython'))
+
+from CommonServerPython import createContext, camelize, underscoreToCamelCase  # noqa: E402
+
+RECORD_COUNTS = (10000, 100000)
+
+
+def per_record_create_context(data, keyTransform):
+    res = []
+    for obj in data:
+        single = {}  # type: dict
+        for key in obj.keys():
+            values = key.split('.')
+            current = single
+            for v in values[:-1]:
+                current.setdefault(v, {})
+                current = current[v]
+            current[keyTransform(values[-1])] = obj[key]
+        res.append(single)
+    return res
+
+
+def per_record_camelize(data, delim):
+    def camelize_str(src_str):
+        return ''.join(map(lambda x: x.title(), src_str.split(delim)))
+
+    return [{camelize_str(key): value for key, value in d.items()} for d in data]
+
+
+def build_records(count):
+    return [{
+        'id': i,
+        'host.name': 'host{}'.format(i),
+        'host.ip_address': '10.0.{}.{}'.format(i // 256 % 256, i % 256),
+        'host.os.family_name': 'linux',
+        'severity_level': i % 4,
+        'plugin.plugin_id': 1000 + i % 50,
+        'first_seen': '2020-01-01T00:00:00Z',
+        'last_seen': '2020-01-02T00:00:00Z'
+    } for i in range(count)]
+
+
+def run(name, func, repeat=3):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('  {:<40}{:>8.3f}s'.format(name, best))
+    return best
+
+
+def main():
+    for count in RECORD_COUNTS:
+        records = build_records(count)
+        print('{} records:'.format(count))
+        old = run('createContext per record', lambda: per_record_create_context(records, underscoreToCamelCase))
+        new = run('createContext key plan', lambda: createContext(records, keyTransform=underscoreToCamelCase))
+        print('  speedup x{:.1f}'.format(old / new))
+        old = run('camelize per record', lambda: per_record_camelize(records, '_'))
+        new = run('camelize key plan', lambda: camelize(records, '_'))
+        print('  speedup x{:.1f}'.format(old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Benchmark of the id_set duplicates detection.
+
+Runs find_duplicates on a synthetic id_set with 50k objects per section, and compares it with the
+previous pairwise implementation (a scan of the whole section per ID) on smaller id_sets.
+
+Usage: python Utils/benchmarks/id_set_duplicates_benchmark.py
+"""
+import itertools
+import os
+import random
+import sys
+import timeit
+from distutils.version import LooseVersion
+
+CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.append(CONTENT_DIR)
+
+from Tests.scripts import update_id_set  # noqa: E402
+
+SECTION_SIZE = 50000
+PAIRWISE_SECTION_SIZES = (1000, 5000)
+VERSIONS = ['3.5.0', '4.0.0', '4.1.0', '4.5.0', '5.0.0']
+
+
+def pairwise_has_duplicate(id_set, id_to_check):
+    duplicates = [duplicate for duplicate in id_set if duplicate.get(id_to_check)]
+    if len(duplicates) < 2:
+        return False
+
+    for dup1, dup2 in itertools.combinations(duplicates, 2):
+        dict1 = list(dup1.values())[0]
+        dict2 = list(dup2.values())[0]
+        dict1_from_version = LooseVersion(dict1.get('fromversion', '0.0.0'))
+        dict2_from_version = LooseVersion(dict2.get('fromversion', '0.0.0'))
+        dict1_to_version = LooseVersion(dict1.get('toversion', '99.99.99'))
+        dict2_to_version = LooseVersion(dict2.get('toversion', '99.99.99'))
+        if any([
+                dict1_from_version <= dict2_from_version < dict1_to_version,
+                dict1_from_version < dict2_to_version <= dict1_to_version,
+                dict2_from_version <= dict1_from_version < dict2_to_version,
+                dict2_from_version < dict1_to_version <= dict2_to_version,
+        ]):
+            return True
+
+    return False
+
+
+def pairwise_find_duplicates(section):
+    ids = set(list(obj.keys())[0] for obj in section)
+    return [obj_id for obj_id in ids if pairwise_has_duplicate(section, obj_id)]
+
+
+def build_section(size):
+    """About 10% of the IDs have 2-3 versions of the object, some of them overlapping"""
+    section = []
+    i = 0
+    while len(section) < size:
+        obj_id = 'object{}'.format(i)
+        i += 1
+        copies = random.choice([2, 3]) if random.random() < 0.1 else 1
+        for _ in range(copies):
+            obj = {'name': obj_id, 'file_path': 'Scripts/{0}/{0}.yml'.format(obj_id)}
+            from_version, to_version = sorted(random.sample(VERSIONS, 2))
+            if copies > 1:
+                obj['fromversion'] = from_version
+                obj['toversion'] = to_version
+            section.append({obj_id: obj})
+
+    return section[:size]
+
+
+def run(name, func):
+    best = min(timeit.repeat(func, number=1, repeat=3))
+    print('  {:<45}{:>8.3f}s'.format(name, best))
+
+
+def main():
+    random.seed(0)
+    update_id_set.print_warning = lambda *args: None
+    for size in PAIRWISE_SECTION_SIZES:
+        section = build_section(size)
+        print('{} objects:'.format(size))
+        run('pairwise', lambda: pairwise_find_duplicates(section))
+        run('group by ID and sweep', lambda: update_id_set.get_duplicate_ids(section))
+
+    id_set = {section_name: build_section(SECTION_SIZE)
+              for section_name in ('scripts', 'integrations', 'playbooks', 'TestPlaybooks')}
+    print('{} objects in each of the 4 id_set sections:'.format(SECTION_SIZE))
+    run('find_duplicates', lambda: update_id_set.find_duplicates(id_set))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark of the secrets detection hook over the files in TestData.
+
+Compares the per white list string substring search and the per printable character entropy (what
+search_potential_secrets did before) with the white list automaton and the single pass entropy, then times
+the full scan serially and across a process pool.
+
+Usage: python Utils/benchmarks/secrets_benchmark.py
+"""
+import io
+import os
+import sys
+import glob
+import math
+import string
+import timeit
+import contextlib
+
+CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+sys.path.append(CONTENT_DIR)
+
+from Tests.scripts.hook_validations.secrets import search_potential_secrets, is_text_file, get_file_contents, \
+    get_white_listed_items, calculate_shannon_entropy, WhiteListMatcher  # noqa: E402
+
+
+def per_white_list_string_search(strings, white_list):
+    return [any(white_list_string.lower() in string_.lower() for white_list_string in white_list)
+            for string_ in strings]
+
+
+def white_list_matcher_search(strings, white_list):
+    matcher = WhiteListMatcher(white_list_string.lower() for white_list_string in white_list)
+    return [matcher.matches(string_.lower()) for string_ in strings]
+
+
+def per_printable_char_entropy(data):
+    entropy = 0
+    for char in (ord(c) for c in string.printable):
+        p_x = float(data.count(chr(char))) / len(data)
+        if p_x > 0:
+            entropy += - p_x * math.log(p_x, 2)
+    return entropy
+
+
+def run(name, func, repeat=3):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('  {:<40}{:>8.3f}s'.format(name, best))
+    return best
+
+
+def main():
+    os.chdir(CONTENT_DIR)
+    file_paths = sorted(file_path for file_path in glob.glob('TestData/*') if is_text_file(file_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        strings = [string_ for file_path in file_paths
+                   for string_ in get_file_contents(file_path, os.path.splitext(file_path)[1]).split()]
+    white_list = get_white_listed_items(False, '')[0]
+    print('{} files, {} strings, {} white list strings:'.format(len(file_paths), len(strings), len(white_list)))
+
+    assert per_white_list_string_search(strings, white_list) == white_list_matcher_search(strings, white_list)
+    old = run('white list substring search', lambda: per_white_list_string_search(strings, white_list), repeat=1)
+    new = run('white list automaton', lambda: white_list_matcher_search(strings, white_list))
+    print('  speedup x{:.1f}'.format(old / new))
+
+    assert [per_printable_char_entropy(s) for s in strings] == [calculate_shannon_entropy(s) for s in strings]
+    old = run('entropy per printable char', lambda: [per_printable_char_entropy(s) for s in strings])
+    new = run('entropy single pass', lambda: [calculate_shannon_entropy(s) for s in strings])
+    print('  speedup x{:.1f}'.format(old / new))
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        serial = min(timeit.repeat(lambda: search_potential_secrets(file_paths, processes=1), number=1, repeat=1))
+        parallel = min(timeit.repeat(lambda: search_potential_secrets(file_paths), number=1, repeat=1))
+    print('  {:<40}{:>8.3f}s'.format('full scan serial', serial))
+    print('  {:<40}{:>8.3f}s'.format('full scan process pool', parallel))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# disable-secrets-detection-start
+"""Benchmark of the Whois integration parsing over the raw records in Integrations/Whois/test_data.
+
+Times the import of the integration, compares the per line search with every grammar regex (what parse_raw_whois
+did before the combined rule filters) with match_grammar_rules, then times parse_raw_whois on the whole corpus.
+
+The integration runs on python 2, so does the benchmark.
+
+Usage: python2 Utils/benchmarks/whois_benchmark.py
+"""
+# disable-secrets-detection-end
+import os
+import re
+import sys
+import json
+import types
+import timeit
+
+CONTENT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+WHOIS_DIR = os.path.join(CONTENT_DIR, 'Integrations', 'Whois')
+sys.path.append(os.path.join(CONTENT_DIR, 'Tests', 'demistomock'))
+sys.path.append(os.path.join(CONTENT_DIR, 'Scripts', 'CommonServerPython'))
+sys.path.append(WHOIS_DIR)
+# created empty by the dev tasks when running the integration tests
+sys.modules.setdefault('CommonServerUserPython', types.ModuleType('CommonServerUserPython'))
+
+import Whois  # noqa: E402
+
+REPEAT = 20
+
+
+def per_line_grammar_search(segment, rule_keys, grammar_regexes):
+    rule_values = {}
+    for rule_key in rule_keys:
+        for line in segment.splitlines():
+            for regex in grammar_regexes[rule_key]:
+                result = re.search(regex, line)
+                if result is not None:
+                    val = result.group("val").strip()
+                    if val != "":
+                        rule_values.setdefault(rule_key, []).append(val)
+    return rule_values
+
+
+def import_whois():
+    with open(os.path.join(WHOIS_DIR, 'Whois.py')) as f:
+        code = compile(f.read(), 'Whois.py', 'exec')
+    exec(code, types.ModuleType('Whois').__dict__)
+
+
+def run(name, func, repeat=3):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('  {:<40}{:>8.3f}s'.format(name, best))
+    return best
+
+
+def main():
+    print('import:')
+    run('import Whois', import_whois, repeat=5)
+
+    with open(os.path.join(WHOIS_DIR, 'test_data', 'raw_whois_records.json')) as f:
+        records = json.load(f)
+    segments = [segment.replace('\r', '') for raw_data in records.values() for segment in raw_data] * REPEAT
+    rule_keys = list(Whois.grammar['_data'].keys())
+    grammar_regexes = {rule_key: [re.compile(pattern, re.IGNORECASE) for pattern in Whois.grammar['_data'][rule_key]]
+                       for rule_key in rule_keys}
+    print('{} records, {} segments, {} lines:'.format(len(records) * REPEAT, len(segments),
+                                                      sum(len(segment.splitlines()) for segment in segments)))
+
+    assert [per_line_grammar_search(segment, rule_keys, grammar_regexes) for segment in segments] == \
+        [Whois.match_grammar_rules(segment, rule_keys) for segment in segments]
+    old = run('grammar per line and regex',
+              lambda: [per_line_grammar_search(s, rule_keys, grammar_regexes) for s in segments])
+    new = run('grammar combined rule filters', lambda: [Whois.match_grammar_rules(s, rule_keys) for s in segments])
+    print('  speedup x{:.1f}'.format(old / new))
+
+    raw_records = list(records.values()) * REPEAT
+    run('parse_raw_whois', lambda: [Whois.parse_raw_whois(raw_data) for raw_data in raw_records])
+    run('parse_raw_whois normalized', lambda: [Whois.parse_raw_whois(raw_data, normalized=True)
+                                               for raw_data in raw_records])
+
+
+if __name__ == '__main__':
+    main()
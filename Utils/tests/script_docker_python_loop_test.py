@@ -0,0 +1,199 @@
+import os
+import sys
+import json
+import glob
+import subprocess
+import pytest
+
+LOOP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '_script_docker_python_loop.py')
+
+COMMON_SCRIPT = '''
+class IntegrationLogger(object):
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, message):
+        self.messages.append(message)
+
+LOG = IntegrationLogger()
+SHARED_TABLE = {'key': 'value'}
+'''
+
+
+def find_python2():
+    if sys.version_info[0] == 2:
+        return sys.executable
+    try:
+        if subprocess.call(['python2', '-c', ''], stdout=subprocess.PIPE, stderr=subprocess.PIPE) == 0:
+            return 'python2'
+    except OSError:
+        pass
+    return None
+
+
+PYTHON2 = find_python2()
+
+
+def build_context(script, integration=False, **kwargs):
+    context = {'script': script, 'integration': integration, 'native': False, 'args': {}, 'params': {},
+               'context': {}}
+    context.update(kwargs)
+    return json.dumps(context)
+
+
+def parse_frames(output):
+    """Splits the loop output to the json frames it wrote"""
+    decoder = json.JSONDecoder()
+    frames = []
+    pos = 0
+    while True:
+        # the frames of the scripts end with a new line, the frames of the loop itself with an escaped one
+        while output.startswith('\\n', pos) or output[pos:pos + 1].isspace():
+            pos += 2 if output.startswith('\\n', pos) else 1
+        if pos >= len(output):
+            return frames
+        frame, pos = decoder.raw_decode(output, pos)
+        frames.append(frame)
+
+
+def run_loop(lines, python=sys.executable, env=None):
+    """Runs the loop with the given stdin lines - the contexts of the executions and the replies of the server.
+
+    Returns the frames the loop wrote to stdout
+    """
+    loop_env = dict(os.environ)
+    loop_env.update(env or {})
+    proc = subprocess.Popen([python, LOOP_PATH], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, env=loop_env)
+    out, err = proc.communicate(''.join(line + '\n' for line in lines).encode('utf-8'))
+    assert proc.returncode == 0, err
+    return parse_frames(out.decode('utf-8'))
+
+
+def get_results(frames):
+    return [frame['results'][0]['Contents'] for frame in frames if frame['type'] == 'result']
+
+
+def test_code_cache_evicts_the_least_recently_used_code():
+    scripts = ['demisto.results("a")', 'demisto.results("a")', 'demisto.results("b")', 'demisto.results("a")']
+    frames = run_loop([build_context(script) for script in scripts], env={'DEMISTO_CODE_CACHE_SIZE': '1'})
+
+    assert get_results(frames) == ['a', 'a', 'b', 'a']
+    assert [frame['codeCache'] for frame in frames if frame['type'] == 'completed'] == [
+        {'hits': 0, 'misses': 1, 'size': 1},
+        {'hits': 1, 'misses': 1, 'size': 1},
+        {'hits': 1, 'misses': 2, 'size': 1},
+        {'hits': 1, 'misses': 3, 'size': 1},
+    ]
+
+
+def test_code_cache_dir_is_shared_between_loop_processes(tmpdir):
+    env = {'DEMISTO_CODE_CACHE_DIR': str(tmpdir)}
+    frames = run_loop([build_context('demisto.results("a")')], env=env)
+    assert frames[-1]['codeCache'] == {'hits': 0, 'misses': 1, 'size': 1}
+    cache_files = glob.glob(os.path.join(str(tmpdir), '*.marshal'))
+    assert len(cache_files) == 1
+
+    # a new loop process loads the compiled code from the cache dir
+    frames = run_loop([build_context('demisto.results("a")')], env=env)
+    assert get_results(frames) == ['a']
+    assert frames[-1]['codeCache'] == {'hits': 1, 'misses': 0, 'size': 1}
+
+    # a corrupted entry is compiled again
+    with open(cache_files[0], 'wb') as f:
+        f.write(b'corrupted')
+    frames = run_loop([build_context('demisto.results("a")')], env=env)
+    assert get_results(frames) == ['a']
+    assert frames[-1]['codeCache'] == {'hits': 0, 'misses': 1, 'size': 1}
+
+
+def test_warm_common_server_is_reset_between_executions():
+    first_script = '''
+LEAKED = 'leaked'
+SHARED_TABLE['key'] = 'changed'
+LOG('first execution')
+demisto.results('done')
+'''
+    second_script = '''
+demisto.results({'leaked': 'LEAKED' in globals(), 'table': SHARED_TABLE, 'log': LOG.messages})
+'''
+    frames = run_loop([build_context(script, integration=True, commonScript=COMMON_SCRIPT)
+                       for script in (first_script, second_script)])
+
+    assert [frame['type'] for frame in frames] == ['result', 'completed', 'result', 'completed']
+    assert json.loads(get_results(frames)[1]) == {'leaked': False, 'table': {'key': 'value'}, 'log': []}
+
+
+@pytest.mark.skipif(PYTHON2 is None, reason='python 2 is not installed')
+def test_warm_script_print_is_a_function_on_python2():
+    frames = run_loop([build_context("print('a', 'b')", commonScript=COMMON_SCRIPT)], python=PYTHON2)
+
+    assert frames[0] == {'type': 'entryLog', 'args': {'message': 'a b'}}
+    assert [frame['type'] for frame in frames] == ['entryLog', 'completed']
+
+
+def test_buffered_messages_are_flushed_before_a_command():
+    script = '''
+demisto.debug('first')
+demisto.info('second')
+demisto.results(demisto.executeCommand('getIncidents', {}))
+demisto.debug('last')
+'''
+    frames = run_loop([build_context(script, batchMessages=True), '"incidents"'])
+
+    assert [frame['type'] for frame in frames] == ['batch', 'executeCommand', 'result', 'batch', 'completed']
+    assert [command['args']['args'] for command in frames[0]['commands']] == [['first'], ['second']]
+    assert get_results(frames) == ['incidents']
+    assert frames[3]['commands'][0]['args']['args'] == ['last']
+
+
+def test_messages_are_not_buffered_without_batching():
+    frames = run_loop([build_context('demisto.debug("first")\ndemisto.debug("second")'), '{}', '{}'])
+
+    assert [frame['type'] for frame in frames] == ['log', 'log', 'completed']
+
+
+def test_execute_command_batch():
+    script = '''
+demisto.results(demisto.executeCommandBatch([{'command': 'first'}, {'command': 'second', 'args': {'arg': 1}}]))
+'''
+    # servers without batching get a command per round trip
+    frames = run_loop([build_context(script), '"first result"', '"second result"'])
+    assert [(frame['type'], frame.get('command'), frame.get('args')) for frame in frames[:2]] == [
+        ('executeCommand', 'first', {}),
+        ('executeCommand', 'second', {'arg': 1})
+    ]
+    assert [entry['Contents'] for entry in frames[2]['results']] == ['first result', 'second result']
+
+    frames = run_loop([build_context(script, batchMessages=True), '["first result", "second result"]'])
+    assert frames[0] == {'type': 'executeCommandBatch', 'commands': [{'command': 'first', 'args': {}},
+                                                                     {'command': 'second', 'args': {'arg': 1}}]}
+    assert [entry['Contents'] for entry in frames[1]['results']] == ['first result', 'second result']
+
+
+@pytest.mark.parametrize('batch_messages', [False, True])
+def test_messages_of_concurrent_threads_do_not_interleave(batch_messages):
+    script = '''
+import threading
+
+def log(thread):
+    for i in range(25):
+        demisto.debug('{}-{}'.format(thread, i))
+
+threads = [threading.Thread(target=log, args=(thread,)) for thread in range(4)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+'''
+    replies = [] if batch_messages else ['{}'] * 100
+    frames = run_loop([build_context(script, batchMessages=batch_messages, batchSize=10)] + replies)
+
+    assert frames[-1]['type'] == 'completed'
+    if batch_messages:
+        assert {frame['type'] for frame in frames[:-1]} == {'batch'}
+        commands = [command for frame in frames[:-1] for command in frame['commands']]
+    else:
+        commands = frames[:-1]
+    assert sorted(command['args']['args'][0] for command in commands) == sorted(
+        '{}-{}'.format(thread, i) for thread in range(4) for i in range(25))
@@ -4,16 +4,21 @@ import re
 import sys
 import json
 import glob
+import time
 import shutil
 import zipfile
 import io
-import yaml
+import argparse
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing import Pool, cpu_count
 
 from Tests.scripts.constants import INTEGRATIONS_DIR, MISC_DIR, PLAYBOOKS_DIR, REPORTS_DIR, DASHBOARDS_DIR, \
     WIDGETS_DIR, SCRIPTS_DIR, INCIDENT_FIELDS_DIR, CLASSIFIERS_DIR, LAYOUTS_DIR, CONNECTIONS_DIR, \
     BETA_INTEGRATIONS_DIR, INDICATOR_FIELDS_DIR, INCIDENT_TYPES_DIR, TEST_PLAYBOOKS_DIR
-from Tests.test_utils import print_error, print_warning, run_command
-from package_creator import DIR_TO_PREFIX, merge_script_package_to_yml, write_yaml_with_docker
+from Tests.test_utils import print_error, print_warning, run_command, yaml_safe_load, get_file_hash
+from package_creator import DIR_TO_PREFIX, IS_CI, merge_script_package_to_yml, write_yaml_with_docker, \
+    get_yaml_with_docker_output_map
 
 
 CONTENT_DIRS = [
@@ -50,18 +55,34 @@ ZIP_TEST = 'content_test'
 MAX_FILE_NAME = 85
 LONG_FILE_NAMES = []
 
+# unified yml files of the packages, reused by the fast build while the package files did not change
+UNIFIED_CACHE_DIR = './.unified_packages_cache'
+UNIFIED_CACHE_MANIFEST = os.path.join(UNIFIED_CACHE_DIR, 'manifest.json')
+UNIFIED_CACHE_VERSION = 1
+
+
+@contextmanager
+def timed_phase(name):
+    start = time.time()
+    yield
+    print(f'{name} took {time.time() - start:.1f}s')
+
 
 def add_tools_to_bundle(bundle):
     for directory in glob.glob(os.path.join('Tools', '*')):
         zipf = zipfile.ZipFile(os.path.join(bundle, f'tools-{os.path.basename(directory)}.zip'), 'w',
                                zipfile.ZIP_DEFLATED)
-        zipf.comment = b'{ "system": true }'
-        for root, _, files in os.walk(directory):
-            for file in files:
-                zipf.write(os.path.join(root, file), file)
+        write_tool_files(zipf, directory)
         zipf.close()
 
 
+def write_tool_files(zipf, directory):
+    zipf.comment = b'{ "system": true }'
+    for root, _, files in os.walk(directory):
+        for file in files:
+            zipf.write(os.path.join(root, file), file)
+
+
 # modify incident fields file to contain only `incidentFields` field (array)
 # from { "incidentFields": [...]} to [...]
 def convert_incident_fields_to_array():
@@ -76,14 +97,23 @@ def convert_incident_fields_to_array():
                 file_.truncate()
 
 
+def is_unified_yaml(path):
+    return os.path.dirname(path) in DIR_TO_PREFIX.keys() and not os.path.basename(path).startswith('playbook-')
+
+
+def read_unified_yaml(path, yml_info):
+    script_obj = yml_info
+    if os.path.dirname(path) != 'Scripts':
+        script_obj = yml_info['script']
+    with io.open(path, mode='r', encoding='utf-8') as file_:
+        yml_text = file_.read()
+
+    return yml_text, script_obj
+
+
 def copy_yaml_post(path, out_path, yml_info):
-    dirname = os.path.dirname(path)
-    if dirname in DIR_TO_PREFIX.keys() and not os.path.basename(path).startswith('playbook-'):
-        script_obj = yml_info
-        if dirname != 'Scripts':
-            script_obj = yml_info['script']
-        with io.open(path, mode='r', encoding='utf-8') as file_:
-            yml_text = file_.read()
+    if is_unified_yaml(path):
+        yml_text, script_obj = read_unified_yaml(path, yml_info)
         out_map = write_yaml_with_docker(out_path, yml_text, yml_info, script_obj)
         if len(out_map.keys()) > 1:
             print(" - yaml generated multiple files: {}".format(out_map.keys()))
@@ -100,7 +130,7 @@ def copy_dir_yml(dir_name, bundle_post):
             LONG_FILE_NAMES.append(path)
 
         with open(path, 'r') as file_:
-            yml_info = yaml.safe_load(file_)
+            yml_info = yaml_safe_load(file_)
 
         ver = yml_info.get('fromversion', '0')
         print(f' - processing: {ver} ({path})')
@@ -109,21 +139,26 @@ def copy_dir_yml(dir_name, bundle_post):
     print(f' - total files: {post_files}')
 
 
+def get_json_bundle_name(dir_name, path):
+    dpath = os.path.basename(path)
+    # this part is a workaround because server doesn't support indicatorfield-*.json naming
+    if dir_name == 'IndicatorFields':
+        new_path = dpath.replace('incidentfield-', 'incidentfield-indicatorfield-')
+        if os.path.isfile(new_path):
+            raise NameError('Failed while trying to create {}. File already exists.'.format(new_path))
+        dpath = new_path
+
+    if len(dpath) >= MAX_FILE_NAME:
+        LONG_FILE_NAMES.append(os.path.basename(dpath))
+
+    return dpath
+
+
 def copy_dir_json(dir_name, bundle_post):
     # handle *.json files
     scan_files = glob.glob(os.path.join(dir_name, '*.json'))
     for path in scan_files:
-        dpath = os.path.basename(path)
-        # this part is a workaround because server doesn't support indicatorfield-*.json naming
-        if dir_name == 'IndicatorFields':
-            new_path = dpath.replace('incidentfield-', 'incidentfield-indicatorfield-')
-            if os.path.isfile(new_path):
-                raise NameError('Failed while trying to create {}. File already exists.'.format(new_path))
-            dpath = new_path
-
-        if len(dpath) >= MAX_FILE_NAME:
-            LONG_FILE_NAMES.append(os.path.basename(dpath))
-
+        dpath = get_json_bundle_name(dir_name, path)
         shutil.copyfile(path, os.path.join(bundle_post, dpath))
 
 
@@ -149,6 +184,196 @@ def copy_test_files(bundle_test):
             shutil.copyfile(path, os.path.join(bundle_test, os.path.basename(path)))
 
 
+def get_packages():
+    """Packages of the bundles, the packages we don't want to include in the content zip go to the test bundle.
+
+    Returns:
+        list -- (package path, package dir, bundle) tuples
+    """
+    packages = []
+    for package_dir in DIR_TO_PREFIX:
+        for package in glob.glob(os.path.join(package_dir, '*/')):
+            if any(package_to_skip in package for package_to_skip in PACKAGES_TO_SKIP):
+                print('skipping {}'.format(package))
+                packages.append((package, package_dir, BUNDLE_TEST))
+            else:
+                packages.append((package, package_dir, BUNDLE_POST))
+
+    return packages
+
+
+def load_unified_cache_manifest():
+    if not os.path.isfile(UNIFIED_CACHE_MANIFEST):
+        return {}
+    try:
+        with open(UNIFIED_CACHE_MANIFEST, 'r') as manifest_file:
+            manifest = json.load(manifest_file)
+    except ValueError:
+        print_warning(f'Ignoring the corrupted unified packages manifest {UNIFIED_CACHE_MANIFEST}')
+        return {}
+    # a change in the merge code changes the output of every package
+    if manifest.get('version') != UNIFIED_CACHE_VERSION or \
+            manifest.get('package_creator_hash') != get_file_hash('package_creator.py'):
+        return {}
+    return manifest.get('packages', {})
+
+
+def save_unified_cache_manifest(unified_packages):
+    with open(UNIFIED_CACHE_MANIFEST, 'w') as manifest_file:
+        json.dump({
+            'version': UNIFIED_CACHE_VERSION,
+            'package_creator_hash': get_file_hash('package_creator.py'),
+            'packages': unified_packages
+        }, manifest_file)
+
+
+def get_unified_file_paths(unified_package):
+    return [os.path.join(UNIFIED_CACHE_DIR, unified_package['bundle'], file_name)
+            for file_name in unified_package['files']]
+
+
+def unify_package(package):
+    package_path, package_dir, bundle = package
+    output_paths = merge_script_package_to_yml(package_path, package_dir, os.path.join(UNIFIED_CACHE_DIR, bundle))[0]
+    return package_path, [os.path.basename(output_path) for output_path in output_paths]
+
+
+def unify_packages(packages, processes=None):
+    """Unify the packages into UNIFIED_CACHE_DIR across a process pool, reusing the unified files of the packages
+    which did not change since the last build.
+
+    Args:
+        packages (list): (package path, package dir, bundle) tuples.
+        processes (int): number of worker processes, defaults to the number of CPUs.
+
+    Returns:
+        dict. Package path to its hash, bundle and unified file names.
+    """
+    cached_packages = load_unified_cache_manifest()
+    if not cached_packages and os.path.isdir(UNIFIED_CACHE_DIR):
+        shutil.rmtree(UNIFIED_CACHE_DIR)
+    for bundle in (BUNDLE_POST, BUNDLE_TEST):
+        os.makedirs(os.path.join(UNIFIED_CACHE_DIR, bundle), exist_ok=True)
+
+    unified_packages = {}
+    changed_packages = []
+    for package in packages:
+        package_path, _, bundle = package
+        package_hash = get_file_hash(package_path)
+        cached_package = cached_packages.pop(package_path, None)
+        if cached_package and cached_package['hash'] == package_hash and cached_package['bundle'] == bundle and \
+                all(os.path.isfile(path) for path in get_unified_file_paths(cached_package)):
+            unified_packages[package_path] = cached_package
+            continue
+
+        if cached_package:
+            cached_packages[package_path] = cached_package
+        unified_packages[package_path] = {'hash': package_hash, 'bundle': bundle, 'files': []}
+        changed_packages.append(package)
+
+    # remove the outdated unified files of changed and deleted packages
+    for cached_package in cached_packages.values():
+        for path in get_unified_file_paths(cached_package):
+            if os.path.isfile(path):
+                os.remove(path)
+
+    print(f'{len(packages) - len(changed_packages)} unchanged packages, unifying {len(changed_packages)} packages')
+    if changed_packages:
+        pool = Pool(processes=processes or cpu_count())
+        try:
+            for package_path, file_names in pool.imap_unordered(unify_package, changed_packages):
+                unified_packages[package_path]['files'] = file_names
+        finally:
+            pool.close()
+            pool.join()
+
+    save_unified_cache_manifest(unified_packages)
+    return unified_packages
+
+
+def get_bundles_entries(unified_packages):
+    """Entries of the post and test bundle zips, in the order the bundle dirs are filled in the regular build, so a
+    later entry replaces an earlier one with the same name just like a copied file does.
+
+    Args:
+        unified_packages (dict): the result of unify_packages.
+
+    Returns:
+        dict. Bundle name to an OrderedDict of entry name to its source, a file path or the file data (bytes).
+    """
+    bundles = {BUNDLE_POST: OrderedDict(), BUNDLE_TEST: OrderedDict()}
+    post_entries = bundles[BUNDLE_POST]
+
+    for directory in glob.glob(os.path.join('Tools', '*')):
+        tool_zip = io.BytesIO()
+        with zipfile.ZipFile(tool_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            write_tool_files(zipf, directory)
+        post_entries[f'tools-{os.path.basename(directory)}.zip'] = tool_zip.getvalue()
+
+    for unified_package in unified_packages.values():
+        for file_name, path in zip(unified_package['files'], get_unified_file_paths(unified_package)):
+            bundles[unified_package['bundle']][file_name] = path
+
+    for content_dir in CONTENT_DIRS:
+        for path in glob.glob(os.path.join(content_dir, '*.json')):
+            post_entries[get_json_bundle_name(content_dir, path)] = path
+
+        for path in glob.glob(os.path.join(content_dir, '*.yml')):
+            if len(os.path.basename(path)) >= MAX_FILE_NAME:
+                LONG_FILE_NAMES.append(path)
+
+            if not is_unified_yaml(path):
+                post_entries[os.path.basename(path)] = path
+                continue
+
+            with open(path, 'r') as file_:
+                yml_info = yaml_safe_load(file_)
+            yml_text, script_obj = read_unified_yaml(path, yml_info)
+            out_map = get_yaml_with_docker_output_map(os.path.basename(path), yml_text, yml_info, script_obj)
+            for file_name, file_text in out_map.items():
+                if IS_CI and file_name in post_entries:
+                    raise ValueError(f'Output file already exists: {file_name}. Make sure to remove this file from '
+                                     f'source control or rename this package (for example if it is a v2).')
+                post_entries[file_name] = file_text.encode('utf-8')
+
+    for path in glob.glob(os.path.join(TEST_PLAYBOOKS_DIR, '*')):
+        test_paths = glob.glob(os.path.join(path, '*')) if os.path.isdir(path) else [path]
+        for test_path in test_paths:
+            bundles[BUNDLE_TEST][os.path.basename(test_path)] = test_path
+
+    for entries in bundles.values():
+        entries['content-descriptor.json'] = 'content-descriptor.json'
+    post_entries['doc-CommonServer.json'] = './Documentation/doc-CommonServer.json'
+
+    return bundles
+
+
+def write_bundle_zip(zip_path, entries):
+    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for name, source in entries.items():
+            if isinstance(source, bytes):
+                zipf.writestr(name, source)
+            else:
+                zipf.write(source, name)
+
+
+def create_bundles_fast(circle_artifacts, processes=None):
+    """Create the content zips in circle_artifacts without the bundle dirs: the packages are unified in parallel
+    (only the ones which changed since the last fast build) and all the files are written straight into the zips."""
+    with timed_phase('Converting incident fields'):
+        convert_incident_fields_to_array()
+
+    with timed_phase('Unifying packages'):
+        unified_packages = unify_packages(get_packages(), processes)
+
+    with timed_phase('Collecting bundle files'):
+        bundles = get_bundles_entries(unified_packages)
+
+    with timed_phase('Compressing bundles'):
+        write_bundle_zip(os.path.join(circle_artifacts, ZIP_POST + '.zip'), bundles[BUNDLE_POST])
+        write_bundle_zip(os.path.join(circle_artifacts, ZIP_TEST + '.zip'), bundles[BUNDLE_TEST])
+
+
 def update_content_version(content_ver: str, path: str = './Scripts/CommonServerPython/CommonServerPython.py'):
     regex = r'CONTENT_RELEASE_VERSION = .*'
     try:
@@ -179,58 +404,83 @@ def update_branch(path: str = './Scripts/CommonServerPython/CommonServerPython.p
     return branch_name
 
 
-def main(circle_artifacts, content_version):
+def main(circle_artifacts, content_version, fast=False, processes=None):
 
     # update content_version in commonServerPython
     update_content_version(content_version)
     branch_name = update_branch()
     print(f'Updating CommonServerPython with branch {branch_name} and content version {content_version}')
     print('Starting to create content artifact...')
-    print('creating dir for bundles...')
-    for bundle_dir in [BUNDLE_POST, BUNDLE_TEST]:
-        os.mkdir(bundle_dir)
+    if fast:
+        create_bundles_fast(circle_artifacts, processes)
+    else:
+        create_bundles(circle_artifacts)
 
-    add_tools_to_bundle(BUNDLE_POST)
-
-    convert_incident_fields_to_array()
-
-    for package_dir in DIR_TO_PREFIX:
-        scanned_packages = glob.glob(os.path.join(package_dir, '*/'))
-        for package in scanned_packages:
-            if any(package_to_skip in package for package_to_skip in PACKAGES_TO_SKIP):
-                # there are some packages that we don't want to include in the content zip
-                # for example HelloWorld integration
-                merge_script_package_to_yml(package, package_dir, BUNDLE_TEST)
-                print('skipping {}'.format(package))
-            else:
-                merge_script_package_to_yml(package, package_dir, BUNDLE_POST)
+    shutil.copyfile("./Tests/id_set.json", os.path.join(circle_artifacts, "id_set.json"))
 
-    for content_dir in CONTENT_DIRS:
-        print(f'Copying dir {content_dir} to bundles...')
-        copy_dir_files(content_dir, BUNDLE_POST)
+    shutil.copyfile('release-notes.md', os.path.join(circle_artifacts, 'release-notes.md'))
+    print(f'finished create content artifact at {circle_artifacts}')
 
-    copy_test_files(BUNDLE_TEST)
 
-    print('Copying content descriptor to bundles')
+def create_bundles(circle_artifacts):
+    print('creating dir for bundles...')
     for bundle_dir in [BUNDLE_POST, BUNDLE_TEST]:
-        shutil.copyfile('content-descriptor.json', os.path.join(bundle_dir, 'content-descriptor.json'))
-
-    print('copying common server doc to bundles')
-    shutil.copyfile('./Documentation/doc-CommonServer.json', os.path.join(BUNDLE_POST, 'doc-CommonServer.json'))
-
-    print('Compressing bundles...')
-    shutil.make_archive(ZIP_POST, 'zip', BUNDLE_POST)
-    shutil.make_archive(ZIP_TEST, 'zip', BUNDLE_TEST)
-    shutil.copyfile(ZIP_POST + '.zip', os.path.join(circle_artifacts, ZIP_POST + '.zip'))
-    shutil.copyfile(ZIP_TEST + '.zip', os.path.join(circle_artifacts, ZIP_TEST + '.zip'))
-    shutil.copyfile("./Tests/id_set.json", os.path.join(circle_artifacts, "id_set.json"))
+        os.mkdir(bundle_dir)
 
-    shutil.copyfile('release-notes.md', os.path.join(circle_artifacts, 'release-notes.md'))
-    print(f'finished create content artifact at {circle_artifacts}')
+    with timed_phase('Adding tools'):
+        add_tools_to_bundle(BUNDLE_POST)
+
+    with timed_phase('Converting incident fields'):
+        convert_incident_fields_to_array()
+
+    with timed_phase('Unifying packages'):
+        for package_dir in DIR_TO_PREFIX:
+            scanned_packages = glob.glob(os.path.join(package_dir, '*/'))
+            for package in scanned_packages:
+                if any(package_to_skip in package for package_to_skip in PACKAGES_TO_SKIP):
+                    # there are some packages that we don't want to include in the content zip
+                    # for example HelloWorld integration
+                    merge_script_package_to_yml(package, package_dir, BUNDLE_TEST)
+                    print('skipping {}'.format(package))
+                else:
+                    merge_script_package_to_yml(package, package_dir, BUNDLE_POST)
+
+    with timed_phase('Copying content dirs'):
+        for content_dir in CONTENT_DIRS:
+            print(f'Copying dir {content_dir} to bundles...')
+            copy_dir_files(content_dir, BUNDLE_POST)
+
+        copy_test_files(BUNDLE_TEST)
+
+        print('Copying content descriptor to bundles')
+        for bundle_dir in [BUNDLE_POST, BUNDLE_TEST]:
+            shutil.copyfile('content-descriptor.json', os.path.join(bundle_dir, 'content-descriptor.json'))
+
+        print('copying common server doc to bundles')
+        shutil.copyfile('./Documentation/doc-CommonServer.json', os.path.join(BUNDLE_POST, 'doc-CommonServer.json'))
+
+    with timed_phase('Compressing bundles'):
+        print('Compressing bundles...')
+        shutil.make_archive(ZIP_POST, 'zip', BUNDLE_POST)
+        shutil.make_archive(ZIP_TEST, 'zip', BUNDLE_TEST)
+        shutil.copyfile(ZIP_POST + '.zip', os.path.join(circle_artifacts, ZIP_POST + '.zip'))
+        shutil.copyfile(ZIP_TEST + '.zip', os.path.join(circle_artifacts, ZIP_TEST + '.zip'))
+
+
+def get_args():
+    parser = argparse.ArgumentParser(description='Create the content zips (content_new.zip, content_test.zip)')
+    parser.add_argument('circle_artifacts', help='The directory to create the artifacts in')
+    parser.add_argument('content_version', help='The content version to set in CommonServerPython')
+    parser.add_argument('-f', '--fast', action='store_true',
+                        help='Unify the packages in parallel, reuse the unified files of unchanged packages '
+                             'and write the zips without the bundle dirs')
+    parser.add_argument('-p', '--processes', type=int, help='Number of worker processes for the fast build')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    main(*sys.argv[1:])
+    options = get_args()
+    main(options.circle_artifacts, options.content_version, fast=options.fast, processes=options.processes)
     if LONG_FILE_NAMES:
         print_error(f'The following files exceeded to file name length limit of {MAX_FILE_NAME}:\n'
                     f'{json.dumps(LONG_FILE_NAMES, indent=4)}')
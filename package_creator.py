@@ -7,9 +7,8 @@ import glob
 import base64
 import argparse
 import re
-import yaml
 
-from Tests.test_utils import server_version_compare
+from Tests.test_utils import server_version_compare, yaml_safe_load
 
 IS_CI = os.getenv('CI', False)
 
@@ -33,6 +32,29 @@ def write_yaml_with_docker(output_path, yml_text, yml_data, script_obj):
     If it is present will create 2 integration files
     One for 4.5 and below and one for 5.0.
 
+    Arguments:
+        output_path {str} -- output path
+        yml_text {str} -- yml text
+        yml_data {dict} -- yml object
+        script_obj {dict} -- script object
+
+    Returns:
+        dict -- dictionary mapping output path to text data
+    """
+    output_map = get_yaml_with_docker_output_map(output_path, yml_text, yml_data, script_obj)
+    for file_path, file_text in output_map.items():
+        if IS_CI and os.path.isfile(file_path):
+            raise ValueError('Output file already exists: {}.'
+                             ' Make sure to remove this file from source control'
+                             ' or rename this package (for example if it is a v2).'.format(output_path))
+        with io.open(file_path, mode='w', encoding='utf-8') as file_:
+            file_.write(file_text)
+    return output_map
+
+
+def get_yaml_with_docker_output_map(output_path, yml_text, yml_data, script_obj):
+    """Same as write_yaml_with_docker, without writing the files.
+
     Arguments:
         output_path {str} -- output path
         yml_text {str} -- yml text
@@ -71,13 +93,6 @@ def write_yaml_with_docker(output_path, yml_text, yml_data, script_obj):
             output_path: yml_text,
             output_path45: yml_text45
         }
-    for file_path, file_text in output_map.items():
-        if IS_CI and os.path.isfile(file_path):
-            raise ValueError('Output file already exists: {}.'
-                             ' Make sure to remove this file from source control'
-                             ' or rename this package (for example if it is a v2).'.format(output_path))
-        with io.open(file_path, mode='w', encoding='utf-8') as file_:
-            file_.write(file_text)
     return output_map
 
 
@@ -111,7 +126,7 @@ def merge_script_package_to_yml(package_path, dir_name, dest_path=""):
             break
 
     with open(yml_path, 'r') as yml_file:
-        yml_data = yaml.safe_load(yml_file)
+        yml_data = yaml_safe_load(yml_file)
 
     script_obj = yml_data
 
@@ -144,7 +159,7 @@ def insert_image_to_yml(dir_name, package_path, yml_data, yml_text):
     else:
         yml_text = 'image: ' + image_data + '\n' + yml_text
     # verify that our yml is good (loads and returns the image)
-    mod_yml_data = yaml.safe_load(yml_text)
+    mod_yml_data = yaml_safe_load(yml_text)
     yml_image = mod_yml_data.get('image')
     assert yml_image.strip() == image_data.strip()
 
@@ -237,7 +252,7 @@ def insert_script_to_yml(package_path, script_type, yml_text, dir_name, yml_data
     yml_text = yml_text.replace("script: '-'", "script: " + script_code)
 
     # verify that our yml is good (loads and returns the code)
-    mod_yml_data = yaml.safe_load(yml_text)
+    mod_yml_data = yaml_safe_load(yml_text)
     if dir_name == 'Scripts':
         yml_script = mod_yml_data.get('script')
     else: